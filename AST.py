@@ -1,14 +1,30 @@
 from __future__ import annotations
-from typing import List, Optional
-import sys
+# typing is slow to import and the annotations are never evaluated, so only
+# type checkers import it
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, List, Optional, Tuple
+from errors import UndefinedNameError
 
-# Nodes of the AST, to be created by Recursive Descent Parsing
+# Nodes of the AST, to be created by Recursive Descent Parsing.
+# They are slotted, since a large program is made of millions of them
+
+# Binary operators are stored in the nodes as small ints
+ADD, SUB, MUL, DIV, MOD, LT, LE, GT, GE, EQ, NE, AND, OR = range(13)
+OPERATORS: List[str] = ['+', '-', '*', '/', '%', '<', '<=', '>', '>=', '==', '!=', 'and', 'or']
+OPERATOR_CODES: Dict[str, int] = {op: code for code, op in enumerate(OPERATORS)}
 
 class Stmt:
+    # Statements can be weakly referenced, so that their compiled forms can be
+    # cached for as long as they are alive
+    __slots__ = ('__weakref__',)
+
     def accept(self, i: Interpreter):
         pass
 
 class LetDecl(Stmt):
+    __slots__ = ('name', 'expr')
+
     def __init__(self, name : str, expr: Optional[Expr]):
         self.name: str = name
         self.expr: Optional[Expr] = expr
@@ -21,6 +37,8 @@ class LetDecl(Stmt):
         return value
     
 class ExprStmt(Stmt):
+    __slots__ = ('expr',)
+
     def __init__(self, expr: Expr):
         self.expr: Expr = expr
 
@@ -28,6 +46,8 @@ class ExprStmt(Stmt):
         return self.expr.accept(i)
 
 class PrintStmt(Stmt):
+    __slots__ = ('expr',)
+
     def __init__(self, expr: Expr):
         self.expr: Expr = expr
 
@@ -36,13 +56,29 @@ class PrintStmt(Stmt):
 
 # Classes for expressions  
 class Expr:
+    __slots__ = ()
+
     def accept(self, i: Interpreter) -> float:
         return float('inf')
 
-class Assignment(Expr):
-    def __init__(self, word: str, expr: Expr):
+# Expressions that can fail at runtime remember where they are in the source.
+# The line and column are two ints, like those of a Token, since a tuple would
+# take as much memory as the rest of the node. A line of 0 means no position
+class LocatedExpr(Expr):
+    __slots__ = ('line', 'column')
+
+    @property
+    def position(self) -> Optional[Tuple[int, int]]:
+        return (self.line, self.column) if self.line else None
+
+class Assignment(LocatedExpr):
+    __slots__ = ('word', 'expr')
+
+    def __init__(self, word: str, expr: Expr, line: int = 0, column: int = 0):
         self.word = word
         self.expr = expr
+        self.line: int = line
+        self.column: int = column
 
     def accept(self, i: Interpreter) -> float:
         if self.word in i.environment:
@@ -50,65 +86,153 @@ class Assignment(Expr):
             i.environment[self.word] = value
             return value
         
-        print(f"Name Error: Variable {self.word} does not exist")
-        sys.exit()
+        raise UndefinedNameError(f"Variable {self.word} does not exist", self.position)
         
-class BinaryExpr(Expr):
-    def __init__(self, left: Expr, operator: str, right: Expr):
+class BinaryExpr(LocatedExpr):
+    # The position is the one of the operator
+    __slots__ = ('left', 'operator', 'right')
+
+    def __init__(self, left: Expr, operator: int, right: Expr, line: int = 0, column: int = 0):
         self.left: Expr = left
-        self.operator: str = operator
+        self.operator: int = operator
         self.right: Expr = right
+        self.line: int = line
+        self.column: int = column
 
     def accept(self, i: Interpreter):
         pass
 
+    # Evaluates the node given the value of its left operand
+    def apply(self, i: Interpreter, left: float):
+        pass
+
 class LogicalExpr(BinaryExpr):
-    def __init__(self, left: Expr, operator: str, right: Expr):
-        super().__init__(left, operator, right)
+    __slots__ = ()
+
+    def __init__(self, left: Expr, operator: int, right: Expr, line: int = 0, column: int = 0):
+        super().__init__(left, operator, right, line, column)
 
     def accept(self, i: Interpreter) -> float:
-        return i.execute_logical_expr(self)
+        left: Expr = self.left
+        if isinstance(left, BinaryExpr):
+            return i.execute_logical_expr(self, i.left_operand(left))
+        return i.execute_logical_expr(self, left.accept(i))
+
+    def apply(self, i: Interpreter, left: float) -> float:
+        return i.execute_logical_expr(self, left)
     
 class EqualityExpr(BinaryExpr):
-    def __init__(self, left: Expr, operator: str, right: Expr):
-        super().__init__(left, operator, right)
+    __slots__ = ()
+
+    def __init__(self, left: Expr, operator: int, right: Expr, line: int = 0, column: int = 0):
+        super().__init__(left, operator, right, line, column)
 
     def accept(self, i: Interpreter) -> float:
-        return i.execute_equality_expr(self)
+        left: Expr = self.left
+        if isinstance(left, BinaryExpr):
+            return i.execute_equality_expr(self, i.left_operand(left))
+        return i.execute_equality_expr(self, left.accept(i))
+
+    def apply(self, i: Interpreter, left: float) -> float:
+        return i.execute_equality_expr(self, left)
     
 class RelationalExpr(BinaryExpr):
-    def __init__(self, left: Expr, operator: str, right: Expr):
-        super().__init__(left, operator, right)
+    __slots__ = ()
+
+    def __init__(self, left: Expr, operator: int, right: Expr, line: int = 0, column: int = 0):
+        super().__init__(left, operator, right, line, column)
 
     def accept(self, i: Interpreter) -> float:
-        return i.execute_relational_expr(self)
+        left: Expr = self.left
+        if isinstance(left, BinaryExpr):
+            return i.execute_relational_expr(self, i.left_operand(left))
+        return i.execute_relational_expr(self, left.accept(i))
+
+    def apply(self, i: Interpreter, left: float) -> float:
+        return i.execute_relational_expr(self, left)
     
 class AddExpr(BinaryExpr):
-    def __init__(self, left: Expr, operator: str, right: Expr):
-        super().__init__(left, operator, right)
+    __slots__ = ()
+
+    def __init__(self, left: Expr, operator: int, right: Expr, line: int = 0, column: int = 0):
+        super().__init__(left, operator, right, line, column)
 
     def accept(self, i: Interpreter) -> float:
-        return i.execute_add_expr(self)
+        left: Expr = self.left
+        if isinstance(left, BinaryExpr):
+            return i.execute_add_expr(self, i.left_operand(left))
+        return i.execute_add_expr(self, left.accept(i))
+
+    def apply(self, i: Interpreter, left: float) -> float:
+        return i.execute_add_expr(self, left)
     
 class ModulusExpr(BinaryExpr):
-    def __init__(self, left: Expr,  right: Expr):
-        super().__init__(left, '%', right)
+    __slots__ = ()
+
+    def __init__(self, left: Expr, right: Expr, line: int = 0, column: int = 0):
+        super().__init__(left, MOD, right, line, column)
 
     def accept(self, i: Interpreter) -> float:
-        return i.execute_modulus_expr(self)
+        left: Expr = self.left
+        if isinstance(left, BinaryExpr):
+            return i.execute_modulus_expr(self, i.left_operand(left))
+        return i.execute_modulus_expr(self, left.accept(i))
+
+    def apply(self, i: Interpreter, left: float) -> float:
+        return i.execute_modulus_expr(self, left)
 
 class MulExpr(BinaryExpr):
-    def __init__(self, left: Expr, operator: str, right: Expr):
-        super().__init__(left, operator, right)
+    __slots__ = ()
+
+    def __init__(self, left: Expr, operator: int, right: Expr, line: int = 0, column: int = 0):
+        super().__init__(left, operator, right, line, column)
 
     def accept(self, i: Interpreter) -> float:
-        return i.execute_mul_expr(self)
+        left: Expr = self.left
+        if isinstance(left, BinaryExpr):
+            return i.execute_mul_expr(self, i.left_operand(left))
+        return i.execute_mul_expr(self, left.accept(i))
+
+    def apply(self, i: Interpreter, left: float) -> float:
+        return i.execute_mul_expr(self, left)
+
+# Builds the node of a binary operator from its code
+def make_binary_expr(left: Expr, operator: int, right: Expr, line: int = 0, column: int = 0) -> Expr:
+    if operator == AND or operator == OR:
+        return LogicalExpr(left, operator, right, line, column)
+    elif operator == EQ or operator == NE:
+        return EqualityExpr(left, operator, right, line, column)
+    elif operator == ADD or operator == SUB:
+        return AddExpr(left, operator, right, line, column)
+    elif operator == MOD:
+        return ModulusExpr(left, right, line, column)
+    elif operator == MUL or operator == DIV:
+        return MulExpr(left, operator, right, line, column)
+    return RelationalExpr(left, operator, right, line, column)
+
+# Long operator chains build trees that lean to the left, deeper than Python can
+# recurse, so every pass walks their left spine with a loop instead
+def left_spine(expr: BinaryExpr) -> List[BinaryExpr]:
+    '''
+    Returns the binary expressions down the left operands of expr, expr first.
+    The left operand of the last one isn't a binary expression
+    '''
+    spine: List[BinaryExpr] = []
+    e: Expr = expr
+    while isinstance(e, BinaryExpr):
+        spine.append(e)
+        e = e.left
+    return spine
 
 class UnaryExpr(Expr):
+    __slots__ = ('expr',)
+
     def __init__(self, expr: Expr):
         self.expr: Expr = expr
 
 class NegateExpr(UnaryExpr):
+    __slots__ = ()
+
     def __init__(self, expr: Expr):
         super().__init__(expr)
 
@@ -116,6 +240,8 @@ class NegateExpr(UnaryExpr):
         return i.execute_negate_expr(self)
     
 class NotExpr(UnaryExpr):
+    __slots__ = ()
+
     def __init__(self, expr: Expr):
         super().__init__(expr)
 
@@ -123,8 +249,11 @@ class NotExpr(UnaryExpr):
         return i.execute_not_expr(self)
 
 class Primary(Expr):
-    pass
+    __slots__ = ()
+
 class NumberNode(Primary):
+    __slots__ = ('value',)
+
     def __init__(self, value: float):
         self.value: float = value
 
@@ -132,20 +261,95 @@ class NumberNode(Primary):
         return i.execute_number_node(self)
     
 class BooleanNode(Primary):
+    __slots__ = ('value',)
+
     def __init__(self, value: bool):
         self.value : bool = value
 
     def accept(self, i: Interpreter) -> float:
         return i.execute_bool_node(self)
 
-class IdentifierNode(Expr):
-    def __init__(self, word: str):
+class IdentifierNode(LocatedExpr):
+    __slots__ = ('word',)
+
+    def __init__(self, word: str, line: int = 0, column: int = 0):
         self.word = word
+        self.line: int = line
+        self.column: int = column
 
     def accept(self, i: Interpreter) -> float:
         try:
             value = i.environment[self.word]
             return value
         except KeyError:
-            print(f"Undefined variable '{self.word}'")
-            sys.exit()
\ No newline at end of file
+            raise UndefinedNameError(f"Undefined variable '{self.word}'", self.position) from None
+
+# Nodes whose variable has been resolved to a slot of the environment by the
+# Resolver. They read Interpreter.environment.cells directly, where a variable
+# that was declared but never got a value holds None
+class SlotLetDecl(LetDecl):
+    __slots__ = ('slot',)
+
+    def __init__(self, name: str, slot: int, expr: Optional[Expr]):
+        super().__init__(name, expr)
+        self.slot: int = slot
+
+    def accept(self, i: Interpreter) -> Optional[float]:
+        if self.expr is None:
+            return None
+        value: float = self.expr.accept(i)
+        i.environment.cells[self.slot] = value
+        return value
+
+class SlotAssignment(Assignment):
+    __slots__ = ('slot',)
+
+    def __init__(self, word: str, slot: int, expr: Expr, line: int = 0, column: int = 0):
+        super().__init__(word, expr, line, column)
+        self.slot: int = slot
+
+    def accept(self, i: Interpreter) -> float:
+        cells: list = i.environment.cells
+        if cells[self.slot] is None:
+            raise UndefinedNameError(f"Variable {self.word} does not exist", self.position)
+        value: float = self.expr.accept(i)
+        cells[self.slot] = value
+        return value
+
+class SlotIdentifierNode(IdentifierNode):
+    __slots__ = ('slot',)
+
+    def __init__(self, word: str, slot: int, line: int = 0, column: int = 0):
+        super().__init__(word, line, column)
+        self.slot: int = slot
+
+    def accept(self, i: Interpreter) -> float:
+        value: Optional[float] = i.environment.cells[self.slot]
+        if value is None:
+            raise UndefinedNameError(f"Undefined variable '{self.word}'", self.position)
+        return value
+
+# Nodes added by the SubexpressionEliminator. A statement whose subexpressions
+# repeat gets a MemoExpr at the root of its expression, and every copy of a
+# repeated subexpression is replaced by the same CommonExpr, which evaluates it
+# the first time and then returns the value remembered in the memo
+class MemoExpr(Expr):
+    __slots__ = ('expr', 'size')
+
+    def __init__(self, expr: Expr, size: int):
+        self.expr: Expr = expr
+        # The number of CommonExprs below, each with its slot in the memo
+        self.size: int = size
+
+    def accept(self, i: Interpreter) -> float:
+        return i.execute_memo_expr(self)
+
+class CommonExpr(Expr):
+    __slots__ = ('expr', 'slot')
+
+    def __init__(self, expr: Expr, slot: int):
+        self.expr: Expr = expr
+        self.slot: int = slot
+
+    def accept(self, i: Interpreter) -> float:
+        return i.execute_common_expr(self)
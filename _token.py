@@ -1,76 +1,125 @@
-# Tokens for the scanner
+from errors import LexicalError
+
+# Tokens for the scanner. They are slotted and build their repr only when asked,
+# since a large program is made of millions of them.
+# The scanner sets the line and column of every token, both start at 1
 class Token:
-    def __init__(self, repr: str):
-        self.repr: str = repr
-        
+    __slots__ = ('line', 'column')
+
     def __repr__(self) -> str:
-        return self.repr
+        return 'Token'
 
     def __str__(self) -> str:
-        return self.repr
+        return self.__repr__()
+
+class NumberToken(Token):
+    __slots__ = ('value',)
 
-class NumberToken(Token):  
     def __init__(self, value: float):
-        super().__init__(str(value))
         self.value: float = value
 
+    def __repr__(self) -> str:
+        return str(self.value)
+
 class String(Token):
+    __slots__ = ('value',)
+
     def __init__(self, s: str):
-        super().__init__(f'"{s}"')
         self.value: str = s
 
+    def __repr__(self) -> str:
+        return f'"{self.value}"'
+
 class Boolean(Token):
+    __slots__ = ('value',)
+
     def __init__(self, value: bool):
-        super().__init__(str(value))
         self.value: bool = value
 
+    def __repr__(self) -> str:
+        return str(self.value)
+
 class Identifier(Token):
+    __slots__ = ('word',)
+
     def __init__(self, s: str):
-        super().__init__(str(s))
         self.word : str = s
 
+    def __repr__(self) -> str:
+        return self.word
+
 class Parenthesis(Token):
+    __slots__ = ('symbol',)
+
     def __init__(self, symbol: str):
-        super().__init__(symbol)
         self.symbol: str = symbol
 
+    def __repr__(self) -> str:
+        return self.symbol
+
 class Brace(Token):
+    __slots__ = ('symbol',)
+
     def __init__(self, symbol: str):
-        super().__init__(symbol)
         self.symbol: str = symbol
 
-class MathOP(Token):
-    def __init__(self, op: str):
-        super().__init__(op)
-        self.op: str = op
+    def __repr__(self) -> str:
+        return self.symbol
 
-class RelationalOP(Token):
-    def __init__(self, op: str):
-        super().__init__(op)
-        self.op: str = op
+class Operator(Token):
+    __slots__ = ('op',)
 
-class EqualityOP(Token):
     def __init__(self, op: str):
-        super().__init__(op)
         self.op: str = op
 
-class LogicalOP(Token):
-    def __init__(self, op: str):
-        super().__init__(op)
-        self.op: str = op
+    def __repr__(self) -> str:
+        return self.op
+
+class MathOP(Operator):
+    __slots__ = ()
+
+class RelationalOP(Operator):
+    __slots__ = ()
+
+class EqualityOP(Operator):
+    __slots__ = ()
+
+class LogicalOP(Operator):
+    __slots__ = ()
 
 class AssignmentOP(Token):
-    def __init__(self):
-        super().__init__("=")
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return '='
 
 class NotOP(Token):
-    def __init__(self):
-        super().__init__('not')
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return 'not'
 
 class Semicolon(Token):
-    def __init__(self):
-        super().__init__(';')
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return ';'
 
 class EOFToken(Token):
-    def __init__(self):
-        super().__init__('EOF')
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return 'EOF'
+
+class ErrorToken(Token):
+    '''
+    Takes the place of a lexeme the scanner couldn't read, so that scanning can
+    go on. The parser raises the error when it reaches this token
+    '''
+    __slots__ = ('error',)
+
+    def __init__(self, error: LexicalError):
+        self.error: LexicalError = error
+
+    def __repr__(self) -> str:
+        return 'ERROR'
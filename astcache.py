@@ -0,0 +1,76 @@
+from __future__ import annotations
+import os
+import marshal
+from AST import *
+from snapshot import SnapshotWriter, build_statements, decode_values
+if TYPE_CHECKING:
+    from typing import Any, Dict, List, Optional, Tuple
+    from numeric import NumericMode
+
+# An AST cache file holds, marshalled, its version and a dict from the numeric
+# mode and the source of a command to its statements. They are encoded like the
+# scripts of a snapshot: the bytes of their nodes in postfix order, of their
+# literals and of the references of the literals, then the strings
+VERSION: int = 1
+
+
+class ASTCache:
+    '''
+    Keeps the statements parsed from short sources in a file, so that the next
+    processes started to run one of them load its statements instead of
+    scanning and parsing it, which spares them importing the scanner and the
+    parser too. The oldest entries are dropped beyond size
+    '''
+    def __init__(self, path: str, size: int = 1024):
+        self.path: str = path
+        self.size: int = size
+        self.entries: Dict[Tuple[str, str], tuple] = {}
+        self.changed: bool = False
+        try:
+            with open(path, 'rb') as f:
+                version, entries = marshal.load(f)
+            if version == VERSION:
+                self.entries = entries
+        except (OSError, EOFError, ValueError, TypeError):
+            # A cache that is missing or damaged starts empty
+            pass
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, numbers: NumericMode, source: str) -> Optional[List[Stmt]]:
+        entry: Optional[tuple] = self.entries.get((repr(numbers), source))
+        if entry is None:
+            return None
+        nodes, values, references, strings = entry
+        literals: List[Any] = memoryview(values).cast('d').tolist()
+        decode_values(literals, memoryview(references).cast('i').tolist(), strings, numbers.number)
+        postfix: List[int] = memoryview(nodes).cast('i').tolist()
+        return build_statements(postfix, 0, len(postfix), literals, strings)
+
+    def put(self, numbers: NumericMode, source: str, script: List[Stmt]) -> None:
+        '''
+        Adds the statements parsed from a source, before any pass rewrote them
+        '''
+        writer = SnapshotWriter(numbers.name)
+        for stmt in script:
+            writer.stmt(stmt)
+        # The key of a decimal mode holds its precision, its literals are rounded to it
+        key: Tuple[str, str] = (repr(numbers), source)
+        self.entries.pop(key, None)
+        self.entries[key] = (writer.nodes.tobytes(), writer.values.tobytes(), writer.references.tobytes(),
+                             tuple(writer.strings))
+        while len(self.entries) > self.size:
+            del self.entries[next(iter(self.entries))]
+        self.changed = True
+
+    def save(self) -> None:
+        if not self.changed:
+            return
+        # The file is written aside then renamed, so that the processes running
+        # at the same time never read half of it
+        temporary: str = f"{self.path}.{os.getpid()}"
+        with open(temporary, 'wb') as f:
+            marshal.dump((VERSION, self.entries), f)
+        os.replace(temporary, self.path)
+        self.changed = False
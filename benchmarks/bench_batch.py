@@ -0,0 +1,49 @@
+# Measures the throughput of the batch mode in statements per second
+import io
+import os
+import sys
+import time
+import random
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+
+def generate_script(size: int, seed: int = 0) -> str:
+    '''
+    Generates a script of roughly `size` bytes made of let declarations,
+    assignments and prints
+    '''
+    rng = random.Random(seed)
+    lines = ['let a = 1;', 'let b = 2;', 'let c = 3;']
+    length = sum(len(line) + 1 for line in lines)
+    names = 'abc'
+    while length < size:
+        kind = rng.randrange(3)
+        x, y = rng.choice(names), rng.choice(names)
+        n = rng.randint(1, 100)
+        if kind == 0:
+            line = f'{x} = {y} * {n} % 97 + 1;'
+        elif kind == 1:
+            line = f'let {x} = ({x} + {y}) % {n} + 1;'
+        else:
+            line = f'print {x} < {y} and {y} <= {n};'
+        lines.append(line)
+        length += len(line) + 1
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    for megabytes in (1, 2, 4):
+        source = generate_script(megabytes * 1024 * 1024)
+        i = Interpreter()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            count = i.run_source(source)
+        elapsed = time.perf_counter() - start
+        print(f'{megabytes} MB: {count} statements in {elapsed:.2f}s ({count / elapsed:.0f} stmts/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# Evaluates one expression over the rows of a generated CSV file, comparing the
+# bulk evaluator with running the statement through the interpreter for every
+# row, checks that both print the same lines, and that the memory used by the
+# bulk evaluator doesn't grow with the number of rows
+import os
+import io
+import sys
+import csv
+import time
+import random
+import tempfile
+import contextlib
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+from bulk import write_results
+from errors import CalcError
+
+EXPRESSION = 'price * qty * (1 + rate / 100) - (qty > 10 and price >= 50) * 5 + 100 / (qty - 3)'
+
+
+def write_csv(path: str, rows: int, seed: int = 0) -> None:
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['price', 'qty', 'rate'])
+        for _ in range(rows):
+            writer.writerow([round(rng.uniform(1, 100), 2), rng.randint(1, 20), rng.choice([0, 5.5, 10, 20])])
+
+
+def per_row(path: str, out) -> int:
+    '''
+    What evaluating over rows took before: bind the fields, then run the
+    statement, which prints its value
+    '''
+    i = Interpreter()
+    i.parser.start(i.scanner.tokenize(EXPRESSION + ';'))
+    stmt = i.parser.parse_next()
+    count = 0
+    with open(path, newline='') as f, contextlib.redirect_stdout(out):
+        reader = csv.reader(f)
+        names = next(reader)
+        for fields in reader:
+            i.environment.update(zip(names, map(float, fields)))
+            try:
+                i.execute([stmt])
+            except CalcError as error:
+                print(error)
+            count += 1
+    return count
+
+
+def bulk(path: str, out) -> int:
+    evaluator = Interpreter().bulk_evaluator(EXPRESSION)
+    with open(path, newline='') as f:
+        return write_results(evaluator.results_csv(f), out)
+
+
+def peak_memory(path: str) -> int:
+    with open(os.devnull, 'w') as out:
+        tracemalloc.start()
+        bulk(path, out)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return peak
+
+
+def main() -> None:
+    rows = 200000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rows.csv')
+        write_csv(path, rows)
+
+        expected, actual = io.StringIO(), io.StringIO()
+        per_row(path, expected)
+        bulk(path, actual)
+        assert expected.getvalue() == actual.getvalue()
+        errors = expected.getvalue().count('Division by Zero')
+        print(f'{rows} rows print the same values, and the same {errors} errors')
+
+        times = {}
+        with open(os.devnull, 'w') as out:
+            for name, run in (('per row', per_row), ('bulk', bulk)):
+                start = time.perf_counter()
+                run(path, out)
+                times[name] = time.perf_counter() - start
+                print(f'{name:8} {times[name]:.3f}s  {rows / times[name]:>10,.0f} rows/s')
+        print(f'speedup {times["per row"] / times["bulk"]:.2f}x')
+
+        # Bindings given as dicts rather than CSV text
+        evaluator = Interpreter().bulk_evaluator(EXPRESSION)
+        bindings = ({'price': n % 97 + 1.5, 'qty': float(n % 20 + 1), 'rate': 5.5} for n in range(rows))
+        start = time.perf_counter()
+        for _ in evaluator.results(bindings):
+            pass
+        elapsed = time.perf_counter() - start
+        print(f'dicts    {elapsed:.3f}s  {rows / elapsed:>10,.0f} rows/s')
+
+        small = peak_memory(path)
+        large_path = os.path.join(directory, 'large.csv')
+        write_csv(large_path, rows * 4, seed=1)
+        large = peak_memory(large_path)
+        print(f'peak memory {small / 1024:.0f} KB for {rows} rows, {large / 1024:.0f} KB for {rows * 4} rows')
+        assert large < small * 1.5 + 64 * 1024
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+# Measures how long each backend and pass takes to run an operator chain of
+# 100k terms, whose tree leans to the left far deeper than Python can recurse.
+# tests/test_chains.py checks that they all print the same for such chains
+import os
+import io
+import sys
+import time
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+TERMS = 100000
+SETUP = 'let x = 3; let y = 0.5; let z = 0;'
+
+
+def configurations():
+    return (
+        ('tree', {}),
+        ('vm', {'backend': 'vm'}),
+        ('closure', {'backend': 'closure'}),
+        ('optimize', {'optimize': True}),
+        ('resolve', {'resolve': True}),
+        ('cse', {'cse': True}),
+        ('incremental', {'incremental': True}),
+        ('reactive', {'reactive': True}),
+        ('hot', {'hot_threshold': 1}),
+        ('profiled', {'profile': True}),
+        ('all passes', {'optimize': True, 'resolve': True, 'cse': True}),
+    )
+
+
+def main() -> None:
+    chain = 'x' + ' + y * 2 - 1' * (TERMS // 2)
+    source = SETUP + f'print {chain};'
+    for name, options in configurations():
+        i = Interpreter(**options)
+        buffer = io.StringIO()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(buffer):
+            i.run_source(source)
+        elapsed = time.perf_counter() - start
+        print(f'{name:12} {elapsed:.3f}s for a chain of {TERMS} terms')
+
+
+if __name__ == '__main__':
+    main()
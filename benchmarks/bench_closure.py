@@ -0,0 +1,68 @@
+# Compares the speed of the closure backend and the tree walker when the same
+# parsed statements are executed many times. tests/test_closure.py checks that
+# they give the same results
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+from errors import CalcError
+from tests.corpus import random_corpus
+
+
+def outcome(i: Interpreter, script) -> object:
+    '''
+    The value of the statement, or the kind of error it raised, and the environment after it
+    '''
+    i.environment.update(x=3.0, y=-2.0, z=0.5)
+    try:
+        i.execute(script)
+        value = i.environment['result']
+    except CalcError as error:
+        value = (type(error), str(error))
+    return value, dict(i.environment)
+
+
+def main() -> None:
+    tree = Interpreter('tree')
+    closure = Interpreter('closure')
+
+    valid = []
+    for source in random_corpus(0, 3000):
+        tree.parser.parse(tree.scanner.tokenize(source))
+        script = tree.parser.script
+        if not isinstance(outcome(tree, script)[0], tuple):
+            valid.append(script)
+    print(f'{len(valid)} valid random statements')
+
+    # Statements that raise an error spend most of their time unwinding, so only
+    # the valid ones are timed
+    runs = 50
+    times = {}
+    for name, i in (('tree', tree), ('closure', closure)):
+        start = time.perf_counter()
+        for _ in range(runs):
+            for script in valid:
+                i.environment.update(x=3.0, y=-2.0, z=0.5)
+                i.execute(script)
+        times[name] = time.perf_counter() - start
+        print(f'{name:8} {times[name]:.3f}s')
+    print(f'speedup {times["tree"] / times["closure"]:.2f}x')
+
+    # A single realistic formula, run over and over
+    source = 'let r = (x * 3 + y) * (x - 2) / (y + 7) + (x < y and y >= 2) - z % 3 * x;'
+    tree.parser.parse(tree.scanner.tokenize(source))
+    script = tree.parser.script
+    for name, i in (('tree', tree), ('closure', closure)):
+        i.environment.update(x=3.0, y=-2.0, z=0.5)
+        start = time.perf_counter()
+        for _ in range(100000):
+            i.execute(script)
+        times[name] = time.perf_counter() - start
+        print(f'{name:8} {times[name]:.3f}s for one formula')
+    print(f'speedup {times["tree"] / times["closure"]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+# Compares the tree walker with and without promotion of hot statements to
+# generated Python code, on formulas that are executed over and over
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+FORMULAS = [
+    'let r = (x * 3 + y) * (x - 2) / (y + 7) + (x < y and y >= 2) - z % 3 * x;',
+    'let s = x * x + y * y - 2 * x * y + z / (x + 1);',
+    'let t = not (x > y) or (z == 0.5 and x != y);',
+]
+
+
+def main() -> None:
+    runs = 100000
+    configurations = (
+        ('tree', Interpreter('tree')),
+        ('hot', Interpreter('tree', hot_threshold=100)),
+        ('closure', Interpreter('closure')),
+    )
+
+    for source in FORMULAS:
+        print(source)
+        times = {}
+        for name, i in configurations:
+            i.parser.parse(i.scanner.tokenize(source))
+            script = i.parser.script
+            i.environment.update(x=3.0, y=-2.0, z=0.5)
+            start = time.perf_counter()
+            for _ in range(runs):
+                i.execute(script)
+            times[name] = time.perf_counter() - start
+            print(f'  {name:8} {times[name]:.3f}s  {times["tree"] / times[name]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
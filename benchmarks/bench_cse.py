@@ -0,0 +1,74 @@
+# Checks that sharing common subexpressions doesn't change what random statements
+# compute, including those that assign, then measures the evaluations it saves on
+# generated formulas that repeat their subexpressions
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+from bench_closure import outcome
+from tests.corpus import random_expression
+from errors import CalcError
+
+
+def repeating_formula(rng: random.Random) -> str:
+    '''
+    A formula that uses a few random subexpressions several times each, like
+    generated formulas tend to do
+    '''
+    parts = [random_expression(rng, 4, 3).replace('(x = ', '(x + ') for _ in range(3)]
+    terms = [rng.choice(parts) for _ in range(8)]
+    return 'let result = ' + ' + '.join(f'({term} * {rng.randint(1, 9)})' for term in terms) + ';'
+
+
+def parse(i: Interpreter, source: str):
+    i.parser.parse(i.scanner.tokenize(source))
+    script = i.parser.script
+    if i.eliminator is not None:
+        script = i.eliminator.eliminate(script)
+    return script
+
+
+def main() -> None:
+    rng = random.Random(0)
+    plain = Interpreter('tree')
+    shared = Interpreter('tree', cse=True)
+
+    # Random statements that repeat themselves, with assignments in them
+    for _ in range(3000):
+        expr = random_expression(rng, 5)
+        source = f'let result = {expr} + ({expr}) * 2;'
+        expected = outcome(plain, parse(plain, source))
+        actual = outcome(shared, parse(shared, source))
+        # nan != nan, so compare their reprs
+        assert repr(expected) == repr(actual), (source, expected, actual)
+    print('3000 random statements give the same results')
+
+    formulas = [repeating_formula(rng) for _ in range(200)]
+    plain_scripts = [parse(plain, source) for source in formulas]
+    shared_scripts = [parse(shared, source) for source in formulas]
+    for a, b in zip(plain_scripts, shared_scripts):
+        assert repr(outcome(plain, a)) == repr(outcome(shared, b))
+
+    runs = 200
+    shared.saved_evaluations = 0
+    times = {}
+    for name, i, scripts in (('tree', plain, plain_scripts), ('cse', shared, shared_scripts)):
+        start = time.perf_counter()
+        for _ in range(runs):
+            for script in scripts:
+                i.environment.update(x=3.0, y=-2.0, z=0.5)
+                try:
+                    i.execute(script)
+                except CalcError:
+                    pass
+        times[name] = time.perf_counter() - start
+        print(f'{name:5} {times[name]:.3f}s')
+    print(f'speedup {times["tree"] / times["cse"]:.2f}x, {shared.eliminator.shared} subexpressions shared, '
+          f'{shared.saved_evaluations} evaluations saved')
+
+
+if __name__ == '__main__':
+    main()
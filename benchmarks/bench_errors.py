@@ -0,0 +1,93 @@
+# Checks that errors are reported wherever they are in a source, the lexical
+# ones in its first lexeme too, and that the statements after them still run,
+# in every mode that parses, and that a one-shot command that ends too early
+# reports where it ends. Then measures how fast a script whose statements
+# alternate between valid and wrong ones is run
+import os
+import io
+import sys
+import time
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+from parallel import ParallelRunner
+
+# A source starting with a bad lexeme, and the error it reports
+BAD_STARTS = [
+    ('@x; print 1 + 1;', "Lexical Error at line 1, column 1: Unknown symbol '@'"),
+    ('1..2; print 2;', 'Lexical Error at line 1, column 1: 2 decimal points in a number'),
+    ('.; print 3;', 'Lexical Error at line 1, column 1: Expected digits around the decimal point'),
+    ('!; print 4;', "Lexical Error at line 1, column 1: '!' is not an operator. Did you mean 'not'?"),
+    ('# comment\nprint 5;', "Lexical Error at line 1, column 1: Unknown symbol '#'"),
+]
+# A command cut short, and the error it reports
+BAD_ENDS = [
+    ('1 +', 'Syntax Error at line 1, column 4: Expected an expression'),
+    ('print (2', 'Syntax Error at line 1, column 9: Expected a )'),
+    ('let a = 1; a = ', 'Syntax Error at line 1, column 16: Expected an expression'),
+]
+MODES = {
+    'tree': {},
+    'vm': {'backend': 'vm'},
+    'closure': {'backend': 'closure'},
+    'incremental': {'incremental': True},
+    'reactive': {'reactive': True},
+    'cached': {'cache_size': 16},
+}
+
+
+def run(interpreter: Interpreter, source: str, command: bool = False) -> str:
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        if command:
+            interpreter.run_command(source)
+        else:
+            interpreter.run_source(source)
+    return out.getvalue()
+
+
+def check() -> None:
+    for source, error in BAD_STARTS:
+        for name, options in MODES.items():
+            interpreter = Interpreter(**options)
+            # Twice, so that the incremental parser reuses what it parsed
+            for _ in range(2):
+                output = run(interpreter, source)
+                assert output.startswith(error + '\n'), (name, source, output)
+            assert interpreter.error_count == 2, (name, source)
+        assert run(Interpreter(), source, command=True).startswith(error + '\n')
+
+    # The statements after the bad lexeme still run
+    assert run(Interpreter(), '@x; print 1 + 1;') == "Lexical Error at line 1, column 1: Unknown symbol '@'\n2.0\n"
+    assert run(Interpreter(incremental=True), '@x;\nprint 1 + 1;') == \
+        "Lexical Error at line 1, column 1: Unknown symbol '@'\n2.0\n"
+    with ParallelRunner(workers=2) as runner:
+        results = runner.run_sources([source for source, _ in BAD_STARTS])
+    for (source, error), result in zip(BAD_STARTS, results):
+        assert result.output.startswith(error + '\n') and result.error_count == 1, (source, result)
+    print(f'{len(BAD_STARTS)} sources starting with a bad lexeme report it in {len(MODES)} modes, '
+          'with -c and on a process pool')
+
+    # A command that ends too early reports where its text ends, not a ';' it doesn't have
+    for source, error in BAD_ENDS:
+        assert run(Interpreter(), source, command=True) == error + '\n', (source, error)
+
+
+def main() -> None:
+    check()
+    statements = 100000
+    source = ''.join(f'let x{i} = {i} + 1; @y{i};\n' if i % 2 else f'print {i} * 2; 1 +;\n'
+                     for i in range(statements // 2))
+    for name, options in MODES.items():
+        interpreter = Interpreter(**options)
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as out, contextlib.redirect_stdout(out):
+            interpreter.run_source(source)
+        elapsed = time.perf_counter() - start
+        assert interpreter.error_count == statements // 2
+        print(f'{name:12} {elapsed:.3f}s  {statements / elapsed:>10,.0f} statements/s, half of them wrong')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+# Compares parsing an edited buffer from scratch with parsing only the statements
+# that changed since the previous version of the buffer
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+from bench_batch import generate_script
+
+
+def main() -> None:
+    buffer = generate_script(256 * 1024)
+    lines = buffer.split('\n')
+    middle = len(lines) // 2
+    edits = [
+        ('one statement edited in place', '\n'.join(lines[:middle] + [lines[middle].replace(';', ' + 1;')] + lines[middle + 1:])),
+        ('a line inserted at the top', 'let first = 0;\n' + buffer),
+        ('unchanged', buffer),
+    ]
+
+    full = Interpreter()
+    incremental = Interpreter(incremental=True)
+    runs = 5
+    for name, edited in edits:
+        start = time.perf_counter()
+        for _ in range(runs):
+            expected = list(full.parse_reporting(full.scanner.tokenize(edited)))
+        scratch = (time.perf_counter() - start) / runs
+
+        elapsed = 0.0
+        for _ in range(runs):
+            # Every run starts from the original buffer and applies the edit
+            incremental.incremental_parser.parse(buffer, incremental.report)
+            start = time.perf_counter()
+            script = incremental.incremental_parser.parse(edited, incremental.report)
+            elapsed += time.perf_counter() - start
+        elapsed /= runs
+
+        assert len(script) == len(expected)
+        print(f'{name:32} {len(expected)} statements: from scratch {scratch * 1000:7.1f}ms  '
+              f'incremental {elapsed * 1000:6.1f}ms  {scratch / elapsed:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
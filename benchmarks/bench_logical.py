@@ -0,0 +1,47 @@
+# Measures the work that the short-circuit evaluation of 'and' and 'or' skips on
+# formulas guarded by a cheap condition, in every backend. tests/test_logical.py
+# pins down the evaluation order
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+# Formulas with a guard that is false for most of the rows
+GUARDED = [
+    'let r = x > 100 and (x * x + y * y) / (x - y) + ((x * 3 - y) % 7) * (y + 2) / (x + 1);',
+    'let r = x <= 100 or (x * x - y * y) * (x + 2) / (y - 7) + (y % 3) * x * x;',
+]
+
+
+def configurations():
+    return (
+        ('tree', Interpreter('tree')),
+        ('vm', Interpreter('vm')),
+        ('closure', Interpreter('closure')),
+        ('hot', Interpreter('tree', hot_threshold=1)),
+        ('optimized', Interpreter('tree', optimize=True)),
+    )
+
+
+def main() -> None:
+    runs = 20000
+    for source in GUARDED:
+        print(source)
+        for name, i in configurations():
+            i.parser.parse(i.scanner.tokenize(source))
+            script = i.parser.script
+            times = []
+            # The guard skips the right operand for x = 3 but not for x = 300
+            for x in (3.0, 300.0):
+                i.environment.update(x=x, y=-1.0)
+                start = time.perf_counter()
+                for _ in range(runs):
+                    i.execute(script)
+                times.append(time.perf_counter() - start)
+            print(f'  {name:8} skipped {times[0]:.3f}s  evaluated {times[1]:.3f}s  {times[1] / times[0]:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
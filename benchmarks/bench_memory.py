@@ -0,0 +1,44 @@
+# Measures the memory used per token and per AST node on a program of a million tokens
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from scanner import RegexScanner
+from parser import Parser
+from bench_batch import generate_script
+
+
+def count_nodes(node) -> int:
+    count = 1
+    for name in ('expr', 'left', 'right'):
+        child = getattr(node, name, None)
+        if child is not None:
+            count += count_nodes(child)
+    return count
+
+
+def main() -> None:
+    # A little over a million tokens
+    source = generate_script(int(2.3 * 1024 * 1024))
+
+    scanner = RegexScanner()
+    tracemalloc.start()
+    scanner.scan(source)
+    token_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tokens = len(scanner.tokens)
+
+    parser = Parser()
+    tracemalloc.start()
+    parser.parse(scanner.tokens)
+    node_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    nodes = sum(count_nodes(stmt) for stmt in parser.script)
+
+    print(f'{tokens} tokens: {token_bytes / tokens:.1f} bytes per token')
+    print(f'{nodes} nodes: {node_bytes / nodes:.1f} bytes per node')
+
+
+if __name__ == '__main__':
+    main()
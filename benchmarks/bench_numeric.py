@@ -0,0 +1,95 @@
+# Checks that the float, decimal and fraction modes agree on a formula whose
+# values are exact in all of them, measures what exact numbers cost, and makes
+# sure the float mode runs as fast as the tree walker did when it called float()
+import os
+import sys
+import time
+from fractions import Fraction
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+from numeric import modes
+from AST import *
+
+# Only integers, halves and quarters, so every mode computes the same values
+SOURCE = 'let r = (x * 3 + y) * (x - 2) / 4 + (x < y and y >= 2) - (not x == y) * 0.5 + z % 3 * x;'
+VALUES = {'x': '3', 'y': '-2', 'z': '0.5'}
+RUNS = 100000
+
+
+class FloatInterpreter(Interpreter):
+    '''
+    The methods of the tree walker that convert numbers, as they were before
+    there were numeric modes
+    '''
+    def execute_logical_expr(self, expr: LogicalExpr, l: float) -> float:
+        if expr.operator == AND:
+            if not l:
+                return float(l)
+        elif l:
+            return float(l)
+        return float(expr.right.accept(self))
+
+    def execute_equality_expr(self, expr: EqualityExpr, l: float) -> float:
+        r: float = expr.right.accept(self)
+        if expr.operator == EQ:
+            return float(l == r)
+        return float(l != r)
+
+    def execute_relational_expr(self, expr: RelationalExpr, l: float) -> float:
+        r: float = expr.right.accept(self)
+        if expr.operator == LT:
+            return float(l < r)
+        elif expr.operator == LE:
+            return float(l <= r)
+        elif expr.operator == GT:
+            return float(l > r)
+        else:
+            return float(l >= r)
+
+    def execute_not_expr(self, expr: NotExpr) -> float:
+        value: float = not expr.expr.accept(self)
+        return float(value)
+
+    def execute_bool_node(self, b: BooleanNode) -> float:
+        return float(b.value)
+
+
+def run(i: Interpreter, runs: int) -> float:
+    i.parser.parse(i.scanner.tokenize(SOURCE))
+    script = i.parser.script
+    for name, value in VALUES.items():
+        i.environment[name] = i.number(value)
+    start = time.perf_counter()
+    for _ in range(runs):
+        i.execute(script)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    results = {}
+    for backend in Interpreter.backends:
+        for mode in modes:
+            i = Interpreter(backend, numbers=mode)
+            run(i, 1)
+            results[backend, mode] = i.environment['r']
+    values = {Fraction(value) for value in results.values()}
+    assert len(values) == 1, results
+    print(f'every backend and mode computes r = {values.pop()}')
+
+    # Best of 3, the differences looked for are small
+    plain = min(run(FloatInterpreter(), RUNS) for _ in range(3))
+    moded = min(run(Interpreter(), RUNS) for _ in range(3))
+    print(f'tree float() {plain:.3f}s, float mode {moded:.3f}s ({moded / plain:.2f}x)')
+
+    for backend in Interpreter.backends:
+        base = run(Interpreter(backend), RUNS)
+        line = f'{backend:8} float {base:.3f}s'
+        for mode in modes[1:]:
+            elapsed = run(Interpreter(backend, numbers=mode), RUNS)
+            line += f', {mode} {elapsed:.3f}s ({elapsed / base:.1f}x)'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
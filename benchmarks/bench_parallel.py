@@ -0,0 +1,40 @@
+# Measures how the throughput of ParallelRunner scales with the number of workers
+# on a job made of many independent scripts
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from parallel import ParallelRunner
+from bench_batch import generate_script
+
+
+def main() -> None:
+    sources = [generate_script(32 * 1024, seed) for seed in range(64)]
+    expected = None
+    base = None
+    for workers in (1, 2, 4, 8):
+        with ParallelRunner(workers, batch_size=4) as runner:
+            # Start the workers before the clock, the pool is meant to be reused
+            runner.run_sources(['let warm = 1;'] * workers)
+            runner.stats.clear()
+
+            start = time.perf_counter()
+            results = runner.run_sources(sources)
+            elapsed = time.perf_counter() - start
+
+        outputs = [result.output for result in results]
+        if expected is None:
+            expected = outputs
+        assert outputs == expected, 'the results depend on the number of workers'
+
+        base = base or elapsed
+        count = sum(result.statements for result in results)
+        print(f'{workers} workers: {count} statements in {elapsed:.2f}s '
+              f'({count / elapsed:.0f} stmts/s, {base / elapsed:.2f}x)')
+        for stats in runner.stats.values():
+            print(f'  {stats}')
+
+
+if __name__ == '__main__':
+    main()
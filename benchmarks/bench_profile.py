@@ -0,0 +1,76 @@
+# Checks that profiling doesn't change what a script prints, that an interpreter
+# that isn't profiled runs as fast as before, and measures the cost of profiling
+import os
+import sys
+import time
+import random
+import contextlib
+import io
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+from tests.corpus import random_expression
+
+
+def generate_script(statements: int, seed: int) -> str:
+    rng = random.Random(seed)
+    lines = ['let x = 3.5;', 'let y = -1.0;']
+    for n in range(statements):
+        lines.append(f'print {random_expression(rng, 6, 2)};' if n % 4 == 0 else f'let v{n % 50} = {random_expression(rng, 6, 2)};')
+    return '\n'.join(lines)
+
+
+def run(i: Interpreter, source: str):
+    buffer = io.StringIO()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(buffer):
+        i.run_source(source)
+    return time.perf_counter() - start, buffer.getvalue()
+
+
+def detached(backend: str) -> Interpreter:
+    '''
+    An interpreter whose profiler was attached then detached
+    '''
+    i = Interpreter(backend, cache_size=1, profile=True)
+    i.profiler.detach()
+    return i
+
+
+def best(make, source: str, runs: int = 5):
+    '''
+    Runs the source several times on one interpreter, so that the parsed
+    script is cached and the execution weighs as much as the parsing
+    '''
+    times = []
+    for _ in range(runs):
+        i = make()
+        elapsed, output = run(i, source)
+        for _ in range(4):
+            elapsed += run(i, source)[0]
+        times.append(elapsed)
+    return min(times), output
+
+
+def main() -> None:
+    source = generate_script(2000, 0)
+
+    for backend in Interpreter.backends:
+        plain, expected = best(lambda: Interpreter(backend, cache_size=1), source)
+        unprofiled, output = best(lambda: detached(backend), source)
+        assert output == expected, backend
+        profiled, output = best(lambda: Interpreter(backend, cache_size=1, profile=True), source)
+        assert output == expected, backend
+
+        print(f'{backend:<8} plain {plain:.3f}s, detached {unprofiled:.3f}s ({unprofiled / plain:.2f}x), '
+              f'profiled {profiled:.3f}s ({profiled / plain:.2f}x)')
+
+    i = Interpreter('tree', cache_size=1, profile=True)
+    for _ in range(5):
+        run(i, source)
+    print()
+    print(i.profiler.report())
+
+
+if __name__ == '__main__':
+    main()
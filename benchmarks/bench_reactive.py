@@ -0,0 +1,70 @@
+# Compares running a whole spreadsheet-like script again after every change of an
+# input with the reactive mode, which only recomputes the bindings that changed
+import io
+import os
+import sys
+import time
+import re
+import random
+import contextlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+
+def generate_sheet(inputs: int, cells: int, seed: int = 0) -> str:
+    '''
+    A script of inputs, and of cells computed from two earlier inputs or cells
+    '''
+    rng = random.Random(seed)
+    names = [f'in{n}' for n in range(inputs)]
+    lines = [f'let {name} = {n + 1};' for n, name in enumerate(names)]
+    for n in range(cells):
+        # Cells mostly read recent names, so that changes don't reach every cell
+        a, b = (rng.choice(names[-20:]) if rng.random() < 0.8 else rng.choice(names) for _ in range(2))
+        op = rng.choice(['+', '-', '*'])
+        lines.append(f'let c{n} = ({a} {op} {b}) % 1000;')
+        names.append(f'c{n}')
+    return '\n'.join(lines)
+
+
+def main() -> None:
+    inputs, cells, changes = 20, 2000, 100
+    sheet = generate_sheet(inputs, cells)
+    rng = random.Random(1)
+    edits = [(f'in{rng.randrange(inputs)}', rng.randint(1, 100)) for _ in range(changes)]
+    watched = ' '.join(f'print c{n};' for n in range(cells - 5, cells))
+
+    # Without the reactive mode the input is changed in the script, which is run again
+    plain = Interpreter()
+    outputs = []
+    start = time.perf_counter()
+    script = sheet
+    for name, value in edits:
+        script = re.sub(f'let {name} = [^;]*;', f'let {name} = {value};', script, count=1)
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            plain.run_source(f'{script}\n{watched}')
+        outputs.append(buffer.getvalue())
+    rerun = time.perf_counter() - start
+
+    reactive = Interpreter(reactive=True)
+    reactive.run_source(sheet)
+    reactive_outputs = []
+    start = time.perf_counter()
+    for name, value in edits:
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            reactive.run_source(f'let {name} = {value}; {watched}')
+        reactive_outputs.append(buffer.getvalue())
+    elapsed = time.perf_counter() - start
+
+    assert outputs == reactive_outputs, 'the reactive mode computed other values'
+    print(f'{cells} cells, {changes} changes')
+    print(f'rerun the script  {rerun:.3f}s')
+    print(f'reactive          {elapsed:.3f}s  {rerun / elapsed:.1f}x')
+    print(reactive.reactive.report())
+
+
+if __name__ == '__main__':
+    main()
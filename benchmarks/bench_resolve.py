@@ -0,0 +1,34 @@
+# Compares variables looked up by name in a dict with variables resolved to the
+# slots of a flat environment, on a script that keeps updating a few of them
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+SETUP = 'let a = 1; let b = 2; let c = 3; let d = 0.5;'
+# Re-declaring with 'let' updates a variable without printing it
+LOOP = 'let a = (b * c + d) % 10; let b = a - c / 2; let c = (a + b) % 7 + 1; let d = d * 0.99 + a / 100;' * 25
+
+
+def main() -> None:
+    runs = 2000
+    times = {}
+    for name, resolve in (('dict', False), ('slots', True)):
+        i = Interpreter('tree', resolve=resolve)
+        i.run_source(SETUP)
+        script = list(i.parse_reporting(i.scanner.tokenize(LOOP)))
+        if i.resolver is not None:
+            script = i.resolver.resolve(script)
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            i.execute(script)
+        times[name] = time.perf_counter() - start
+        print(f'{name:6} {times[name]:.3f}s  {dict(i.environment)}')
+    print(f'speedup {times["dict"] / times["slots"]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+# Compares the character by character Scanner with the RegexScanner on 10 MB of input
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from scanner import Scanner, RegexScanner
+
+
+def generate_source(size: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    pieces = ['let', 'alpha', 'beta_2', 'x', '=', '+', '-', '*', '/', '%', '<=', '==', 'and',
+              'not', 'True', '(', ')', ';', '3.14159', '42', '1000000']
+    words = []
+    length = 0
+    while length < size:
+        piece = rng.choice(pieces)
+        words.append(piece)
+        length += len(piece) + 1
+    return ' '.join(words)
+
+
+def time_scanner(scanner: Scanner, source: str) -> float:
+    start = time.perf_counter()
+    scanner.scan(source)
+    return time.perf_counter() - start
+
+
+def describe(scanner: Scanner, source: str) -> list:
+    return [(repr(t), t.line, t.column, str(getattr(t, 'error', ''))) for t in scanner.tokenize(source)]
+
+
+def check_unicode() -> None:
+    '''
+    Checks that both scanners split the same names, numbers and symbols out of
+    letters, digits, dots and numeric characters that aren't digits, like ² and Ⅷ,
+    also in long runs of them
+    '''
+    sources = ['let x² = 2;', 'print Ⅷ + 1;', 'a²b ²²3x ½_y', 'x ² _a', 'let é1 = 3; print é1;', '٣ + ३;',
+               '²9.5', 'Ⅷ1.25', 'print ²1.5.5 + x;', '²' * 3000, ('Ⅷ' * 500 + '1.5 ') * 4]
+    rng = random.Random(0)
+    alphabet = 'ab_19.² Ⅷ½;+'
+    sources += [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 12))) for _ in range(5000)]
+    for source in sources:
+        assert describe(Scanner(), source) == describe(RegexScanner(), source), source
+
+
+def main() -> None:
+    check_unicode()
+    source = generate_source(10 * 1024 * 1024)
+
+    regex = RegexScanner()
+    regex_time = time_scanner(regex, source)
+    plain = Scanner()
+    plain_time = time_scanner(plain, source)
+
+    assert [repr(t) for t in plain.tokens] == [repr(t) for t in regex.tokens]
+    count = len(regex.tokens)
+    print(f'{count} tokens')
+    print(f'Scanner      {plain_time:.2f}s  {count / plain_time:,.0f} tokens/s')
+    print(f'RegexScanner {regex_time:.2f}s  {count / regex_time:,.0f} tokens/s')
+    print(f'speedup {plain_time / regex_time:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# Starts the calculator server on localhost, checks that sessions are isolated
+# and that pipelined lines are answered in order, then generates load on it and
+# reports the latency percentiles and the throughput
+import os
+import sys
+import time
+import asyncio
+import subprocess
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+async def read_answer(reader: asyncio.StreamReader) -> str:
+    lines = []
+    while True:
+        line = await reader.readline()
+        if line in (b'\n', b''):
+            return ''.join(lines)
+        lines.append(line.decode())
+
+
+async def check(host: str, port: int) -> None:
+    r1, w1 = await asyncio.open_connection(host, port)
+    r2, w2 = await asyncio.open_connection(host, port)
+    # Both lines are sent before reading any answer
+    w1.write(b'let a = 2; print a * 3;\nprint a; print b;\n')
+    w2.write(b'print a;\n')
+    assert await read_answer(r1) == '6.0\n'
+    assert await read_answer(r1) == "2.0\nName Error at line 1, column 16: Undefined variable 'b'\n"
+    assert await read_answer(r2) == "Name Error at line 1, column 7: Undefined variable 'a'\n"
+    for w in (w1, w2):
+        w.close()
+    print('sessions are isolated and pipelined answers come in order')
+
+
+async def client(host: str, port: int, requests: int, window: int, latencies: list) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'let x = 1;\n')
+    await read_answer(reader)
+
+    # At most `window` requests are in flight at a time
+    in_flight = asyncio.Semaphore(window)
+    sent = []
+
+    async def send() -> None:
+        for n in range(requests):
+            await in_flight.acquire()
+            sent.append(time.perf_counter())
+            writer.write(f'let x = (x * 3 + {n}) % 1000; print x / 7 + x % 13;\n'.encode())
+            await writer.drain()
+
+    sender = asyncio.create_task(send())
+    for n in range(requests):
+        await read_answer(reader)
+        latencies.append(time.perf_counter() - sent[n])
+        in_flight.release()
+    await sender
+    writer.close()
+
+
+async def load(host: str, port: int, clients: int, requests: int, window: int) -> None:
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, requests, window, latencies) for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(f'{clients:3} clients, window {window:2}: {len(latencies) / elapsed:8.0f} req/s  '
+          f'p50 {p50:6.2f}ms  p99 {p99:6.2f}ms')
+
+
+def main() -> None:
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, 'main.py'), '--serve', '127.0.0.1:0'],
+                              stderr=subprocess.PIPE, text=True)
+    try:
+        address = server.stderr.readline().split()[-1]
+        host, _, port = address.rpartition(':')
+        asyncio.run(check(host, int(port)))
+        for clients, window in ((1, 1), (1, 16), (16, 1), (16, 16), (64, 4)):
+            asyncio.run(load(host, int(port), clients, 2000 // clients * 4, window))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
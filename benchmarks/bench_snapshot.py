@@ -0,0 +1,80 @@
+# Compares restoring a long session from a snapshot with replaying its history,
+# and checks that the restored session carries on exactly like the original one
+import os
+import sys
+import time
+import random
+import tempfile
+import contextlib
+import io
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+
+def session(lines: int, seed: int = 0):
+    '''
+    The lines typed in a long REPL session, that declare and update variables
+    '''
+    rng = random.Random(seed)
+    history = ['let v0 = 1;']
+    declared = 1
+    for n in range(1, lines):
+        a, b = rng.randrange(declared), rng.randrange(declared)
+        if rng.random() < 0.8:
+            history.append(f'let v{declared} = v{a} * {rng.randint(1, 9)} / {rng.randint(1, 9)} + v{b} % 7 - {n};')
+            declared += 1
+        else:
+            history.append(f'v{a} = v{a} + v{b} / {rng.randint(2, 9)};')
+    return history
+
+
+def replay(history) -> Interpreter:
+    i = Interpreter(cache_size=256)
+    # The assignments typed print their values
+    with contextlib.redirect_stdout(io.StringIO()):
+        for line in history:
+            i.run_source(line)
+    return i
+
+
+def main() -> None:
+    history = session(50000)
+    start = time.perf_counter()
+    original = replay(history)
+    replayed = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'session.snap')
+        start = time.perf_counter()
+        original.save_snapshot(path)
+        saved = time.perf_counter() - start
+        size = os.path.getsize(path)
+
+        restored = Interpreter(cache_size=256)
+        start = time.perf_counter()
+        restored.load_snapshot(path)
+        loaded = time.perf_counter() - start
+
+    assert dict(restored.environment) == dict(original.environment)
+    assert list(restored.cache.scripts) == list(original.cache.scripts)
+    # Both sessions go on with the last lines typed, which come from the cache
+    outputs = []
+    for i in (original, restored):
+        buffer = io.StringIO()
+        with contextlib.redirect_stdout(buffer):
+            for line in history[-256:] + ['print v0 + v1 + v2;']:
+                i.run_source(line)
+        outputs.append(buffer.getvalue())
+    assert outputs[0] == outputs[1]
+    assert restored.cache.misses == 1
+
+    variables = len(original.environment)
+    print(f'{len(history)} lines, {variables} variables, {len(original.cache)} cached scripts')
+    print(f'replay the history  {replayed:.3f}s')
+    print(f'save the snapshot   {saved:.3f}s, {size:,} bytes, {size / variables:.1f} bytes per variable')
+    print(f'load the snapshot   {loaded * 1000:.1f}ms  {replayed / loaded:.0f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Measures what starting the calculator to evaluate a single expression costs,
+# as the short-lived processes spawned to evaluate one pay it every time, and
+# checks it against a budget:
+#
+#   python benchmarks/bench_startup.py --budget 20
+#
+# python -X importtime gives the time spent importing every module, leaving out
+# the modules that Python imports anyway. The whole runs are timed too, against
+# a bare Python that does nothing. Exits with 1 when the imports of the one-shot
+# mode go over the budget, or when it imports a module it shouldn't
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, Set, Tuple
+
+MAIN = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'main.py')
+EXPRESSION = '(1 + 2) * 3 < 10 and not False'
+
+# Modules that a one-shot command must not import, and that the AST cache also
+# spares when it has the statements of the command
+FORBIDDEN: Set[str] = {'argparse', 'typing', 'decimal', 'fractions', 'json', 'compiler', 'vm', 'closures',
+                       'codegen', 'optimizer', 'cache', 'environment', 'resolver', 'incremental', 'reactive',
+                       'profiler', 'cse'}
+FORBIDDEN_ON_HIT: Set[str] = FORBIDDEN | {'re', 'scanner', 'parser', 'array'}
+
+
+def import_times(arguments: List[str]) -> Tuple[Dict[str, int], Dict[str, int]]:
+    '''
+    Returns the time in microseconds spent importing every module, and the
+    cumulative time of the modules imported at the top level
+    '''
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + arguments,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    own: Dict[str, int] = {}
+    top: Dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_time, cumulative, name = line[len('import time:'):].split('|')
+        own[name.strip()] = int(self_time)
+        # The modules imported at the top level are indented by one space, the
+        # ones they import by two more per level
+        if len(name) - len(name.lstrip()) == 1:
+            top[name.strip()] = int(cumulative)
+    return own, top
+
+
+def wall_time(arguments: List[str], repeat: int) -> float:
+    '''
+    Returns the best time of several runs of Python with the arguments
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + arguments, stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Benchmark the startup of the calculator')
+    arg_parser.add_argument('--repeat', type=int, default=30, help='timed runs per case, the best one is kept')
+    arg_parser.add_argument('--budget', type=float, default=20.0,
+                            help='milliseconds that the imports of a one-shot command may take')
+    args = arg_parser.parse_args()
+
+    failures: List[str] = []
+    python_modules: Set[str] = set(import_times(['-c', 'pass'])[0])
+    bare: float = wall_time(['-c', 'pass'], args.repeat)
+    print(f"{'case':<22} {'imports':>9} {'run':>9} {'over python':>12}  slowest imports")
+    print(f"{'python -c pass':<22} {'':>9} {bare * 1000:7.1f}ms")
+
+    with tempfile.TemporaryDirectory() as directory:
+        script = os.path.join(directory, 'one.calc')
+        with open(script, 'w') as f:
+            f.write(EXPRESSION + ';\n')
+        ast_cache = os.path.join(directory, 'ast-cache')
+        # The first run fills the AST cache, the runs measured hit it
+        subprocess.run([sys.executable, MAIN, '-c', EXPRESSION, '--ast-cache', ast_cache],
+                       stdout=subprocess.DEVNULL, check=True)
+
+        cases: List[Tuple[str, List[str], Set[str]]] = [
+            ('main.py script', [MAIN, script], set()),
+            ('main.py -c', [MAIN, '-c', EXPRESSION], FORBIDDEN),
+            ('main.py -c, cache hit', [MAIN, '-c', EXPRESSION, '--ast-cache', ast_cache], FORBIDDEN_ON_HIT),
+        ]
+        for name, arguments, forbidden in cases:
+            own, top = import_times(arguments)
+            imports: float = sum(t for module, t in top.items() if module not in python_modules) / 1000
+            slowest: List[str] = sorted((module for module in own if module not in python_modules),
+                                        key=own.get, reverse=True)[:4]
+            elapsed: float = wall_time(arguments, args.repeat)
+            print(f"{name:<22} {imports:7.1f}ms {elapsed * 1000:7.1f}ms {(elapsed - bare) * 1000:10.1f}ms  "
+                  + ', '.join(f"{module} {own[module] / 1000:.1f}" for module in slowest))
+
+            imported: Set[str] = forbidden & set(own)
+            if imported:
+                failures.append(f"{name} imports {', '.join(sorted(imported))}")
+            if name == 'main.py -c' and imports > args.budget:
+                failures.append(f"{name} spends {imports:.1f}ms importing, over the budget of {args.budget:g}ms")
+
+    if failures:
+        for failure in failures:
+            print(failure)
+        sys.exit(1)
+    print(f"within the budget of {args.budget:g}ms")
+
+
+if __name__ == '__main__':
+    main()
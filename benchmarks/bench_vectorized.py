@@ -0,0 +1,48 @@
+# Compares evaluating one formula per row with the scalar Interpreter against a single vectorized evaluation
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+
+def main() -> None:
+    source = 'let y = a * x + b % 7 - (x > 3 and not (b < 2));'
+    rows = 1_000_000
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-10, 10, rows)
+    b = rng.integers(1, 100, rows).astype(float)
+
+    i = Interpreter()
+    i.run_source('let a = 2.5;')
+    i.parser.parse(i.scanner.tokenize(source))
+    expr = i.parser.script[0].expr
+
+    # The scalar loop is too slow for every row, so it runs on a sample
+    sample = 100_000
+    start = time.perf_counter()
+    scalar = []
+    for k in range(sample):
+        i.environment['x'] = x[k].item()
+        i.environment['b'] = b[k].item()
+        scalar.append(expr.accept(i))
+    scalar_time = time.perf_counter() - start
+    del i.environment['x'], i.environment['b']
+
+    start = time.perf_counter()
+    values, errors = i.evaluate_vectorized(expr, {'x': x, 'b': b})
+    vector_time = time.perf_counter() - start
+
+    assert np.allclose(values[:sample], scalar) and not errors.any()
+    scalar_rate = sample / scalar_time
+    vector_rate = rows / vector_time
+    print(f'scalar loop {scalar_rate:,.0f} rows/s')
+    print(f'vectorized  {vector_rate:,.0f} rows/s')
+    print(f'speedup {vector_rate / scalar_rate:.0f}x')
+
+
+if __name__ == '__main__':
+    main()
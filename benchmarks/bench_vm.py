@@ -0,0 +1,57 @@
+# Compares the tree walking interpreter with the bytecode VM on deep arithmetic
+# expressions, running the same statements many times
+import os
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+
+
+def generate_expression(depth: int, seed: int = 0) -> str:
+    '''
+    Generates an expression nested `depth` parentheses deep, like ((x + 3) * x) - 7
+    '''
+    rng = random.Random(seed)
+    expr = 'x'
+    for _ in range(depth):
+        operand = rng.choice(['x', str(rng.randint(1, 9))])
+        expr = f'({expr} {rng.choice("+-*")} {operand})'
+    return expr
+
+
+def time_it(runs: int, execute) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        execute()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    # Parsing and walking deeply nested parentheses needs a deep Python stack
+    sys.setrecursionlimit(20000)
+    runs = 2000
+    for depth in (10, 50, 200, 500):
+        source = f'let x = 1.0001; let y = {generate_expression(depth)};'
+
+        tree = Interpreter('tree')
+        tree.parser.parse(tree.scanner.tokenize(source))
+        script = tree.parser.script
+        tree.execute(script)
+        tree_time = time_it(runs, lambda: tree.execute(script))
+
+        # The statements are run again through execute, which compiles them
+        # only the first time
+        vm = Interpreter('vm')
+        vm.execute(script)
+        vm_time = time_it(runs, lambda: vm.execute(script))
+        recompiled_time = time_it(runs, lambda: vm.vm.run(vm.compiler.compile(script), vm.environment))
+
+        assert tree.environment == vm.environment
+        print(f'depth {depth:4}: tree {tree_time:.3f}s  vm {vm_time:.3f}s  speedup {tree_time / vm_time:.2f}x'
+              f'  compiling every run {recompiled_time:.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# Times the scanner, the parser and the interpreter separately on every generated
+# workload, and reports their throughput and peak memory. The results can be
+# saved as a baseline, and compared with a baseline to flag the regressions:
+#
+#   python benchmarks/suite.py --save baseline.json
+#   python benchmarks/suite.py --compare baseline.json --threshold 0.1
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from interpreter import Interpreter
+from scanner import RegexScanner
+from parser import Parser
+from errors import CalcError
+from workloads import WORKLOADS
+
+# The phases timed for every workload, with the unit of their throughput
+PHASES: List[Tuple[str, str]] = [('scan', 'bytes'), ('parse', 'tokens'), ('execute', 'statements')]
+
+
+def execute(i: Interpreter, script: list) -> None:
+    '''
+    Executes every statement, going on after the ones that fail like a run does
+    '''
+    for stmt in script:
+        try:
+            i.execute([stmt])
+        except CalcError:
+            pass
+
+
+def measure(run: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    '''
+    Returns the best time of several runs, and the peak memory of one more run
+    that is traced, so that tracing doesn't slow down the timed runs
+    '''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return best, peak
+
+
+def run_workload(source: str, backend: str, repeat: int) -> Dict[str, Dict[str, Any]]:
+    scanner = RegexScanner()
+    parser = Parser()
+    interpreter = Interpreter(backend)
+
+    scan_time, scan_peak = measure(lambda: scanner.scan(source), repeat)
+    tokens = scanner.tokens
+    parse_time, parse_peak = measure(lambda: parser.parse(tokens), repeat)
+    script = parser.script
+
+    def run() -> None:
+        interpreter.environment.clear()
+        execute(interpreter, script)
+
+    # What the scripts print isn't part of the benchmark
+    stdout = sys.stdout
+    with open(os.devnull, 'w') as sys.stdout:
+        try:
+            execute_time, execute_peak = measure(run, repeat)
+        finally:
+            sys.stdout = stdout
+
+    sizes = {'scan': len(source.encode()), 'parse': len(tokens), 'execute': len(script)}
+    times = {'scan': scan_time, 'parse': parse_time, 'execute': execute_time}
+    peaks = {'scan': scan_peak, 'parse': parse_peak, 'execute': execute_peak}
+    return {
+        phase: {
+            'seconds': times[phase],
+            'throughput': sizes[phase] / times[phase] if times[phase] > 0 else float('inf'),
+            'unit': unit,
+            'peak_bytes': peaks[phase],
+        }
+        for phase, unit in PHASES
+    }
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    '''
+    Returns a line for every phase that got slower, or used more memory, than
+    its baseline by more than the threshold, a fraction of the baseline
+    '''
+    regressions: List[str] = []
+    for workload, phases in results['workloads'].items():
+        for phase, current in phases.items():
+            old: Optional[Dict[str, Any]] = baseline['workloads'].get(workload, {}).get(phase)
+            if old is None:
+                continue
+            for key, label in (('seconds', 'time'), ('peak_bytes', 'peak memory')):
+                if old[key] > 0 and current[key] > old[key] * (1 + threshold):
+                    regressions.append(f"{workload} {phase}: {label} {current[key] / old[key] - 1:+.1%} "
+                                       f"({old[key]:.6g} -> {current[key]:.6g})")
+    return regressions
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description='Benchmark the scanner, the parser and the interpreter')
+    arg_parser.add_argument('--size', type=int, default=256 * 1024, help='bytes of source per workload')
+    arg_parser.add_argument('--repeat', type=int, default=3, help='timed runs per phase, the best one is kept')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--backend', choices=Interpreter.backends, default='tree')
+    arg_parser.add_argument('--workload', action='append', choices=sorted(WORKLOADS),
+                            help='run only this workload, can be repeated')
+    arg_parser.add_argument('--save', metavar='PATH', help='save the results as a JSON baseline')
+    arg_parser.add_argument('--compare', metavar='PATH', help='compare the results with a JSON baseline')
+    arg_parser.add_argument('--threshold', type=float, default=0.10,
+                            help='slowdown or memory growth flagged as a regression, as a fraction of the baseline')
+    args = arg_parser.parse_args()
+
+    results: Dict[str, Any] = {
+        'python': platform.python_version(),
+        'size': args.size,
+        'seed': args.seed,
+        'backend': args.backend,
+        'workloads': {},
+    }
+    print(f"{'workload':<20} {'phase':<8} {'seconds':>10} {'throughput':>24} {'peak memory':>14}")
+    for name in args.workload or WORKLOADS:
+        source = WORKLOADS[name](args.size, args.seed)
+        phases = run_workload(source, args.backend, args.repeat)
+        results['workloads'][name] = phases
+        for phase, stats in phases.items():
+            throughput = f"{stats['throughput']:,.0f} {stats['unit']}/s"
+            print(f"{name:<20} {phase:<8} {stats['seconds']:10.4f} {throughput:>24} "
+                  f"{stats['peak_bytes'] / 1024 ** 2:11.2f} MB")
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"saved the baseline to {args.save}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        for key in ('size', 'seed', 'backend'):
+            if baseline.get(key) != results[key]:
+                print(f"warning: the baseline was run with {key} {baseline.get(key)}, not {results[key]}")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regressions beyond {args.threshold:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+# Deterministic generators of the workloads run by the benchmark suite. Every
+# generator takes the approximate size of the source in bytes and a seed, and
+# returns the same source for the same arguments
+import random
+from typing import Callable, Dict, List
+
+OPERATORS = ['+', '-', '*', '/']
+
+
+def build(size: int, statement: Callable[[int], str]) -> str:
+    '''
+    Joins the statements made by statement(n) until the source reaches size bytes
+    '''
+    lines: List[str] = []
+    length = 0
+    n = 0
+    while length < size:
+        line = statement(n)
+        lines.append(line)
+        length += len(line) + 1
+        n += 1
+    return '\n'.join(lines)
+
+
+def arithmetic_chains(size: int, seed: int = 0) -> str:
+    '''
+    Long chains of binary operators, which make deep left leaning trees
+    '''
+    rng = random.Random(seed)
+
+    def statement(n: int) -> str:
+        terms = [str(rng.randint(1, 99))]
+        for _ in range(150):
+            terms.append(rng.choice(OPERATORS))
+            terms.append(str(rng.randint(1, 99)))
+        return f"let c{n % 10} = {' '.join(terms)};"
+    return build(size, statement)
+
+
+def nested_parentheses(size: int, seed: int = 0) -> str:
+    '''
+    Expressions nested in parentheses 100 deep
+    '''
+    rng = random.Random(seed)
+
+    def statement(n: int) -> str:
+        expr = str(rng.randint(1, 9))
+        for _ in range(100):
+            expr = f"({expr} {rng.choice(OPERATORS)} {rng.randint(1, 9)})"
+        return f"let p{n % 10} = {expr};"
+    return build(size, statement)
+
+
+def identifiers(size: int, seed: int = 0) -> str:
+    '''
+    Formulas over a few hundred variables with long names
+    '''
+    rng = random.Random(seed)
+    names = [f"variable_{rng.choice('abcdefgh')}{i}_value" for i in range(300)]
+    declarations = [f"let {name} = {i + 1};" for i, name in enumerate(names)]
+
+    def statement(n: int) -> str:
+        if n < len(declarations):
+            return declarations[n]
+        terms = [rng.choice(names) for _ in range(8)]
+        return f"{rng.choice(names)} = {' + '.join(terms)} / 1000;"
+    return build(size, statement)
+
+
+def short_statements(size: int, seed: int = 0) -> str:
+    '''
+    Many tiny statements, which weigh on the per statement overhead
+    '''
+    rng = random.Random(seed)
+
+    def statement(n: int) -> str:
+        kind = n % 4
+        if kind == 0:
+            return f"let s{n % 20} = {rng.randint(0, 9)};"
+        elif kind == 1:
+            return f"s{n % 20} = s{n % 20} + 1;"
+        elif kind == 2:
+            return f"print s{(n - 2) % 20};"
+        return f"s{(n - 3) % 20} > {rng.randint(0, 9)};"
+    return build(size, statement)
+
+
+def large_literals(size: int, seed: int = 0) -> str:
+    '''
+    Numeric literals of 20 to 300 digits, with and without a fraction
+    '''
+    rng = random.Random(seed)
+
+    def literal() -> str:
+        digits = ''.join(rng.choice('0123456789') for _ in range(rng.randint(20, 300)))
+        number = digits.lstrip('0') or '0'
+        if rng.random() < 0.5:
+            point = rng.randint(1, len(number))
+            number = f"{number[:point]}.{number[point:] or '0'}"
+        return number
+
+    def statement(n: int) -> str:
+        return f"let l{n % 10} = {literal()} {rng.choice(OPERATORS)} {literal()};"
+    return build(size, statement)
+
+
+WORKLOADS: Dict[str, Callable[[int, int], str]] = {
+    'arithmetic_chains': arithmetic_chains,
+    'nested_parentheses': nested_parentheses,
+    'identifiers': identifiers,
+    'short_statements': short_statements,
+    'large_literals': large_literals,
+}
@@ -0,0 +1,129 @@
+from __future__ import annotations
+import csv
+from AST import *
+from closures import ClosureCompiler
+from errors import CalcError, DataError
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Set, TextIO, Tuple
+    from numeric import NumericMode
+
+
+class BulkEvaluator:
+    '''
+    Evaluates one expression for every row of a stream of variable bindings,
+    like the rows of a CSV file, yielding a result per row. The expression is
+    compiled to closures once, and every row is written into the same dict
+    that they read, so a row costs no more than its own bindings and nothing
+    is printed. Memory doesn't grow with the number of rows.
+
+    The variables a row doesn't bind are read from the environment given, as
+    it was when the evaluator was made. Assignments in the expression last
+    from a row to the next, so (total = total + x) sums a column. Fields given
+    as strings are read as numbers of the mode. A row that fails yields its
+    CalcError instead of a value, and the rows after it are still evaluated
+    '''
+    def __init__(self, expr: Expr, environment: Mapping[str, Any], numbers: NumericMode):
+        self.numbers: NumericMode = numbers
+        self.run: Callable[[dict], Any] = ClosureCompiler(numbers.number).compile_expr(expr)
+        # Reads the fields given as text. Decimals trap nothing, so theirs are
+        # read in a context where a text that isn't a number is an error
+        self.read: Callable[[str], Any] = numbers.number
+        if numbers.context is not None:
+            from decimal import InvalidOperation
+            context = numbers.context.copy()
+            context.traps[InvalidOperation] = True
+            self.read = lambda text: context.create_decimal(text.strip())
+        # The variables before any row, and the dict that the rows update
+        self.base: Dict[str, Any] = {}
+        with numbers.scope():
+            for name in list(environment):
+                try:
+                    # Stale reactive variables are recomputed
+                    self.base[name] = environment[name]
+                except CalcError:
+                    pass
+        self.environment: Dict[str, Any] = dict(self.base)
+        # The variables bound by the last row
+        self.bound: Set[str] = set()
+        self.rows: int = 0
+        self.errors: int = 0
+
+    def results(self, rows: Iterable[Mapping[str, Any]]) -> Iterator[Any]:
+        '''
+        Yields the result of every dict of bindings
+        '''
+        for row in rows:
+            if row.keys() != self.bound:
+                self.bind(set(row))
+            yield self.evaluate_row(row.items())
+
+    def results_csv(self, lines: Iterable[str]) -> Iterator[Any]:
+        '''
+        Yields the result of every row of CSV lines, whose header names the
+        variables. Blank lines are skipped
+        '''
+        reader = csv.reader(lines)
+        names: List[str] = [name.strip() for name in next(reader, [])]
+        self.bind(set(names))
+        for fields in reader:
+            if not fields:
+                continue
+            if len(fields) != len(names):
+                self.rows += 1
+                self.errors += 1
+                yield DataError(f"Line {reader.line_num} has {len(fields)} fields instead of {len(names)}")
+                continue
+            yield self.evaluate_row(zip(names, fields))
+
+    def bind(self, names: Set[str]) -> None:
+        '''
+        Gives their value back to the variables that the last row bound and the
+        next ones don't
+        '''
+        for name in self.bound.difference(names):
+            if name in self.base:
+                self.environment[name] = self.base[name]
+            else:
+                self.environment.pop(name, None)
+        self.bound = names
+
+    def evaluate_row(self, bindings: Iterable[Tuple[str, Any]]) -> Any:
+        self.rows += 1
+        environment: Dict[str, Any] = self.environment
+        read: Callable[[str], Any] = self.read
+        try:
+            for name, value in bindings:
+                if type(value) is str:
+                    try:
+                        value = read(value)
+                    except (ValueError, ArithmeticError):
+                        raise DataError(f"Can't read {value!r} of {name} as a number") from None
+                environment[name] = value
+            if self.numbers.context is None:
+                return self.run(environment)
+            with self.numbers.scope():
+                return self.run(environment)
+        except CalcError as error:
+            self.errors += 1
+            return error
+
+
+def write_results(results: Iterable[Any], out: TextIO, chunk: int = 4096) -> int:
+    '''
+    Writes a line per result, as print would, a chunk of lines at a time.
+    Returns the number of lines written
+    '''
+    count: int = 0
+    lines: List[str] = []
+    for result in results:
+        lines.append(str(result))
+        if len(lines) == chunk:
+            lines.append('')
+            out.write('\n'.join(lines))
+            count += chunk
+            lines.clear()
+    if lines:
+        count += len(lines)
+        lines.append('')
+        out.write('\n'.join(lines))
+    return count
@@ -0,0 +1,48 @@
+from __future__ import annotations
+from collections import OrderedDict
+from AST import TYPE_CHECKING
+if TYPE_CHECKING:
+    from typing import List, Optional
+    from AST import Stmt
+
+
+class ParseCache:
+    '''
+    A bounded LRU cache from source text to the statements parsed from it. The
+    AST is never modified after it has been built, so a cached script can be
+    executed again and again against the current environment
+    '''
+    def __init__(self, size: int = 256):
+        if size < 1:
+            raise ValueError("The size of the cache must be at least 1")
+        self.size: int = size
+        self.scripts: OrderedDict[str, List[Stmt]] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+
+    def __len__(self) -> int:
+        return len(self.scripts)
+
+    def get(self, source: str) -> Optional[List[Stmt]]:
+        script: Optional[List[Stmt]] = self.scripts.get(source)
+        if script is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.scripts.move_to_end(source)
+        return script
+
+    def put(self, source: str, script: List[Stmt]) -> None:
+        self.scripts[source] = script
+        self.scripts.move_to_end(source)
+        if len(self.scripts) > self.size:
+            self.scripts.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.scripts.clear()
+
+    def __str__(self) -> str:
+        return f"{len(self)}/{self.size} entries, {self.hits} hits, {self.misses} misses, {self.evictions} evictions"
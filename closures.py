@@ -0,0 +1,218 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Tuple
+from weakref import finalize
+from AST import *
+from errors import MathError, UndefinedNameError
+
+# A compiled expression takes the environment and returns its value
+Closure = Callable[[dict], float]
+
+# The operators of a longer left spine are applied in a loop rather than by
+# nested closures
+LONG_CHAIN: int = 64
+
+
+class ClosureCompiler:
+    '''
+    Turns every node of a statement into a Python closure with its operator
+    already resolved, so that running the statement is a single call without
+    any dispatch on node types or operators. The closures follow the same
+    semantics as the tree walking Interpreter.
+
+    Compiled statements are remembered for as long as the statement itself
+    is alive, so a statement that is executed again isn't compiled again
+    '''
+    def __init__(self, number: Callable[[Any], Any] = float):
+        # Converts the results of comparisons and logical operators, it is float
+        # unless the interpreter uses exact numbers
+        self.number: Callable[[Any], Any] = number
+        # Compiled statements by the id of the statement. A WeakKeyDictionary
+        # would be simpler, but it builds a weak reference on every lookup
+        self.compiled: Dict[int, Callable[[dict], None]] = {}
+
+    def compile_stmt(self, stmt: Stmt) -> Callable[[dict], None]:
+        run = self.compiled.get(id(stmt))
+        if run is None:
+            run = self.compile_new_stmt(stmt)
+            self.compiled[id(stmt)] = run
+            # The id can be reused once the statement is gone
+            finalize(stmt, self.compiled.pop, id(stmt), None)
+        return run
+
+    def compile_new_stmt(self, stmt: Stmt) -> Callable[[dict], None]:
+        if isinstance(stmt, LetDecl):
+            name: str = stmt.name
+            if stmt.expr is None:
+                return lambda env: None
+
+            e: Closure = self.compile_expr(stmt.expr)
+            def let(env: dict) -> None:
+                env[name] = e(env)
+            return let
+
+        # The interpreter prints the value of expression statements too
+        e = self.compile_expr(stmt.expr)
+        return lambda env: print(e(env))
+
+    def compile_expr(self, expr: Expr) -> Closure:
+        if isinstance(expr, BinaryExpr):
+            return self.compile_binary_expr(expr)
+
+        elif isinstance(expr, NegateExpr):
+            e: Closure = self.compile_expr(expr.expr)
+            return lambda env: -1 * e(env)
+
+        elif isinstance(expr, NotExpr):
+            e = self.compile_expr(expr.expr)
+            number: Callable[[Any], Any] = self.number
+            return lambda env: number(not e(env))
+
+        elif isinstance(expr, (NumberNode, BooleanNode)):
+            value: float = self.number(expr.value) if isinstance(expr, BooleanNode) else expr.value
+            return lambda env: value
+
+        elif isinstance(expr, IdentifierNode):
+            return compile_load(expr)
+
+        elif isinstance(expr, Assignment):
+            return self.compile_assignment(expr)
+
+        raise TypeError(f"Can't compile {type(expr).__name__}")
+
+    def compile_assignment(self, expr: Assignment) -> Closure:
+        word: str = expr.word
+        position = expr.position
+        e: Closure = self.compile_expr(expr.expr)
+
+        def assign(env: dict) -> float:
+            # The variable must exist before its new value is evaluated
+            if word not in env:
+                raise UndefinedNameError(f"Variable {word} does not exist", position)
+            value: float = e(env)
+            env[word] = value
+            return value
+        return assign
+
+    def compile_binary_expr(self, expr: BinaryExpr) -> Closure:
+        spine: List[BinaryExpr] = left_spine(expr)
+        if len(spine) > LONG_CHAIN:
+            return self.compile_chain(spine)
+        # Every closure of the spine calls the one below it
+        l: Closure = self.compile_expr(spine[-1].left)
+        for e in reversed(spine):
+            l = self.compile_operation(e, l)
+        return l
+
+    def compile_chain(self, spine: List[BinaryExpr]) -> Closure:
+        '''
+        Compiles the spine of a long operator chain into a single closure that
+        applies its operators in a loop, since nested closures would call each
+        other deeper than Python can
+        '''
+        from vm import make_binary_functions
+
+        first: Closure = self.compile_expr(spine[-1].left)
+        steps: List[Tuple[int, Closure, Any]] = [(e.operator, self.compile_expr(e.right), e.position)
+                                                 for e in reversed(spine)]
+        functions: List[Callable] = make_binary_functions(self.number)
+        number: Callable[[Any], Any] = self.number
+
+        def chain(env: dict) -> float:
+            value: float = first(env)
+            for operator, r, position in steps:
+                if operator == AND or operator == OR:
+                    # The right operand is only evaluated when it decides the result
+                    if (operator == AND) == bool(value):
+                        value = r(env)
+                    value = number(value)
+                    continue
+                b: float = r(env)
+                try:
+                    value = functions[operator](value, b)
+                except MathError as error:
+                    # The operator functions don't know where they are in the source
+                    error.position = position
+                    raise
+            return value
+        return chain
+
+    def compile_operation(self, expr: BinaryExpr, l: Closure) -> Closure:
+        '''
+        Compiles a binary expression whose left operand is already compiled
+        '''
+        operator: int = expr.operator
+        position = expr.position
+        number: Callable[[Any], Any] = self.number
+
+        # The most common case, an arithmetic operator with a literal on the right
+        if isinstance(expr.right, NumberNode) and operator in (ADD, SUB, MUL):
+            c: float = expr.right.value
+            if operator == ADD:
+                return lambda env: l(env) + c
+            elif operator == SUB:
+                return lambda env: l(env) - c
+            return lambda env: l(env) * c
+
+        r: Closure = self.compile_expr(expr.right)
+
+        if operator == ADD:
+            return lambda env: l(env) + r(env)
+        elif operator == SUB:
+            return lambda env: l(env) - r(env)
+        elif operator == MUL:
+            return lambda env: l(env) * r(env)
+        elif operator == DIV:
+            def divide(env: dict) -> float:
+                a: float = l(env)
+                b: float = r(env)
+                if b == 0:
+                    raise MathError("Division by Zero", position)
+                return a / b
+            return divide
+        elif operator == MOD:
+            def modulus(env: dict) -> float:
+                a: float = l(env)
+                b: float = r(env)
+                try:
+                    return int(a) % int(b)
+                except ZeroDivisionError:
+                    raise MathError("Modulus by Zero", position) from None
+                except (ValueError, OverflowError):
+                    raise MathError(f"Can't take the modulus of {a} and {b}", position) from None
+            return modulus
+        elif operator == LT:
+            return lambda env: number(l(env) < r(env))
+        elif operator == LE:
+            return lambda env: number(l(env) <= r(env))
+        elif operator == GT:
+            return lambda env: number(l(env) > r(env))
+        elif operator == GE:
+            return lambda env: number(l(env) >= r(env))
+        elif operator == EQ:
+            return lambda env: number(l(env) == r(env))
+        elif operator == NE:
+            return lambda env: number(l(env) != r(env))
+
+        # The right operand of 'and' and 'or' is only evaluated when it decides the result
+        elif operator == AND:
+            def logical_and(env: dict) -> float:
+                a: float = l(env)
+                return number(r(env)) if a else number(a)
+            return logical_and
+
+        def logical_or(env: dict) -> float:
+            a: float = l(env)
+            return number(a) if a else number(r(env))
+        return logical_or
+
+
+def compile_load(expr: IdentifierNode) -> Closure:
+    word: str = expr.word
+    position = expr.position
+
+    def load(env: dict) -> float:
+        try:
+            return env[word]
+        except KeyError:
+            raise UndefinedNameError(f"Undefined variable '{word}'", position) from None
+    return load
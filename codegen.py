@@ -0,0 +1,234 @@
+from __future__ import annotations
+from math import isfinite
+from typing import Any, Callable, Dict, List, Optional, Set
+from weakref import finalize
+from AST import *
+from errors import MathError
+
+# A generated statement takes the environment, and returns False without doing
+# anything when it can't run because one of its variables doesn't exist
+Generated = Callable[[dict], bool]
+
+
+class CodeGenerator:
+    '''
+    Translates hot statements into Python source, which is compiled into a code
+    object, so that CPython's own compiler and specializing interpreter run them.
+    A statement is promoted once it has been executed threshold times.
+
+    The generated code follows the semantics of the tree walking Interpreter.
+    Within a statement the set of defined variables can't change, since only
+    'let' defines one and it does so at the end. So the code checks once that
+    its variables exist and then loads them without any check. When one of
+    them is missing it returns False, and the statement is walked instead so
+    that the error, if the variable is used at all, is raised at the right place
+    '''
+    def __init__(self, threshold: int, number: Callable[[Any], Any] = float):
+        self.threshold: int = threshold
+        # Converts the results of comparisons and logical operators
+        self.number: Callable[[Any], Any] = number
+        # Executions and generated code of the statements, by statement id
+        self.counts: Dict[int, int] = {}
+        self.generated: Dict[int, Generated] = {}
+        # The number of statements that were promoted
+        self.promoted: int = 0
+
+        # The state of the statement being generated
+        self.lines: List[str] = []
+        self.names: Dict[str, None] = {}
+        self.simple: Set[str] = set()
+        self.temp_count: int = 0
+        # The literals that aren't floats, which have no Python syntax
+        self.constants: Dict[str, Any] = {}
+
+    def lookup(self, stmt: Stmt) -> Optional[Generated]:
+        '''
+        Counts an execution of the statement, and returns its generated code
+        once it is hot
+        '''
+        key: int = id(stmt)
+        run: Optional[Generated] = self.generated.get(key)
+        if run is not None:
+            return run
+
+        count: int = self.counts.get(key, 0) + 1
+        if count == 1:
+            # The id can be reused once the statement is gone
+            finalize(stmt, self.forget, key)
+        if count < self.threshold:
+            self.counts[key] = count
+            return None
+
+        self.counts.pop(key, None)
+        try:
+            run = self.generate(stmt)
+            self.promoted += 1
+        except (SyntaxError, RecursionError, MemoryError):
+            # Code nested deeper than CPython can compile, like a long chain of
+            # parenthesized 'and's, is left to the tree walker
+            run = lambda env: False
+        self.generated[key] = run
+        return run
+
+    def forget(self, key: int) -> None:
+        self.counts.pop(key, None)
+        self.generated.pop(key, None)
+
+    def generate(self, stmt: Stmt) -> Generated:
+        self.lines = []
+        self.names = {}
+        self.simple = set()
+        self.temp_count = 0
+        self.constants = {}
+
+        if isinstance(stmt, LetDecl):
+            if stmt.expr is not None:
+                value: str = self.generate_expr(stmt.expr)
+                self.emit(f"env[{stmt.name!r}] = {value}")
+        else:
+            # The interpreter prints the value of expression statements too
+            self.emit(f"print({self.generate_expr(stmt.expr)})")
+
+        guard: List[str] = []
+        if self.names:
+            checks: str = ' or '.join(f"{name!r} not in env" for name in self.names)
+            guard = [f"    if {checks}:", "        return False"]
+        source: str = '\n'.join(['def run(env):', *guard, *self.lines, '    return True'])
+
+        namespace: dict = {'MathError': MathError, 'number': self.number, **self.constants}
+        exec(compile(source, '<generated>', 'exec'), namespace)
+        return namespace['run']
+
+    def emit(self, line: str) -> None:
+        self.lines.append('    ' + line)
+
+    def temp(self, value: str) -> str:
+        '''
+        Stores a value in a new local variable and returns its name
+        '''
+        name: str = f"t{self.temp_count}"
+        self.temp_count += 1
+        self.emit(f"{name} = {value}")
+        self.simple.add(name)
+        return name
+
+    def evaluate(self, value: str) -> str:
+        '''
+        Makes sure a value is computed now, rather than where it is used
+        '''
+        return value if value in self.simple else self.temp(value)
+
+    def shallow(self, value: str) -> str:
+        '''
+        Breaks up deeply nested expressions, which CPython's parser can't compile
+        '''
+        return self.temp(value) if value.count('(') > 50 else value
+
+    def generate_expr(self, expr: Expr) -> str:
+        '''
+        Emits the statements that an expression needs and returns a Python
+        expression for its value
+        '''
+        if isinstance(expr, BinaryExpr):
+            return self.generate_binary_expr(expr)
+
+        elif isinstance(expr, (MemoExpr, CommonExpr)):
+            # CPython evaluates the copies of a common subexpression again, it
+            # costs less than keeping the memo
+            return self.generate_expr(expr.expr)
+
+        elif isinstance(expr, NegateExpr):
+            return f"(-1 * {self.shallow(self.generate_expr(expr.expr))})"
+
+        elif isinstance(expr, NotExpr):
+            return f"number(not {self.shallow(self.generate_expr(expr.expr))})"
+
+        elif isinstance(expr, (NumberNode, BooleanNode)):
+            value: float = self.number(expr.value) if isinstance(expr, BooleanNode) else expr.value
+            if type(value) is float:
+                literal: str = repr(value) if isfinite(value) else f"float('{value}')"
+                literal = f"({literal})"
+            else:
+                literal = f"c{len(self.constants)}"
+                self.constants[literal] = value
+            self.simple.add(literal)
+            return literal
+
+        elif isinstance(expr, IdentifierNode):
+            self.names[expr.word] = None
+            return f"env[{expr.word!r}]"
+
+        elif isinstance(expr, Assignment):
+            self.names[expr.word] = None
+            value = self.evaluate(self.generate_expr(expr.expr))
+            self.emit(f"env[{expr.word!r}] = {value}")
+            return value
+
+        raise TypeError(f"Can't generate code for {type(expr).__name__}")
+
+    def generate_logical_expr(self, expr: BinaryExpr, left: str) -> str:
+        result: str = self.temp(left)
+        mark: int = len(self.lines)
+        right: str = self.generate_expr(expr.right)
+
+        # The statements of the right operand only run when it decides the result
+        block: List[str] = ['    ' + line for line in self.lines[mark:]]
+        del self.lines[mark:]
+        self.emit(f"if {result}:" if expr.operator == AND else f"if not {result}:")
+        self.lines.extend(block)
+        self.emit(f"    {result} = {right}")
+        return f"number({result})"
+
+    def generate_binary_expr(self, expr: BinaryExpr) -> str:
+        spine: List[BinaryExpr] = left_spine(expr)
+        left: str = self.generate_expr(spine[-1].left)
+        for e in reversed(spine):
+            left = self.generate_operation(e, left)
+        return left
+
+    def generate_operation(self, expr: BinaryExpr, left: str) -> str:
+        '''
+        Generates a binary expression whose left operand is already generated
+        '''
+        operator: int = expr.operator
+        if operator == AND or operator == OR:
+            return self.generate_logical_expr(expr, left)
+
+        left = self.shallow(left)
+        mark: int = len(self.lines)
+        right: str = self.shallow(self.generate_expr(expr.right))
+
+        # When the right operand needed statements, the left one has to be
+        # computed before them, since they may assign to its variables
+        if len(self.lines) > mark and left not in self.simple:
+            name: str = f"t{self.temp_count}"
+            self.temp_count += 1
+            self.lines.insert(mark, f"    {name} = {left}")
+            self.simple.add(name)
+            left = name
+
+        if operator == ADD or operator == SUB or operator == MUL:
+            return f"({left} {OPERATORS[operator]} {right})"
+
+        elif operator == DIV:
+            left = self.evaluate(left)
+            right = self.evaluate(right)
+            self.emit(f"if {right} == 0:")
+            self.emit(f"    raise MathError('Division by Zero', {expr.position!r})")
+            return f"({left} / {right})"
+
+        elif operator == MOD:
+            left = self.evaluate(left)
+            right = self.evaluate(right)
+            name = f"t{self.temp_count}"
+            self.temp_count += 1
+            self.emit("try:")
+            self.emit(f"    {name} = int({left}) % int({right})")
+            self.emit("except ZeroDivisionError:")
+            self.emit(f"    raise MathError('Modulus by Zero', {expr.position!r}) from None")
+            self.emit("except (ValueError, OverflowError):")
+            self.emit(f"    raise MathError(\"Can't take the modulus of %s and %s\" % ({left}, {right}), {expr.position!r}) from None")
+            self.simple.add(name)
+            return name
+
+        return f"number({left} {OPERATORS[operator]} {right})"
@@ -0,0 +1,180 @@
+from __future__ import annotations
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from weakref import finalize
+from AST import *
+
+# Opcodes of the stack based virtual machine. Every instruction is two words
+# wide, an opcode followed by its operand, which is 0 if the opcode has none.
+#
+# The binary operators come in three flavours, depending on where the right
+# operand is: on the stack, in the constants table or in the environment.
+# Fusing the load of a literal or a variable into the operator halves the
+# number of instructions for typical expressions. The opcode of a binary
+# operator is its code from AST.OPERATORS plus the offset of its flavour.
+BINARY_COUNT: int = len(OPERATORS)
+
+BINARY = 0                          # l = pop(), r = pop(), push(l op r)
+BINARY_CONST = BINARY_COUNT         # push(pop() op constants[arg])
+BINARY_LOAD = 2 * BINARY_COUNT      # push(pop() op environment[names[arg]])
+CONST = 3 * BINARY_COUNT            # push(constants[arg])
+LOAD = CONST + 1                    # push(environment[names[arg]])
+CHECK = CONST + 2                   # fail if names[arg] is not declared
+STORE = CONST + 3                   # environment[names[arg]] = top, keep it on the stack
+DEFINE = CONST + 4                  # environment[names[arg]] = pop()
+PRINT = CONST + 5                   # print(pop())
+NEG = CONST + 6
+NOT = CONST + 7
+FLOAT = CONST + 8                   # top = number(top), float(top) with floats
+JUMP_IF_FALSE = CONST + 9           # if not top: pc = arg, else pop()
+JUMP_IF_TRUE = CONST + 10           # if top: pc = arg, else pop()
+
+
+class Chunk:
+    '''
+    A compiled program: a flat array of instructions together with
+    the constants and variable names they refer to
+    '''
+    def __init__(self):
+        # Operands can be larger than a byte, so every word is an unsigned int
+        self.code: array = array('I')
+        # The code as a list, made by the VM the first time it runs the chunk,
+        # because indexing a list is cheaper than indexing an array
+        self.words: Optional[List[int]] = None
+        self.constants: List[float] = []
+        self.names: List[str] = []
+        # Source positions of the instructions that can fail, by their offset in the
+        # code. Names and arithmetic are kept apart because a division by a variable
+        # can fail in both ways
+        self.name_positions: Dict[int, Tuple[int, int]] = {}
+        self.math_positions: Dict[int, Tuple[int, int]] = {}
+        # Constants are keyed by their repr, because 1 == 1.0 and 0.0 == -0.0
+        # would otherwise share the same slot
+        self.constant_index: Dict[str, int] = {}
+        self.name_index: Dict[str, int] = {}
+
+    def emit(self, opcode: int, operand: int = 0) -> int:
+        '''
+        Appends an instruction and returns its offset
+        '''
+        self.code.append(opcode)
+        self.code.append(operand)
+        return len(self.code) - 2
+
+    def locate(self, positions: Dict[int, Tuple[int, int]], offset: int, position: Optional[Tuple[int, int]]) -> None:
+        if position is not None:
+            positions[offset] = position
+
+    def add_constant(self, value: float) -> int:
+        key: str = repr(value)
+        if key not in self.constant_index:
+            self.constant_index[key] = len(self.constants)
+            self.constants.append(value)
+        return self.constant_index[key]
+
+    def add_name(self, name: str) -> int:
+        if name not in self.name_index:
+            self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return self.name_index[name]
+
+
+class Compiler:
+    '''
+    Translates the statements produced by the Parser into a Chunk for the VM.
+
+    The Chunks of single statements are remembered for as long as the statement
+    itself is alive, so a statement that is executed again isn't compiled again
+    '''
+    def __init__(self, number: Callable[[Any], Any] = float):
+        # Converts the booleans to the numbers of the interpreter
+        self.number: Callable[[Any], Any] = number
+        self.chunk: Chunk = Chunk()
+        # Chunks by the id of their statement. A WeakKeyDictionary would be
+        # simpler, but it builds a weak reference on every lookup
+        self.compiled: Dict[int, Chunk] = {}
+
+    def compile(self, script: List[Stmt]) -> Chunk:
+        self.chunk = Chunk()
+        for stmt in script:
+            self.compile_stmt(stmt)
+        return self.chunk
+
+    def compile_once(self, stmt: Stmt) -> Chunk:
+        '''
+        Returns the Chunk of a single statement, compiling it the first time
+        '''
+        chunk: Optional[Chunk] = self.compiled.get(id(stmt))
+        if chunk is None:
+            chunk = self.compile([stmt])
+            self.compiled[id(stmt)] = chunk
+            # The id can be reused once the statement is gone
+            finalize(stmt, self.compiled.pop, id(stmt), None)
+        return chunk
+
+    def compile_stmt(self, stmt: Stmt) -> None:
+        if isinstance(stmt, LetDecl):
+            # A declaration without an initializer does nothing
+            if stmt.expr is not None:
+                self.compile_expr(stmt.expr)
+                self.chunk.emit(DEFINE, self.chunk.add_name(stmt.name))
+
+        elif isinstance(stmt, (PrintStmt, ExprStmt)):
+            # The interpreter prints the value of expression statements too
+            self.compile_expr(stmt.expr)
+            self.chunk.emit(PRINT)
+
+    def compile_expr(self, expr: Expr) -> None:
+        if isinstance(expr, BinaryExpr):
+            spine: List[BinaryExpr] = left_spine(expr)
+            self.compile_expr(spine[-1].left)
+
+            for e in reversed(spine):
+                opcode: int = e.operator
+                right: Expr = e.right
+
+                if opcode == AND or opcode == OR:
+                    # Jump over the right operand when the left one decides the result
+                    jump: int = self.chunk.emit(JUMP_IF_FALSE if opcode == AND else JUMP_IF_TRUE)
+                    self.compile_expr(right)
+                    self.chunk.code[jump + 1] = len(self.chunk.code)
+                    self.chunk.emit(FLOAT)
+                    continue
+
+                if isinstance(right, NumberNode):
+                    offset: int = self.chunk.emit(BINARY_CONST + opcode, self.chunk.add_constant(right.value))
+                elif isinstance(right, BooleanNode):
+                    offset = self.chunk.emit(BINARY_CONST + opcode, self.chunk.add_constant(self.number(right.value)))
+                elif isinstance(right, IdentifierNode):
+                    offset = self.chunk.emit(BINARY_LOAD + opcode, self.chunk.add_name(right.word))
+                    self.chunk.locate(self.chunk.name_positions, offset, right.position)
+                else:
+                    self.compile_expr(right)
+                    offset = self.chunk.emit(BINARY + opcode)
+                self.chunk.locate(self.chunk.math_positions, offset, e.position)
+
+        elif isinstance(expr, NegateExpr):
+            self.compile_expr(expr.expr)
+            self.chunk.emit(NEG)
+
+        elif isinstance(expr, NotExpr):
+            self.compile_expr(expr.expr)
+            self.chunk.emit(NOT)
+
+        elif isinstance(expr, NumberNode):
+            self.chunk.emit(CONST, self.chunk.add_constant(expr.value))
+
+        elif isinstance(expr, BooleanNode):
+            self.chunk.emit(CONST, self.chunk.add_constant(self.number(expr.value)))
+
+        elif isinstance(expr, IdentifierNode):
+            offset = self.chunk.emit(LOAD, self.chunk.add_name(expr.word))
+            self.chunk.locate(self.chunk.name_positions, offset, expr.position)
+
+        elif isinstance(expr, Assignment):
+            # The variable must exist before its new value is evaluated
+            name: int = self.chunk.add_name(expr.word)
+            offset = self.chunk.emit(CHECK, name)
+            self.chunk.locate(self.chunk.name_positions, offset, expr.position)
+            self.compile_expr(expr.expr)
+            self.chunk.emit(STORE, name)
@@ -0,0 +1,193 @@
+from __future__ import annotations
+from typing import Dict, List, Optional, Set
+from AST import *
+
+
+class SubexpressionEliminator:
+    '''
+    Finds the subexpressions that appear more than once in a statement, like
+    a * b + c in (a * b + c) * (a * b + c) - (a * b + c) % 3, so that they are
+    evaluated once per execution of the statement.
+
+    Structurally identical subtrees are hash-consed: every copy is replaced by
+    the same CommonExpr, whose value is remembered in a memo that a MemoExpr at
+    the root of the statement's expression opens every time it is evaluated.
+    Only the largest repeated subtrees are shared, a repeated subtree that only
+    appears inside copies of a larger one is evaluated once anyway.
+
+    A subtree is shared only if it has no side effects and can't see one: it
+    contains no Assignment and reads no variable that the statement assigns
+    to. Variables and literals are left alone, they cost no more to evaluate
+    than to look up in the memo. Since the first copy evaluated is the one
+    that raises, errors are reported as without sharing
+    '''
+    def __init__(self):
+        # Subtrees shared so far, and the copies of them that were replaced
+        self.shared: int = 0
+        self.copies: int = 0
+
+        # The state of the statement being rewritten. Every distinct subtree gets
+        # a small int, so that the key of a node never holds more than its children's
+        self.ids: Dict[tuple, int] = {}
+        self.keys: Dict[int, int] = {}
+        self.counts: Dict[int, int] = {}
+        self.pure: Set[int] = set()
+        self.assigned: Set[str] = set()
+        self.common: Dict[int, CommonExpr] = {}
+
+    def eliminate(self, script: List[Stmt]) -> List[Stmt]:
+        return [self.eliminate_stmt(stmt) for stmt in script]
+
+    def eliminate_stmt(self, stmt: Stmt) -> Stmt:
+        expr: Optional[Expr] = getattr(stmt, 'expr', None)
+        if expr is None:
+            return stmt
+
+        self.ids = {}
+        self.keys = {}
+        self.counts = {}
+        self.pure = set()
+        self.assigned = set()
+        self.common = {}
+        self.key(expr)
+        if all(count < 2 for count in self.counts.values()):
+            return stmt
+
+        # Copies of a subtree inside a copy that is shared don't count
+        visits: Dict[int, int] = {}
+        self.visit(expr, visits)
+        shared: Set[int] = {key for key, count in visits.items() if count > 1}
+        if not shared:
+            return stmt
+
+        rewritten: Expr = self.rewrite(expr, shared)
+        rewritten = MemoExpr(rewritten, len(self.common))
+        self.shared += len(shared)
+        self.copies += sum(visits[key] - 1 for key in shared)
+        if isinstance(stmt, SlotLetDecl):
+            return SlotLetDecl(stmt.name, stmt.slot, rewritten)
+        elif isinstance(stmt, LetDecl):
+            return LetDecl(stmt.name, rewritten)
+        return type(stmt)(rewritten)
+
+    def key(self, expr: Expr) -> int:
+        '''
+        Numbers the subtrees of an expression, identical subtrees getting the
+        same number, and counts them
+        '''
+        shape: tuple
+        pure: bool = True
+        if isinstance(expr, BinaryExpr):
+            spine: List[BinaryExpr] = left_spine(expr)
+            left: int = self.key(spine[-1].left)
+            for e in reversed(spine):
+                right: int = self.key(e.right)
+                left = self.number(e, (type(e), e.operator, left, right), left in self.pure and right in self.pure)
+            return left
+        elif isinstance(expr, UnaryExpr):
+            inner: int = self.key(expr.expr)
+            shape = (type(expr), inner)
+            pure = inner in self.pure
+        elif isinstance(expr, IdentifierNode):
+            shape = (IdentifierNode, expr.word)
+        elif isinstance(expr, (NumberNode, BooleanNode)):
+            # repr keeps 1 and 1.0, and 0.0 and -0.0, apart
+            shape = (type(expr), repr(expr.value))
+        else:
+            # Assignments are never shared, nor is anything above them
+            if isinstance(expr, Assignment):
+                self.assigned.add(expr.word)
+                self.key(expr.expr)
+            shape = (id(expr),)
+            pure = False
+        return self.number(expr, shape, pure)
+
+    def number(self, expr: Expr, shape: tuple, pure: bool) -> int:
+        '''
+        Gives a subtree the number of its shape, and counts it
+        '''
+        number: int = self.ids.setdefault(shape, len(self.ids))
+        self.keys[id(expr)] = number
+        self.counts[number] = self.counts.get(number, 0) + 1
+        if pure:
+            self.pure.add(number)
+        return number
+
+    def can_share(self, expr: Expr) -> bool:
+        key: int = self.keys[id(expr)]
+        return (self.counts[key] > 1 and key in self.pure
+                and isinstance(expr, (BinaryExpr, UnaryExpr))
+                and not (self.assigned and reads_any(expr, self.assigned)))
+
+    def visit(self, expr: Expr, visits: Dict[int, int]) -> None:
+        '''
+        Counts the copies of every repeated subtree that would be evaluated,
+        without looking inside the copies after the first
+        '''
+        # The subtrees are visited in the order of a recursive walk, left
+        # operands first, with a stack of those left to visit
+        work: List[Expr] = [expr]
+        while work:
+            e: Expr = work.pop()
+            if self.can_share(e):
+                key: int = self.keys[id(e)]
+                visits[key] = visits.get(key, 0) + 1
+                if visits[key] > 1:
+                    continue
+
+            if isinstance(e, BinaryExpr):
+                work.append(e.right)
+                work.append(e.left)
+            elif isinstance(e, (UnaryExpr, Assignment)):
+                work.append(e.expr)
+
+    def rewrite(self, expr: Expr, shared: Set[int]) -> Expr:
+        key: int = self.keys[id(expr)]
+        if key in shared:
+            common: Optional[CommonExpr] = self.common.get(key)
+            if common is None:
+                common = CommonExpr(self.rebuild(expr, shared), len(self.common))
+                self.common[key] = common
+            return common
+        return self.rebuild(expr, shared)
+
+    def rebuild(self, expr: Expr, shared: Set[int]) -> Expr:
+        if isinstance(expr, BinaryExpr):
+            # The spine stops above the first left operand that is shared,
+            # which rewrite turns into its CommonExpr
+            spine: List[BinaryExpr] = [expr]
+            while isinstance(spine[-1].left, BinaryExpr) and self.keys[id(spine[-1].left)] not in shared:
+                spine.append(spine[-1].left)
+            left: Expr = self.rewrite(spine[-1].left, shared)
+            for e in reversed(spine):
+                right: Expr = self.rewrite(e.right, shared)
+                left = make_binary_expr(left, e.operator, right, e.line, e.column)
+            return left
+
+        elif isinstance(expr, UnaryExpr):
+            return type(expr)(self.rewrite(expr.expr, shared))
+
+        elif isinstance(expr, SlotAssignment):
+            return SlotAssignment(expr.word, expr.slot, self.rewrite(expr.expr, shared), expr.line, expr.column)
+
+        elif isinstance(expr, Assignment):
+            return Assignment(expr.word, self.rewrite(expr.expr, shared), expr.line, expr.column)
+
+        return expr
+
+
+def reads_any(expr: Expr, names: Set[str]) -> bool:
+    '''
+    Checks if an expression reads any of the variables
+    '''
+    work: List[Expr] = [expr]
+    while work:
+        e: Expr = work.pop()
+        if isinstance(e, BinaryExpr):
+            work.append(e.left)
+            work.append(e.right)
+        elif isinstance(e, UnaryExpr):
+            work.append(e.expr)
+        elif isinstance(e, IdentifierNode) and e.word in names:
+            return True
+    return False
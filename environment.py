@@ -0,0 +1,57 @@
+from __future__ import annotations
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional
+
+
+class Environment(MutableMapping):
+    '''
+    The variables of a program stored in a flat list, at the slots that the
+    Resolver assigns to their names. A slot holds None until its variable gets
+    a value. It also behaves like the dict of variables, for the backends that
+    look them up by name
+    '''
+    def __init__(self):
+        self.slots: Dict[str, int] = {}
+        self.cells: List[Optional[float]] = []
+
+    def declare(self, name: str) -> int:
+        '''
+        Returns the slot of a variable, giving it a new one the first time
+        '''
+        slot: Optional[int] = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.cells)
+            self.cells.append(None)
+        return slot
+
+    def __getitem__(self, name: str) -> float:
+        value: Optional[float] = self.cells[self.slots[name]]
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __setitem__(self, name: str, value: float) -> None:
+        self.cells[self.declare(name)] = value
+
+    def __delitem__(self, name: str) -> None:
+        # The slot is kept, resolved nodes may still refer to it
+        if name not in self:
+            raise KeyError(name)
+        self.cells[self.slots[name]] = None
+
+    def __contains__(self, name: object) -> bool:
+        slot: Optional[int] = self.slots.get(name)
+        return slot is not None and self.cells[slot] is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return (name for name, slot in self.slots.items() if self.cells[slot] is not None)
+
+    def __len__(self) -> int:
+        return len(self.cells) - self.cells.count(None)
+
+    def clear(self) -> None:
+        # The slots are kept, resolved nodes may still refer to them
+        self.cells[:] = [None] * len(self.cells)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
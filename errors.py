@@ -0,0 +1,41 @@
+from __future__ import annotations
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Optional, Tuple
+
+# Errors raised while scanning, parsing and executing a program. The Interpreter
+# reports them and goes on with the next statement instead of exiting
+
+
+class CalcError(Exception):
+    kind: str = 'Error'
+
+    def __init__(self, message: str, position: Optional[Tuple[int, int]] = None):
+        super().__init__(message)
+        self.message: str = message
+        # The line and column where the error happened, both start at 1
+        self.position: Optional[Tuple[int, int]] = position
+
+    def __str__(self) -> str:
+        if self.position is None:
+            return f"{self.kind}: {self.message}"
+        line, column = self.position
+        return f"{self.kind} at line {line}, column {column}: {self.message}"
+
+class LexicalError(CalcError):
+    kind = 'Lexical Error'
+
+class UnknownSymbol(LexicalError):
+    pass
+
+class ParseError(CalcError):
+    kind = 'Syntax Error'
+
+class UndefinedNameError(CalcError):
+    kind = 'Name Error'
+
+class MathError(CalcError):
+    kind = 'Math Error'
+
+class DataError(CalcError):
+    kind = 'Data Error'
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from AST import *
+from scanner import Scanner
+from parser import Parser
+from errors import CalcError
+
+# The ';' that end statements. Strings are matched too, to skip the ';' inside
+# them, and like in the scanner they end at the end of their line
+boundary = re.compile(r'"[^"\n]*"?|;')
+
+
+class IncrementalParser:
+    '''
+    Parses a buffer that is submitted again and again with small edits. The
+    buffer is split into statements at its ';', and the statements whose text
+    is the same as in the previous buffer are reused instead of being scanned
+    and parsed again. Only the edited statements are parsed, so the work done
+    is proportional to the size of the edit, apart from finding the ';'.
+
+    A statement that moved to another line is reused with its positions moved
+    too. One that moved within its line, because an earlier statement on the
+    same line was edited, is parsed again. Statements with errors are never
+    reused, so that their errors are reported every time
+    '''
+    def __init__(self, scanner: Scanner, parser: Parser):
+        self.scanner: Scanner = scanner
+        self.parser: Parser = parser
+        # The statements of the previous buffer by their text, line and column
+        self.statements: Dict[Tuple[str, int, int], List[Stmt]] = {}
+        # The same statements by their text and column, with their line, to find
+        # the ones that moved to another line
+        self.moved: Dict[Tuple[str, int], Tuple[List[Stmt], int]] = {}
+        self.reused: int = 0
+        self.parsed: int = 0
+
+    def parse(self, source: str, report: Callable[[CalcError], None]) -> List[Stmt]:
+        script: List[Stmt] = []
+        statements: Dict[Tuple[str, int, int], List[Stmt]] = {}
+        moved: Dict[Tuple[str, int], Tuple[List[Stmt], int]] = {}
+
+        for text, line, column in split_statements(source):
+            stmts: Optional[List[Stmt]] = self.statements.get((text, line, column))
+            if stmts is None:
+                # A statement can also have moved from another line of this buffer
+                known: Optional[Tuple[List[Stmt], int]] = moved.get((text, column)) or self.moved.get((text, column))
+                if known is not None:
+                    stmts = [relocate(stmt, line - known[1]) for stmt in known[0]]
+
+            if stmts is not None:
+                self.reused += 1
+            else:
+                stmts, failed = self.parse_statement(text, line, column, report)
+                self.parsed += 1
+                if failed:
+                    script.extend(stmts)
+                    continue
+
+            statements[(text, line, column)] = stmts
+            moved[(text, column)] = (stmts, line)
+            script.extend(stmts)
+
+        # Only the statements of this buffer are kept for the next one
+        self.statements = statements
+        self.moved = moved
+        return script
+
+    def parse_statement(self, text: str, line: int, column: int,
+                        report: Callable[[CalcError], None]) -> Tuple[List[Stmt], bool]:
+        '''
+        Parses the text of a single statement, and tells if it had errors
+        '''
+        stmts: List[Stmt] = []
+        failed: bool = False
+        self.parser.start(self.scanner.tokenize(text, line, column))
+        while True:
+            try:
+                stmt: Optional[Stmt] = self.parser.parse_next()
+            except CalcError as error:
+                report(error)
+                failed = True
+                continue
+            if stmt is None:
+                return stmts, failed
+            stmts.append(stmt)
+
+
+def split_statements(source: str) -> Iterator[Tuple[str, int, int]]:
+    '''
+    Yields the text of every statement with its terminating ';', and the line and
+    column it starts at. The text after the last ';' is yielded too if it isn't blank
+    '''
+    start: int = 0
+    line: int = 1
+    line_start: int = 0
+    for match in boundary.finditer(source):
+        if match.group() != ';':
+            continue
+        end: int = match.end()
+        yield source[start:end], line, start - line_start + 1
+
+        newlines: int = source.count('\n', start, end)
+        if newlines:
+            line += newlines
+            line_start = source.rfind('\n', start, end) + 1
+        start = end
+
+    if source[start:].strip():
+        yield source[start:], line, start - line_start + 1
+
+
+def relocate(stmt: Stmt, lines: int) -> Stmt:
+    '''
+    Returns a copy of a statement with its positions moved by a number of lines
+    '''
+    if isinstance(stmt, LetDecl):
+        return LetDecl(stmt.name, relocate_expr(stmt.expr, lines) if stmt.expr is not None else None)
+    elif isinstance(stmt, PrintStmt):
+        return PrintStmt(relocate_expr(stmt.expr, lines))
+    elif isinstance(stmt, ExprStmt):
+        return ExprStmt(relocate_expr(stmt.expr, lines))
+    return stmt
+
+def relocate_expr(expr: Expr, lines: int) -> Expr:
+    if isinstance(expr, BinaryExpr):
+        spine: List[BinaryExpr] = left_spine(expr)
+        left: Expr = relocate_expr(spine[-1].left, lines)
+        for e in reversed(spine):
+            right: Expr = relocate_expr(e.right, lines)
+            left = make_binary_expr(left, e.operator, right, move(e.line, lines), e.column)
+        return left
+
+    elif isinstance(expr, UnaryExpr):
+        return type(expr)(relocate_expr(expr.expr, lines))
+
+    elif isinstance(expr, IdentifierNode):
+        return IdentifierNode(expr.word, move(expr.line, lines), expr.column)
+
+    elif isinstance(expr, Assignment):
+        return Assignment(expr.word, relocate_expr(expr.expr, lines), move(expr.line, lines), expr.column)
+
+    return expr
+
+def move(line: int, lines: int) -> int:
+    # A line of 0 means that the node has no position
+    return line + lines if line else 0
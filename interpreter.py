@@ -1,88 +1,458 @@
 from __future__ import annotations
-from parser import *
-from scanner import *
-from typing import List
+from AST import *
+from numeric import NumericMode, numeric_mode
+from errors import CalcError, MathError
+# Starting the interpreter only imports what running statements needs. The
+# scanner and the parser are imported the first time there is source to read,
+# and the optional parts when they are asked for
+if TYPE_CHECKING:
+    from typing import Any, Callable, Dict, Iterable, Iterator, List, MutableMapping, Optional, Tuple, Union
+    from _token import Token
+    from scanner import Scanner
+    from parser import Parser
+    from compiler import Compiler
+    from vm import VM
+    from closures import ClosureCompiler
+    from codegen import CodeGenerator
+    from optimizer import Optimizer
+    from cache import ParseCache
+    from resolver import Resolver
+    from incremental import IncrementalParser
+    from reactive import ReactiveEnvironment
+    from profiler import Profiler
+    from cse import SubexpressionEliminator
+    from bulk import BulkEvaluator
 
 class Interpreter:
-    def __init__(self):
-        self.scanner: Scanner= Scanner()
-        self.parser: Parser = Parser()
-        # A dictionary to contain all the variables and their bindings
-        self.environment: dict = {}
+    # Backends that can execute the parsed statements
+    backends = ('tree', 'vm', 'closure')
+
+    def __init__(self, backend: str = 'tree', optimize: bool = False, cache_size: int = 0,
+                 hot_threshold: int = 0, resolve: bool = False, incremental: bool = False,
+                 reactive: bool = False, profile: bool = False, numbers: str = 'float', precision: int = 28,
+                 cse: bool = False):
+        if backend not in Interpreter.backends:
+            raise ValueError(f"Unknown backend '{backend}'")
+        if resolve and reactive:
+            raise ValueError("Variables resolved to slots can't be reactive")
+        if cse and backend != 'tree':
+            raise ValueError("Only the tree walker shares common subexpressions")
+        # The type of the numbers, float unless exact numbers were asked for
+        self.numbers: NumericMode = numeric_mode(numbers, precision)
+        self.number: Callable[[Any], Any] = self.numbers.number
+        # Sources that are edited and run again reuse the statements that didn't change
+        self.incremental_parser: Optional[IncrementalParser] = None
+        if incremental:
+            from incremental import IncrementalParser
+            self.incremental_parser = IncrementalParser(self.scanner, self.parser)
+        self.backend: str = backend
+        self.compiler: Optional[Compiler] = None
+        self.vm: Optional[VM] = None
+        if backend == 'vm':
+            from compiler import Compiler
+            from vm import VM
+            self.compiler = Compiler(self.number)
+            self.vm = VM(self.number)
+        self.closure_compiler: Optional[ClosureCompiler] = None
+        if backend == 'closure':
+            from closures import ClosureCompiler
+            self.closure_compiler = ClosureCompiler(self.number)
+        # The tree walker compiles statements to Python code once they have run
+        # hot_threshold times, when it is positive
+        self.code_generator: Optional[CodeGenerator] = None
+        if hot_threshold > 0:
+            from codegen import CodeGenerator
+            self.code_generator = CodeGenerator(hot_threshold, self.number)
+        self.optimizer: Optional[Optimizer] = None
+        if optimize:
+            from optimizer import Optimizer
+            self.optimizer = Optimizer(self.numbers)
+        # Parsed scripts are cached by their source when the size is positive
+        self.cache: Optional[ParseCache] = None
+        if cache_size > 0:
+            from cache import ParseCache
+            self.cache = ParseCache(cache_size)
+        # A dictionary to contain all the variables and their bindings. When the
+        # variables are resolved to slots, they are kept in a flat Environment
+        self.environment: MutableMapping[str, float] = {}
+        self.resolver: Optional[Resolver] = None
+        if resolve:
+            from environment import Environment
+            from resolver import Resolver
+            self.environment = Environment()
+            self.resolver = Resolver(self.environment)
+        # In reactive mode the variables keep their formulas and are recomputed
+        # when the variables they read change
+        self.reactive: Optional[ReactiveEnvironment] = None
+        if reactive:
+            from reactive import ReactiveEnvironment
+            self.environment = self.reactive = ReactiveEnvironment(lambda expr: expr.accept(self))
+        # Subexpressions repeated in a statement are evaluated once per execution,
+        # and their values kept in the memo of the statement being executed
+        self.eliminator: Optional[SubexpressionEliminator] = None
+        if cse:
+            from cse import SubexpressionEliminator
+            self.eliminator = SubexpressionEliminator()
+        self.memo: List[Optional[float]] = []
+        # The evaluations of repeated subexpressions that the memo saved
+        self.saved_evaluations: int = 0
+        # The number of errors reported so far
+        self.error_count: int = 0
+        # Profiling times the methods of this interpreter, its scanner and its
+        # parser, without it they run untouched
+        self.profiler: Optional[Profiler] = None
+        if profile:
+            from profiler import Profiler
+            self.profiler = Profiler().attach(self)
+
+    def __getattr__(self, name: str) -> Any:
+        '''
+        Builds the scanner or the parser the first time it is used. Statements
+        loaded from an AST cache run without importing either of them
+        '''
+        if name == 'scanner':
+            from scanner import RegexScanner
+            self.scanner: Scanner = RegexScanner(self.number)
+            return self.scanner
+        if name == 'parser':
+            from parser import Parser
+            self.parser: Parser = Parser()
+            return self.parser
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def reset(self) -> None:
+        '''
+        Forgets every variable and the errors reported so far. Resolved variables
+        lose their slots too, so that their names are undefined again, and the
+        statements resolved to the old slots leave the cache
+        '''
+        if self.resolver is not None:
+            from environment import Environment
+            self.environment = self.resolver.environment = Environment()
+            if self.cache is not None:
+                self.cache.clear()
+        else:
+            self.environment.clear()
+        self.error_count = 0
 
     def run(self) -> None:
         while (True):
-            user_input: str = input("> ")
+            try:
+                user_input: str = input("> ")
+            except EOFError:
+                break
             if user_input == 'exit' or user_input == 'quit':
                 break
-            self.scanner.scan(user_input)
-            # print(self.scanner.tokens)
-            self.parser.parse(self.scanner.tokens)
-            self.execute(self.parser.script)
+            self.run_source(user_input)
+
+    def run_source(self, source: str) -> int:
+        '''
+        Scans and parses a whole program, then executes the statements that had
+        no syntax errors, or undefined variables when they are resolved. Returns the number of statements executed
+        '''
+        script: Optional[List[Stmt]] = self.cache.get(source) if self.cache is not None else None
+
+        if script is None:
+            errors: int = self.error_count
+            if self.incremental_parser is not None:
+                script = self.incremental_parser.parse(source, self.report)
+            else:
+                script = list(self.parse_reporting(self.scanner.tokenize(source)))
+            script = self.prepare(script)
+            # A source with errors isn't cached, its errors are reported every time
+            if self.cache is not None and self.error_count == errors:
+                self.cache.put(source, script)
+
+        for stmt in script:
+            self.execute_reporting(stmt)
+        return len(script)
+
+    def prepare(self, script: List[Stmt]) -> List[Stmt]:
+        '''
+        Runs the passes that were asked for over parsed statements. Statements
+        with undefined variables are reported and left out when they are resolved
+        '''
+        if self.optimizer is not None:
+            script = self.optimizer.optimize(script)
+        if self.resolver is not None:
+            script = [stmt for stmt in map(self.resolve_reporting, script) if stmt is not None]
+        if self.eliminator is not None:
+            script = self.eliminator.eliminate(script)
+        return script
+
+    def run_command(self, source: str, ast_cache: Optional[str] = None) -> int:
+        '''
+        Runs the statements of a one-shot command, where an expression alone
+        needs no semicolon. Its statements are kept in the AST cache file, when
+        one is given, for the next processes that run the same command. Returns
+        the number of statements executed
+        '''
+        # The parser takes the end of the text for the ';' of the last statement,
+        # so an error there is reported where the text ends
+        if ast_cache is None:
+            return self.run_source(source)
+
+        from astcache import ASTCache
+        cache = ASTCache(ast_cache)
+        script: Optional[List[Stmt]] = cache.get(self.numbers, source)
+        if script is None:
+            errors: int = self.error_count
+            script = list(self.parse_reporting(self.scanner.tokenize(source)))
+            if self.error_count == errors:
+                cache.put(self.numbers, source, script)
+                cache.save()
+
+        script = self.prepare(script)
+        for stmt in script:
+            self.execute_reporting(stmt)
+        return len(script)
+
+    def run_stream(self, lines: Iterable[str]) -> int:
+        '''
+        Executes every statement as soon as it has been parsed, while the rest of
+        the input is still being read. Memory use doesn't grow with the input.
+        Returns the number of statements executed
+        '''
+        count: int = 0
+        for stmt in self.parse_reporting(self.scanner.tokenize_lines(lines)):
+            if self.optimizer is not None:
+                stmt = self.optimizer.optimize_stmt(stmt)
+            if self.resolver is not None:
+                stmt = self.resolve_reporting(stmt)
+                if stmt is None:
+                    continue
+            if self.eliminator is not None:
+                stmt = self.eliminator.eliminate_stmt(stmt)
+            self.execute_reporting(stmt)
+            count += 1
+        return count
+
+    def parse_reporting(self, tokens: Iterable[Token]) -> Iterator[Stmt]:
+        '''
+        Yields the statements that could be parsed, reporting the errors of the others
+        '''
+        self.parser.start(tokens)
+        while True:
+            try:
+                stmt: Optional[Stmt] = self.parser.parse_next()
+            except CalcError as error:
+                self.report(error)
+                continue
+            if stmt is None:
+                return
+            yield stmt
+
+    def resolve_reporting(self, stmt: Stmt) -> Optional[Stmt]:
+        '''
+        Returns the statement with its variables resolved, or reports its
+        undefined variables and returns None
+        '''
+        try:
+            return self.resolver.resolve_stmt(stmt)
+        except CalcError as error:
+            self.report(error)
+            return None
+
+    def execute_reporting(self, stmt: Stmt) -> None:
+        try:
+            self.execute([stmt])
+        except CalcError as error:
+            self.report(error)
+
+    def report(self, error: CalcError) -> None:
+        self.error_count += 1
+        print(error)
+
+    def save_snapshot(self, path: str, statements: bool = True) -> None:
+        '''
+        Saves the variables, and the scripts of the parse cache unless statements
+        is False, to a binary file that load_snapshot can restore quickly
+        '''
+        # Only snapshots need the binary format, so it is imported lazily
+        from snapshot import save_snapshot
+        save_snapshot(self, path, statements)
+
+    def load_snapshot(self, path: str) -> None:
+        '''
+        Replaces the variables with those of a snapshot, and caches its scripts
+        '''
+        from snapshot import load_snapshot
+        load_snapshot(self, path)
+
+    def evaluate_vectorized(self, expr: Union[str, Stmt, Expr], bindings: Dict[str, Any]) -> Tuple[Any, Any]:
+        '''
+        Evaluates an expression once for every row of the NumPy arrays in bindings.
+        The expression can also be given as source, or as the statement holding it.
+        Returns the array of values and a boolean array marking the rows that
+        divided by zero, whose values are nan
+        '''
+        # NumPy is only needed by this method, so it is imported lazily
+        from vectorized import VectorEvaluator
+
+        if self.numbers.name != 'float':
+            raise ValueError("Only float numbers can be evaluated in vectors")
+        return VectorEvaluator(bindings, self.environment).evaluate(self.expression(expr))
+
+    def bulk_evaluator(self, expr: Union[str, Stmt, Expr]) -> BulkEvaluator:
+        '''
+        Returns an evaluator of the expression for every row of a stream of
+        bindings, like the rows of a CSV file, on top of the current variables.
+        The expression is optimized first when the interpreter optimizes
+        '''
+        from bulk import BulkEvaluator
+
+        expr = self.expression(expr)
+        if self.optimizer is not None:
+            expr = self.optimizer.optimize_expr(expr)
+        return BulkEvaluator(expr, self.environment, self.numbers)
+
+    def expression(self, expr: Union[str, Stmt, Expr]) -> Expr:
+        '''
+        Returns the expression of the first statement of a source, or of a statement
+        '''
+        if isinstance(expr, str):
+            self.parser.start(self.scanner.tokenize(expr))
+            expr = self.parser.parse_next()
+            if expr is None:
+                raise ValueError("There is no statement to evaluate")
+        if isinstance(expr, Stmt):
+            if getattr(expr, 'expr', None) is None:
+                raise ValueError("The statement has no expression to evaluate")
+            expr = expr.expr
+        return expr
 
     def execute(self, script: List[Stmt]) -> None:
+        if self.numbers.context is not None:
+            # Decimals are computed with the precision of this interpreter
+            with self.numbers.scope():
+                self.execute_script(script)
+        else:
+            self.execute_script(script)
+
+    def execute_script(self, script: List[Stmt]) -> None:
+        if self.reactive is not None:
+            # Every statement records its formula right before it runs
+            if len(script) > 1:
+                for stmt in script:
+                    self.execute_script([stmt])
+                return
+            for stmt in script:
+                self.reactive.define(stmt)
+
+        if self.backend == 'vm':
+            for stmt in script:
+                self.vm.run(self.compiler.compile_once(stmt), self.environment)
+            return
+
+        if self.backend == 'closure':
+            for stmt in script:
+                self.closure_compiler.compile_stmt(stmt)(self.environment)
+            return
+
         for stmt in script:
+            if self.code_generator is not None:
+                run: Optional[Callable[[dict], bool]] = self.code_generator.lookup(stmt)
+                if run is not None and run(self.environment):
+                    continue
+
             if isinstance(stmt, ExprStmt):
                 value = stmt.accept(self)
                 print(value)
             else:
                 stmt.accept(self)
 
-    def execute_logical_expr(self, expr: LogicalExpr) -> float:
-        l: float = expr.left.accept(self)
-        r: float = expr.right.accept(self)
+    def execute_memo_expr(self, expr: MemoExpr) -> float:
+        # Formulas recomputed by the reactive environment open their memo while
+        # another one is in use
+        memo: List[Optional[float]] = self.memo
+        self.memo = [None] * expr.size
+        try:
+            return expr.expr.accept(self)
+        finally:
+            self.memo = memo
 
-        if expr.operator == 'and':
-            return float(l and r)
-        
-        return float(l or r)
+    def execute_common_expr(self, expr: CommonExpr) -> float:
+        value: Optional[float] = self.memo[expr.slot]
+        if value is None:
+            value = self.memo[expr.slot] = expr.expr.accept(self)
+        else:
+            self.saved_evaluations += 1
+        return value
+
+    def left_operand(self, left: BinaryExpr) -> float:
+        '''
+        Evaluates a binary expression that is the left operand of another one.
+        Its left spine is evaluated with a loop, from the bottom up, so that a
+        long operator chain doesn't nest a call per operator
+        '''
+        e: Expr = left.left
+        if not isinstance(e, BinaryExpr):
+            return left.apply(self, e.accept(self))
+        spine: List[BinaryExpr] = [left]
+        while isinstance(e, BinaryExpr):
+            spine.append(e)
+            e = e.left
+        value: float = e.accept(self)
+        pop = spine.pop
+        while spine:
+            value = pop().apply(self, value)
+        return value
+
+    def execute_logical_expr(self, expr: LogicalExpr, l: float) -> float:
+        # The right operand is only evaluated when the left one doesn't decide the result
+        if expr.operator == AND:
+            if not l:
+                return self.number(l)
+        elif l:
+            return self.number(l)
+
+        return self.number(expr.right.accept(self))
     
-    def execute_equality_expr(self, expr: EqualityExpr) -> float:
-        l: float = expr.left.accept(self)
+    def execute_equality_expr(self, expr: EqualityExpr, l: float) -> float:
         r: float = expr.right.accept(self)
 
-        if expr.operator == '==':
-            return float(l == r)
+        if expr.operator == EQ:
+            return self.number(l == r)
         
-        return float(l != r)
+        return self.number(l != r)
     
-    def execute_relational_expr(self, expr: RelationalExpr) -> float:
-        l: float = expr.left.accept(self)
+    def execute_relational_expr(self, expr: RelationalExpr, l: float) -> float:
         r: float = expr.right.accept(self)
 
-        if expr.operator == '<':
-            return float(l < r)
-        elif expr.operator == '<=':
-            return float(l <= r)
-        elif expr.operator == '>':
-            return float(l > r)
+        if expr.operator == LT:
+            return self.number(l < r)
+        elif expr.operator == LE:
+            return self.number(l <= r)
+        elif expr.operator == GT:
+            return self.number(l > r)
         else:
-            return float(l >= r)
+            return self.number(l >= r)
         
-    def execute_add_expr(self, expr: AddExpr) -> float:
-        l: float = expr.left.accept(self)
+    def execute_add_expr(self, expr: AddExpr, l: float) -> float:
         r: float = expr.right.accept(self)
 
-        if expr.operator == '+':
+        if expr.operator == ADD:
             return l + r
         else:
             return l - r
         
-    def execute_modulus_expr(self, expr: ModulusExpr) -> float:
-        l: float = expr.left.accept(self)
+    def execute_modulus_expr(self, expr: ModulusExpr, l: float) -> float:
         r: float = expr.right.accept(self)
 
-        return int(l) % int(r)
+        try:
+            return int(l) % int(r)
+        except ZeroDivisionError:
+            raise MathError("Modulus by Zero", expr.position) from None
+        except (ValueError, OverflowError):
+            raise MathError(f"Can't take the modulus of {l} and {r}", expr.position) from None
     
-    def execute_mul_expr(self, expr: MulExpr) -> float:
-        l: float = expr.left.accept(self)
+    def execute_mul_expr(self, expr: MulExpr, l: float) -> float:
         r: float = expr.right.accept(self)
 
-        if expr.operator == '*':
+        if expr.operator == MUL:
             return l * r
         elif r == 0:
-            print("Error: Division by Zero")
-            sys.exit()
+            raise MathError("Division by Zero", expr.position)
         else:
             return l / r
         
@@ -92,10 +462,10 @@ class Interpreter:
     
     def execute_not_expr(self, expr: NotExpr) -> float:
         value: float = not expr.expr.accept(self)
-        return float(value)
+        return self.number(value)
 
     def execute_number_node(self, n: NumberNode) -> float:
         return n.value
     
     def execute_bool_node(self, b: BooleanNode) -> float:
-        return float(b.value)
\ No newline at end of file
+        return self.number(b.value)
\ No newline at end of file
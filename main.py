@@ -1,4 +1,254 @@
-from interpreter import *
+from __future__ import annotations
+import os
+import sys
+import time
+from interpreter import Interpreter
+from numeric import modes
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import argparse
+    from typing import Dict, List, Optional, Tuple
 
-i = Interpreter()
-i.run()
\ No newline at end of file
+
+def main() -> None:
+    # A lone command, like those of the processes started to evaluate a single
+    # expression, runs without argparse and what the other modes import
+    command: Optional[Tuple[str, Optional[str]]] = one_shot(sys.argv[1:])
+    if command is not None:
+        i = Interpreter()
+        i.run_command(*command)
+        if i.error_count > 0:
+            sys.exit(1)
+        return
+
+    import argparse
+    arg_parser = argparse.ArgumentParser(description='A simple calculator language')
+    arg_parser.add_argument('files', nargs='*', metavar='file',
+                            help="script to run, use '-' to read from stdin. Several scripts are run in parallel")
+    arg_parser.add_argument('-c', dest='command', metavar='EXPR',
+                            help="run the statements, or print the value of the expression, given as argument and exit")
+    arg_parser.add_argument('--ast-cache', metavar='PATH',
+                            help='keep the statements parsed from -c in a file, for the next runs of the same command')
+    arg_parser.add_argument('--over', metavar='CSV',
+                            help="print the value of the expression of -c for every row of a CSV file whose header "
+                                 "names the variables, '-' reads stdin")
+    arg_parser.add_argument('--stats', action='store_true',
+                            help='report statements per second on stderr after a batch run')
+    arg_parser.add_argument('--backend', choices=Interpreter.backends, default='tree',
+                            help='walk the AST, compile it to bytecode for the VM or compile it to closures')
+    arg_parser.add_argument('--optimize', action='store_true',
+                            help='fold constants and simplify expressions before running them')
+    arg_parser.add_argument('--cache-size', type=int, default=256,
+                            help='number of parsed REPL lines to keep, 0 disables the cache')
+    arg_parser.add_argument('--hot-threshold', type=int, default=0,
+                            help='compile a statement to Python code after the tree walker ran it this many times, 0 never does')
+    arg_parser.add_argument('--resolve', action='store_true',
+                            help='resolve variables to slots and report undefined ones before running a statement')
+    arg_parser.add_argument('--jobs', type=int, default=None,
+                            help='number of worker processes for several scripts, defaults to the number of cores')
+    arg_parser.add_argument('--incremental', action='store_true',
+                            help='only parse the statements that changed when a source is run again')
+    arg_parser.add_argument('--reactive', action='store_true',
+                            help='keep the formulas of let declarations and recompute them when the variables they read change')
+    arg_parser.add_argument('--cse', action='store_true',
+                            help='evaluate the subexpressions repeated in a statement once, only with the tree walker')
+    arg_parser.add_argument('--numbers', choices=modes, default='float',
+                            help='compute with floats, exact decimals or exact fractions')
+    arg_parser.add_argument('--precision', type=int, default=28,
+                            help='significant digits of the decimal numbers')
+    arg_parser.add_argument('--profile', action='store_true',
+                            help='report on stderr the time spent scanning, parsing, executing and in every node type')
+    arg_parser.add_argument('--profile-json', metavar='PATH',
+                            help='profile the run and write the profile as JSON to a file')
+    arg_parser.add_argument('--snapshot', metavar='PATH',
+                            help='start from the variables and cached scripts saved in a snapshot, and save them there at exit')
+    arg_parser.add_argument('--serve', metavar='ADDRESS',
+                            help='serve sessions on host:port, or on a Unix socket when given a path')
+    args = arg_parser.parse_args()
+    if args.command is not None and args.files:
+        arg_parser.error("-c can't be given with scripts")
+    if args.ast_cache is not None and args.command is None:
+        arg_parser.error("--ast-cache only keeps the statements of -c")
+    if args.over is not None and (args.command is None or args.ast_cache is not None):
+        arg_parser.error("--over evaluates the expression of -c, without --ast-cache")
+
+    if args.serve is not None:
+        serve(args)
+        return
+
+    if len(args.files) > 1 or args.jobs is not None:
+        # The workers keep no state between scripts and have nothing to report
+        for flag, given in (('--reactive', args.reactive), ('--incremental', args.incremental),
+                            ('--profile', args.profile), ('--profile-json', args.profile_json is not None),
+                            ('--snapshot', args.snapshot is not None)):
+            if given:
+                arg_parser.error(f"{flag} can't be used with several scripts or --jobs")
+        run_parallel(args)
+        return
+
+    i = Interpreter(args.backend, args.optimize, args.cache_size, args.hot_threshold, args.resolve, args.incremental,
+                    args.reactive, args.profile or args.profile_json is not None, args.numbers, args.precision,
+                    args.cse)
+    if args.snapshot is not None and os.path.exists(args.snapshot):
+        try:
+            i.load_snapshot(args.snapshot)
+        except ValueError as error:
+            sys.exit(f"Can't load {args.snapshot}: {error}")
+
+    if args.over is not None:
+        run_over(i, args)
+        return
+
+    if args.command is not None:
+        i.run_command(args.command, args.ast_cache)
+        report_profile(i, args)
+        if args.snapshot is not None:
+            i.save_snapshot(args.snapshot)
+        if i.error_count > 0:
+            sys.exit(1)
+        return
+
+    # Without a file and with an interactive terminal, start the REPL
+    file: Optional[str] = args.files[0] if args.files else None
+    if file is None and sys.stdin.isatty():
+        i.run()
+        report_profile(i, args)
+        if args.snapshot is not None:
+            i.save_snapshot(args.snapshot)
+        return
+
+    # Statements are executed while the rest of the input is still being read
+    start: float = time.perf_counter()
+    if file is None or file == '-':
+        count: int = i.run_stream(sys.stdin)
+    else:
+        try:
+            with open(file) as f:
+                count = i.run_stream(f)
+        except OSError as error:
+            sys.exit(f"Can't read {file}: {error.strerror}")
+    elapsed: float = time.perf_counter() - start
+
+    if args.stats:
+        rate: float = count / elapsed if elapsed > 0 else float('inf')
+        print(f"{count} statements in {elapsed:.3f}s ({rate:.0f} stmts/s)", file=sys.stderr)
+        if i.optimizer is not None:
+            print(f"optimizer removed {i.optimizer.removed} nodes", file=sys.stderr)
+        if i.reactive is not None:
+            print(f"reactive: {i.reactive.report()}", file=sys.stderr)
+        if i.eliminator is not None:
+            print(f"cse shared {i.eliminator.shared} subexpressions, {i.eliminator.copies} copies, "
+                  f"saving {i.saved_evaluations} evaluations", file=sys.stderr)
+    report_profile(i, args)
+    if args.snapshot is not None:
+        i.save_snapshot(args.snapshot)
+
+    if i.error_count > 0:
+        sys.exit(1)
+
+
+def one_shot(arguments: List[str]) -> Optional[Tuple[str, Optional[str]]]:
+    '''
+    Returns the command and the AST cache of arguments made only of -c and
+    --ast-cache, or None when argparse has to read them
+    '''
+    options: Dict[str, str] = {}
+    if len(arguments) % 2 != 0:
+        return None
+    for n in range(0, len(arguments), 2):
+        if arguments[n] not in ('-c', '--ast-cache') or arguments[n] in options:
+            return None
+        options[arguments[n]] = arguments[n + 1]
+    if '-c' not in options:
+        return None
+    return options['-c'], options.get('--ast-cache')
+
+
+def run_over(i: Interpreter, args: argparse.Namespace) -> None:
+    '''
+    Prints the value of the expression of -c for every row of a CSV file, in
+    chunks of lines, while the rest of the file is still being read
+    '''
+    from errors import CalcError
+    from bulk import write_results
+
+    try:
+        evaluator = i.bulk_evaluator(args.command)
+    except CalcError as error:
+        i.report(error)
+        sys.exit(1)
+
+    start: float = time.perf_counter()
+    if args.over == '-':
+        count: int = write_results(evaluator.results_csv(sys.stdin), sys.stdout)
+    else:
+        with open(args.over, newline='') as f:
+            count = write_results(evaluator.results_csv(f), sys.stdout)
+    elapsed: float = time.perf_counter() - start
+
+    if args.stats:
+        rate: float = count / elapsed if elapsed > 0 else float('inf')
+        print(f"{count} rows in {elapsed:.3f}s ({rate:.0f} rows/s), {evaluator.errors} errors", file=sys.stderr)
+    if evaluator.errors > 0:
+        sys.exit(1)
+
+
+def report_profile(i: Interpreter, args: argparse.Namespace) -> None:
+    if i.profiler is None:
+        return
+    if args.profile_json is not None:
+        with open(args.profile_json, 'w') as f:
+            f.write(i.profiler.to_json())
+    if args.profile:
+        print(i.profiler.report(), file=sys.stderr)
+
+
+def run_parallel(args: argparse.Namespace) -> None:
+    '''
+    Runs every script in its own environment on a pool of processes, and prints
+    their outputs in the order of the scripts
+    '''
+    # Only the parallel mode needs the process pool
+    from parallel import ParallelRunner
+
+    if '-' in args.files:
+        sys.exit("stdin can't be read in parallel, give the scripts as files")
+
+    start: float = time.perf_counter()
+    with ParallelRunner(args.jobs, backend=args.backend, optimize=args.optimize, cache_size=args.cache_size,
+                        hot_threshold=args.hot_threshold, resolve=args.resolve, numbers=args.numbers,
+                        precision=args.precision, cse=args.cse) as runner:
+        results = runner.run_files(args.files)
+    elapsed: float = time.perf_counter() - start
+
+    for result in results:
+        sys.stdout.write(result.output)
+
+    if args.stats:
+        count: int = sum(result.statements for result in results)
+        rate: float = count / elapsed if elapsed > 0 else float('inf')
+        print(f"{len(results)} scripts, {count} statements in {elapsed:.3f}s ({rate:.0f} stmts/s) "
+              f"on {runner.workers} workers", file=sys.stderr)
+        for stats in runner.stats.values():
+            print(stats, file=sys.stderr)
+
+    if any(result.error_count > 0 for result in results):
+        sys.exit(1)
+
+
+def serve(args: argparse.Namespace) -> None:
+    # Only the server needs asyncio
+    import asyncio
+    from server import CalcServer
+
+    server = CalcServer(backend=args.backend, optimize=args.optimize, cache_size=args.cache_size,
+                        hot_threshold=args.hot_threshold, resolve=args.resolve, incremental=args.incremental,
+                        reactive=args.reactive, numbers=args.numbers, precision=args.precision, cse=args.cse)
+    try:
+        asyncio.run(server.serve_forever(args.serve))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+# decimal and fractions are only imported by the modes that use them
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from decimal import Context
+    from typing import Any, Callable, ContextManager, Optional
+
+
+class NumericMode:
+    '''
+    How an Interpreter represents numbers. The number type is used to convert
+    the literals once, when they are scanned, and the results of comparisons,
+    'not', 'and' and 'or', where the float mode calls float(). The arithmetic
+    itself is done by Python's operators on whatever type the numbers have, so
+    the float mode runs exactly the same code as before there were modes.
+
+    '%' produces ints in every mode, which mix with every number type
+    '''
+    def __init__(self, name: str, number: Callable[[Any], Any], context: Optional[Context] = None):
+        self.name: str = name
+        self.number: Callable[[Any], Any] = number
+        # The precision and rounding of the decimal mode
+        self.context: Optional[Context] = context
+
+    def __repr__(self) -> str:
+        if self.context is not None:
+            return f"NumericMode({self.name!r}, precision={self.context.prec})"
+        return f"NumericMode({self.name!r})"
+
+    def scope(self) -> ContextManager:
+        '''
+        Applies the decimal context while the numbers are computed
+        '''
+        if self.context is not None:
+            from decimal import localcontext
+            return localcontext(self.context)
+        import contextlib
+        return contextlib.nullcontext()
+
+
+FLOAT: NumericMode = NumericMode('float', float)
+
+# The names of the modes, float being the fastest
+modes = ('float', 'decimal', 'fraction')
+
+
+def numeric_mode(name: str, precision: int = 28) -> NumericMode:
+    '''
+    Returns the mode with a name of modes. The precision is the number of
+    significant digits kept by the decimal mode
+    '''
+    if name == 'float':
+        return FLOAT
+    elif name == 'decimal':
+        if precision < 1:
+            raise ValueError("The precision must be at least 1")
+        # Nothing is trapped, so overflows and invalid operations give
+        # infinities and NaNs, as they do with floats. The literals are rounded
+        # to the precision too, like the results of the operators
+        from decimal import Context
+        context: Context = Context(prec=precision, traps=[])
+        return NumericMode('decimal', context.create_decimal, context)
+    elif name == 'fraction':
+        from fractions import Fraction
+        return NumericMode('fraction', Fraction)
+    raise ValueError(f"Unknown numeric mode '{name}'")
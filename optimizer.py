@@ -0,0 +1,153 @@
+from __future__ import annotations
+from typing import Any, Callable, List
+from AST import *
+from vm import make_binary_functions
+from numeric import FLOAT, NumericMode
+from errors import CalcError
+
+
+class Optimizer:
+    '''
+    Folds constant subtrees into literals and applies algebraic identities
+    that can't change the result of the program:
+
+        x * 1, 1 * x, x / 1, x - 0  ->  x, if x is known to be a float
+        -(-x)                       ->  x
+        not not x                   ->  x, if x is already 0.0 or 1.0
+
+    '%' produces ints, and multiplying them by 1 turns them into floats, so
+    the first rule only applies when x can't be an int. x + 0 is left alone
+    because it turns -0.0 into 0.0. Operations that fail at runtime, like
+    division by zero, are not folded so that the error is still raised when
+    the statement is executed.
+
+    Constants are folded with the numbers, and the precision, of the interpreter
+    '''
+    def __init__(self, numbers: NumericMode = FLOAT):
+        self.numbers: NumericMode = numbers
+        self.number: Callable[[Any], Any] = numbers.number
+        self.functions: List[Callable] = make_binary_functions(numbers.number)
+        # The number of nodes removed from the trees optimized so far
+        self.removed: int = 0
+
+    def optimize(self, script: List[Stmt]) -> List[Stmt]:
+        return [self.optimize_stmt(stmt) for stmt in script]
+
+    def optimize_stmt(self, stmt: Stmt) -> Stmt:
+        if isinstance(stmt, LetDecl):
+            if stmt.expr is None:
+                return stmt
+            return LetDecl(stmt.name, self.optimize_expr(stmt.expr))
+
+        elif isinstance(stmt, PrintStmt):
+            return PrintStmt(self.optimize_expr(stmt.expr))
+
+        elif isinstance(stmt, ExprStmt):
+            return ExprStmt(self.optimize_expr(stmt.expr))
+
+        return stmt
+
+    def optimize_expr(self, expr: Expr) -> Expr:
+        if isinstance(expr, BinaryExpr):
+            return self.optimize_binary_expr(expr)
+
+        elif isinstance(expr, NegateExpr):
+            e: Expr = self.optimize_expr(expr.expr)
+            if is_constant(e):
+                self.removed += 1
+                with self.numbers.scope():
+                    return NumberNode(-1 * self.constant_value(e))
+            if isinstance(e, NegateExpr):
+                self.removed += 2
+                return e.expr
+            return NegateExpr(e)
+
+        elif isinstance(expr, NotExpr):
+            e = self.optimize_expr(expr.expr)
+            if is_constant(e):
+                self.removed += 1
+                return NumberNode(self.number(not self.constant_value(e)))
+            if isinstance(e, NotExpr) and is_boolean(e.expr):
+                self.removed += 2
+                return e.expr
+            return NotExpr(e)
+
+        elif isinstance(expr, Assignment):
+            return Assignment(expr.word, self.optimize_expr(expr.expr), expr.line, expr.column)
+
+        return expr
+
+    def optimize_binary_expr(self, expr: BinaryExpr) -> Expr:
+        spine: List[BinaryExpr] = left_spine(expr)
+        left: Expr = self.optimize_expr(spine[-1].left)
+        for e in reversed(spine):
+            left = self.optimize_operation(e, left, self.optimize_expr(e.right))
+        return left
+
+    def optimize_operation(self, expr: BinaryExpr, left: Expr, right: Expr) -> Expr:
+        '''
+        Simplifies a binary expression given its optimized operands
+        '''
+        operator: int = expr.operator
+
+        if is_constant(left) and is_constant(right):
+            try:
+                with self.numbers.scope():
+                    value: float = self.functions[operator](self.constant_value(left), self.constant_value(right))
+                self.removed += 2
+                return NumberNode(value)
+            except CalcError:
+                # Leave it to the runtime to report the error
+                pass
+
+        if is_constant(right) and is_float(left):
+            r: float = self.constant_value(right)
+            if (operator in (MUL, DIV) and r == 1) or (operator == SUB and r == 0):
+                self.removed += 2
+                return left
+        if is_constant(left) and is_float(right) and operator == MUL and self.constant_value(left) == 1:
+            self.removed += 2
+            return right
+
+        return make_binary_expr(left, operator, right, expr.line, expr.column)
+
+    def constant_value(self, expr: Expr) -> float:
+        if isinstance(expr, BooleanNode):
+            return self.number(expr.value)
+        return expr.value
+
+
+def is_constant(expr: Expr) -> bool:
+    return isinstance(expr, (NumberNode, BooleanNode))
+
+def is_boolean(expr: Expr) -> bool:
+    '''
+    Checks if an expression always evaluates to either 0.0 or 1.0. 'and' and
+    'or' evaluate to the operand that decides them, so they don't qualify
+    '''
+    return isinstance(expr, (EqualityExpr, RelationalExpr, NotExpr, BooleanNode))
+
+def is_float(expr: Expr) -> bool:
+    '''
+    Checks if an expression always evaluates to a float. Variables
+    can hold the ints produced by '%', so they don't qualify
+    '''
+    # The left operands of a chain are checked with a loop
+    while True:
+        if isinstance(expr, NumberNode):
+            return isinstance(expr.value, float)
+        elif is_boolean(expr):
+            return True
+        elif isinstance(expr, LogicalExpr):
+            # The operand that decides them is turned into a number
+            return True
+        elif isinstance(expr, MulExpr) and expr.operator == DIV:
+            return True
+        elif isinstance(expr, (AddExpr, MulExpr)):
+            if is_float(expr.right):
+                return True
+            expr = expr.left
+        elif isinstance(expr, NegateExpr):
+            expr = expr.expr
+        else:
+            return False
@@ -0,0 +1,142 @@
+from __future__ import annotations
+import io
+import os
+import time
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from interpreter import Interpreter
+from numeric import numeric_mode
+
+# A script to run, either its source or the path of its file
+Job = Tuple[str, bool]
+
+# The warm Interpreter of a worker process, built once by start_worker
+worker: Optional[Interpreter] = None
+
+
+class ScriptResult:
+    '''
+    What a script printed, errors included, and how it went
+    '''
+    __slots__ = ('output', 'statements', 'error_count')
+
+    def __init__(self, output: str, statements: int, error_count: int):
+        self.output: str = output
+        self.statements: int = statements
+        self.error_count: int = error_count
+
+    def __repr__(self) -> str:
+        return f"ScriptResult({self.statements} statements, {self.error_count} errors)"
+
+
+class WorkerStats:
+    '''
+    The work done by one worker process
+    '''
+    __slots__ = ('pid', 'batches', 'scripts', 'statements', 'errors', 'busy')
+
+    def __init__(self, pid: int):
+        self.pid: int = pid
+        self.batches: int = 0
+        self.scripts: int = 0
+        self.statements: int = 0
+        self.errors: int = 0
+        # Seconds spent running scripts, without the time waiting for batches
+        self.busy: float = 0.0
+
+    def __str__(self) -> str:
+        return (f"worker {self.pid}: {self.batches} batches, {self.scripts} scripts, "
+                f"{self.statements} statements, {self.errors} errors, {self.busy:.3f}s busy")
+
+
+def start_worker(backend: str, optimize: bool, cache_size: int, hot_threshold: int, resolve: bool,
+                 numbers: str, precision: int, cse: bool) -> None:
+    global worker
+    worker = Interpreter(backend, optimize, cache_size, hot_threshold, resolve, numbers=numbers, precision=precision,
+                         cse=cse)
+
+def run_batch(jobs: List[Job]) -> Tuple[int, float, List[ScriptResult]]:
+    '''
+    Runs a batch of scripts in a worker, each one in an empty environment.
+    Returns the pid of the worker, the time it took and the results in order
+    '''
+    start: float = time.perf_counter()
+    results: List[ScriptResult] = []
+    for script, is_file in jobs:
+        worker.reset()
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            if is_file:
+                # A file that can't be read is an error of its script alone
+                try:
+                    with open(script) as f:
+                        statements: int = worker.run_stream(f)
+                except OSError as error:
+                    print(f"Can't read {script}: {error.strerror}")
+                    worker.error_count += 1
+                    statements = 0
+            else:
+                statements = worker.run_source(script)
+        results.append(ScriptResult(output.getvalue(), statements, worker.error_count))
+    return os.getpid(), time.perf_counter() - start, results
+
+
+class ParallelRunner:
+    '''
+    Runs independent scripts on several cores. The scripts are sent in batches
+    to a pool of worker processes, each with an Interpreter that is built once
+    and reused, and their results come back in the order of the scripts.
+
+    Scripts don't share variables, every one of them starts with an empty
+    environment. The Interpreter options are those of Interpreter itself
+    '''
+    def __init__(self, workers: Optional[int] = None, batch_size: int = 16, backend: str = 'tree',
+                 optimize: bool = False, cache_size: int = 0, hot_threshold: int = 0, resolve: bool = False,
+                 numbers: str = 'float', precision: int = 28, cse: bool = False):
+        if batch_size < 1:
+            raise ValueError("The size of a batch must be at least 1")
+        if backend not in Interpreter.backends:
+            raise ValueError(f"Unknown backend '{backend}'")
+        if cse and backend != 'tree':
+            raise ValueError("Only the tree walker shares common subexpressions")
+        # Fails here rather than in every worker
+        numeric_mode(numbers, precision)
+        self.workers: int = workers if workers is not None else (os.cpu_count() or 1)
+        self.batch_size: int = batch_size
+        self.pool: ProcessPoolExecutor = ProcessPoolExecutor(
+            self.workers, initializer=start_worker,
+            initargs=(backend, optimize, cache_size, hot_threshold, resolve, numbers, precision, cse))
+        # Statistics of every worker process, by pid
+        self.stats: Dict[int, WorkerStats] = {}
+
+    def __enter__(self) -> ParallelRunner:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.pool.shutdown()
+
+    def run_sources(self, sources: Iterable[str]) -> List[ScriptResult]:
+        return self.run([(source, False) for source in sources])
+
+    def run_files(self, paths: Iterable[str]) -> List[ScriptResult]:
+        '''
+        Runs script files, which are read by the workers themselves
+        '''
+        return self.run([(path, True) for path in paths])
+
+    def run(self, jobs: List[Job]) -> List[ScriptResult]:
+        batches: List[List[Job]] = [jobs[i:i + self.batch_size] for i in range(0, len(jobs), self.batch_size)]
+        results: List[ScriptResult] = []
+        for pid, busy, batch in self.pool.map(run_batch, batches):
+            stats: WorkerStats = self.stats.setdefault(pid, WorkerStats(pid))
+            stats.batches += 1
+            stats.scripts += len(batch)
+            stats.statements += sum(result.statements for result in batch)
+            stats.errors += sum(result.error_count for result in batch)
+            stats.busy += busy
+            results.extend(batch)
+        return results
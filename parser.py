@@ -1,35 +1,102 @@
 from __future__ import annotations
-import sys
-from typing import List
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from scanner import *
 from AST import *
+from errors import CalcError, ParseError
 # from interpreter import Interpreter
 
 class Parser:
+    # Precedence of the binary operators, higher binds tighter
+    precedence: Dict[str, int] = {
+        'and': 1, 'or': 1,
+        '==': 2, '!=': 2,
+        '<': 3, '<=': 3, '>': 3, '>=': 3,
+        '+': 4, '-': 4,
+        '%': 5,
+        '*': 6, '/': 6,
+    }
+
     def __init__(self):
         self.script: List[Stmt] = []
-        self.index: int = 0
-        self.tokens: List[Token] = []
-
-    @property
-    def current_token(self) -> Token:
-        return self.tokens[self.index]
+        # Tokens are pulled from the stream one at a time, the only lookahead
+        # the grammar needs is the current token
+        self.tokens: Iterator[Token] = iter(())
+        self.current_token: Token = EOFToken()
 
     @property
     def end_of_tokens(self) -> bool:
         return isinstance(self.current_token, EOFToken)
 
-    def move_pointer(self) -> None:
-        self.index += 1
+    @property
+    def position(self) -> Optional[Tuple[int, int]]:
+        token: Token = self.current_token
+        return (token.line, token.column) if hasattr(token, 'line') else None
 
-    def parse(self, tokens: List[Token]):
+    def error(self, message: str) -> ParseError:
+        return ParseError(message, self.position)
+
+    def move_pointer(self) -> None:
+        # Stay on the EOFToken once the stream is exhausted
+        token: Optional[Token] = next(self.tokens, None)
+        self.current_token = token if token is not None else EOFToken()
+        if isinstance(token, ErrorToken):
+            raise token.error
+
+    def synchronize(self) -> None:
+        '''
+        Skips the rest of a declaration that has an error, up to its ';'
+        '''
+        while not isinstance(self.current_token, (Semicolon, EOFToken)):
+            token: Optional[Token] = next(self.tokens, None)
+            self.current_token = token if token is not None else EOFToken()
+
+    def parse(self, tokens: Iterable[Token]) -> None:
+        self.script = list(self.parse_stream(tokens))
+
+    def parse_stream(self, tokens: Iterable[Token]) -> Iterator[Stmt]:
+        '''
+        Lazily parses a stream of tokens, yielding each declaration as soon as
+        its terminating ';' has been read
+        '''
+        self.start(tokens)
+        stmt: Optional[Stmt] = self.parse_next()
+        while stmt is not None:
+            yield stmt
+            stmt = self.parse_next()
+
+    def start(self, tokens: Iterable[Token]) -> None:
         # Initialize the state of the parser
-        self.tokens = tokens
-        self.index = 0
-        self.script = []
+        self.tokens = iter(tokens)
+        # The first token is only read here, if it is an error parse_next raises it
+        token: Optional[Token] = next(self.tokens, None)
+        self.current_token = token if token is not None else EOFToken()
+
+    def parse_next(self) -> Optional[Stmt]:
+        '''
+        Parses the next declaration, or returns None at the end of the tokens.
+        When a declaration has an error the parser skips to its ';' before raising
+        it, so that parsing can go on with the next declaration
+        '''
+        try:
+            if isinstance(self.current_token, ErrorToken):
+                raise self.current_token.error
+            # Skip empty statements
+            while isinstance(self.current_token, Semicolon):
+                self.move_pointer()
+            if self.end_of_tokens:
+                return None
+
+            stmt: Stmt = self.parse_decl()
 
-        if not self.end_of_tokens:
-            self.script.append(self.parse_decl())
+            # Declarations are separated by ';', the last one may omit it
+            if not isinstance(self.current_token, Semicolon) and not self.end_of_tokens:
+                raise self.error(f"Expected a ; before {self.current_token}")
+            return stmt
+        except CalcError:
+            self.synchronize()
+            raise
 
     def parse_decl(self) -> Stmt:
         if isinstance(self.current_token, Identifier):
@@ -55,8 +122,7 @@ class Parser:
         if isinstance(self.current_token, Identifier):
             name = self.current_token.word
         else:
-            print("Syntax Error: Expected a variable name after 'let'")
-            sys.exit()
+            raise self.error("Expected a variable name after 'let'")
         
         self.move_pointer()
         if (not self.end_of_tokens) and isinstance(self.current_token, AssignmentOP):
@@ -67,80 +133,42 @@ class Parser:
         return LetDecl(name, None)
 
     def parse_assignment(self) -> Expr:
-        lvalue: Expr = self.parse_logical_expr()
+        lvalue: Expr = self.parse_binary_expr()
 
         if (not self.end_of_tokens) and isinstance(self.current_token, AssignmentOP) and isinstance(lvalue, IdentifierNode):
             self.move_pointer()
-            rvalue: Expr = self.parse_logical_expr()
-            return Assignment(lvalue.word, rvalue)
+            rvalue: Expr = self.parse_binary_expr()
+            return Assignment(lvalue.word, rvalue, lvalue.line, lvalue.column)
         
         return lvalue
     
-    def parse_logical_expr(self) -> Expr:
-        left: Expr = self.parse_equality_expr()
-
-        if (not self.end_of_tokens) and isinstance(self.current_token, LogicalOP):
-            operator: str = self.current_token.op
-            self.move_pointer()
-            right: Expr = self.parse_logical_expr()
-            return LogicalExpr(left, operator, right)
-        
-        return left
-    
-    def parse_equality_expr(self) -> Expr:
-        left: Expr = self.parse_relational_expr()
-
-        if (not self.end_of_tokens) and isinstance(self.current_token, EqualityOP):
-            operator: str = self.current_token.op
-            self.move_pointer()
-            right: Expr = self.parse_equality_expr()
-            return EqualityExpr(left, operator, right)
-        
-        return left
-    
-    def parse_relational_expr(self) -> Expr:
-        left: Expr = self.parse_add_expr()
+    def binary_operator(self) -> Optional[str]:
+        '''
+        Returns the binary operator at the current token, if there is one
+        '''
+        token: Token = self.current_token
+        if isinstance(token, Operator):
+            return token.op
+        return None
+
+    def parse_binary_expr(self, min_precedence: int = 1) -> Expr:
+        '''
+        Parses binary operators by precedence climbing. Chains of operators of the
+        same precedence are consumed by the loop, so they associate to the left and
+        the recursion is never deeper than the number of precedence levels
+        '''
+        left: Expr = self.parse_unary_expr()
 
-        if (not self.end_of_tokens) and isinstance(self.current_token, RelationalOP):
-            operator: str = self.current_token.op
-            self.move_pointer()
-            right: Expr = self.parse_relational_expr()
-            return RelationalExpr(left, operator, right)
-        
-        return left
-    
-    def parse_add_expr(self) -> Expr:
-        left: Expr = self.parse_modulo_expr()
+        while True:
+            operator: Optional[str] = self.binary_operator()
+            if operator is None or Parser.precedence[operator] < min_precedence:
+                return left
 
-        if (not self.end_of_tokens) and isinstance(self.current_token, MathOP) and self.current_token.op in '+-':
-            operator: str = self.current_token.op
+            token: Token = self.current_token
             self.move_pointer()
-            right: Expr = self.parse_add_expr()
-            return AddExpr(left, operator, right)
-        
-        return left
-    
-    def parse_modulo_expr(self) -> Expr:
-        left: Expr = self.parse_mul_expr()
+            right: Expr = self.parse_binary_expr(Parser.precedence[operator] + 1)
+            left = make_binary_expr(left, OPERATOR_CODES[operator], right, token.line, token.column)
 
-        if (not self.end_of_tokens) and isinstance(self.current_token, MathOP) and self.current_token.op == '%':
-            self.move_pointer()
-            right: Expr = self.parse_modulo_expr()
-            return ModulusExpr(left, right)
-        
-        return left
-    
-    def parse_mul_expr(self) -> Expr:
-        left: Expr = self.parse_unary_expr()
-
-        if (not self.end_of_tokens) and isinstance(self.current_token, MathOP) and self.current_token.op in '*/':
-            operator: str = self.current_token.op
-            self.move_pointer()
-            right: Expr = self.parse_mul_expr()
-            return MulExpr(left, operator, right)
-        
-        return left
-    
     def parse_unary_expr(self) -> Expr:
         if isinstance(self.current_token, NotOP):
             self.move_pointer()
@@ -150,33 +178,21 @@ class Parser:
         elif isinstance(self.current_token, MathOP):
             if self.current_token.op == '-':
                 self.move_pointer()
-                try:
-                    expr: Expr = self.parse_unary_expr()
-                    return NegateExpr(expr)
-                except:
-                    print("Syntax Error: Expected an expression after -")
-                    sys.exit()
-                
-            
+                expr: Expr = self.parse_unary_expr()
+                return NegateExpr(expr)
+
             elif self.current_token.op == '+':
                 self.move_pointer()
-                try:
-                    e2: Expr = self.parse_unary_expr()
-                    return e2
-                except:
-                    print("Syntax Error: Expected an expression after +")
-                    sys.exit()
+                e2: Expr = self.parse_unary_expr()
+                return e2
             else:
-                print(f"Synatx Error: Can't use {self.current_token.op} as a unary operator")
-                sys.exit()
+                raise self.error(f"Can't use {self.current_token.op} as a unary operator")
 
         return self.parse_primary_expr()
     
     def parse_primary_expr(self) -> Expr:
-        # If there is no token to work with return 0
         if (self.end_of_tokens):
-            print("Syntax Error in parsing primary expressions")
-            sys.exit()
+            raise self.error("Expected an expression")
 
         elif isinstance(self.current_token, NumberToken):
             n: NumberNode = NumberNode(self.current_token.value)
@@ -184,7 +200,8 @@ class Parser:
             return n
         
         elif isinstance(self.current_token, Identifier):
-            i: IdentifierNode = IdentifierNode(self.current_token.word)
+            token: Token = self.current_token
+            i: IdentifierNode = IdentifierNode(token.word, token.line, token.column)
             self.move_pointer()
             return i
         
@@ -198,12 +215,11 @@ class Parser:
             e : Expr = self.parse_assignment()
 
             if not isinstance(self.current_token, Parenthesis) or self.current_token.symbol != ')':
-                print("Expected a )")
-                sys.exit()
+                raise self.error("Expected a )")
 
             self.move_pointer()
             return e
         
         else:
-            print("Invalid syntax found in the parse_primary function")
-            sys.exit()
\ No newline at end of file
+            raise self.error(f"Unexpected {self.current_token}")
+
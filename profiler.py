@@ -0,0 +1,197 @@
+from __future__ import annotations
+import json
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from AST import *
+from _token import Token
+
+
+class NodeStats:
+    '''
+    How many times an execute_* method of the interpreter ran, and for how long.
+    The cumulative time includes the operands, the own time doesn't
+    '''
+    __slots__ = ('count', 'cumulative', 'own')
+
+    def __init__(self):
+        self.count: int = 0
+        self.cumulative: float = 0.0
+        self.own: float = 0.0
+
+
+class StatementStats:
+    '''
+    The tokens read and the nodes built while parsing a statement
+    '''
+    __slots__ = ('index', 'kind', 'tokens', 'nodes')
+
+    def __init__(self, index: int, kind: str, tokens: int, nodes: int):
+        self.index: int = index
+        self.kind: str = kind
+        self.tokens: int = tokens
+        self.nodes: int = nodes
+
+
+class Profiler:
+    '''
+    Records where an Interpreter spends its time: scanning, parsing and
+    executing, every execute_* method of the tree walker, and the size of every
+    statement parsed.
+
+    The profiler shadows the methods of the scanner, the parser and the
+    interpreter it is attached to with timed versions, set on the instances
+    themselves. An interpreter that isn't profiled runs its class methods
+    unchanged, so it pays nothing. Only the tree walker calls the execute_*
+    methods, the other backends and the statements compiled to Python code
+    only show in the phases
+    '''
+    def __init__(self):
+        self.phases: Dict[str, float] = {'scan': 0.0, 'parse': 0.0, 'execute': 0.0}
+        self.nodes: Dict[str, NodeStats] = {}
+        self.statements: List[StatementStats] = []
+        self.tokens: int = 0
+        # The time of the operands of the execute_* methods that are running
+        self.children: List[float] = []
+        # The objects that have timed methods, with the names of those methods
+        self.attached: List[Tuple[Any, List[str]]] = []
+
+    def attach(self, interpreter: Interpreter) -> Profiler:
+        self.shadow(interpreter.scanner, 'tokenize_lines', self.time_tokens)
+        self.shadow(interpreter.parser, 'parse_next', self.time_parse)
+        self.shadow(interpreter, 'execute', self.time_execute)
+        for name in dir(type(interpreter)):
+            # The methods called by the nodes, not execute_reporting or execute_script
+            if name.startswith('execute_') and name.endswith(('_expr', '_node')):
+                self.shadow(interpreter, name, lambda method, name=name: self.time_node(method, name[len('execute_'):]))
+        return self
+
+    def detach(self) -> None:
+        for target, names in self.attached:
+            for name in names:
+                delattr(target, name)
+        self.attached.clear()
+
+    def shadow(self, target: Any, name: str, wrap: Callable[[Callable], Callable]) -> None:
+        setattr(target, name, wrap(getattr(target, name)))
+        for attached, names in self.attached:
+            if attached is target:
+                names.append(name)
+                return
+        self.attached.append((target, [name]))
+
+    def time_tokens(self, tokenize_lines: Callable[..., Iterator[Token]]) -> Callable[..., Iterator[Token]]:
+        def timed(lines: Iterable[str], line: int = 1, column: int = 1) -> Iterator[Token]:
+            tokens: Iterator[Token] = tokenize_lines(lines, line, column)
+            clock = time.perf_counter
+            while True:
+                start: float = clock()
+                token: Optional[Token] = next(tokens, None)
+                self.phases['scan'] += clock() - start
+                if token is None:
+                    return
+                self.tokens += 1
+                yield token
+        return timed
+
+    def time_parse(self, parse_next: Callable[[], Optional[Stmt]]) -> Callable[[], Optional[Stmt]]:
+        def timed() -> Optional[Stmt]:
+            scanned: float = self.phases['scan']
+            tokens: int = self.tokens
+            start: float = time.perf_counter()
+            stmt: Optional[Stmt] = None
+            try:
+                stmt = parse_next()
+                return stmt
+            finally:
+                # The tokens are scanned while the statement is parsed
+                self.phases['parse'] += time.perf_counter() - start - (self.phases['scan'] - scanned)
+                if stmt is not None:
+                    self.statements.append(StatementStats(len(self.statements), type(stmt).__name__,
+                                                          self.tokens - tokens, count_nodes(stmt)))
+        return timed
+
+    def time_execute(self, execute: Callable[[List[Stmt]], None]) -> Callable[[List[Stmt]], None]:
+        def timed(script: List[Stmt]) -> None:
+            start: float = time.perf_counter()
+            try:
+                execute(script)
+            finally:
+                self.phases['execute'] += time.perf_counter() - start
+        return timed
+
+    def time_node(self, method: Callable[[Expr], float], name: str) -> Callable[[Expr], float]:
+        stats: NodeStats = self.nodes.setdefault(name, NodeStats())
+        children: List[float] = self.children
+        clock = time.perf_counter
+
+        # Binary nodes are given the value of their left operand
+        def timed(node: Expr, *operands: float) -> float:
+            children.append(0.0)
+            start: float = clock()
+            try:
+                return method(node, *operands)
+            finally:
+                elapsed: float = clock() - start
+                stats.count += 1
+                stats.cumulative += elapsed
+                stats.own += elapsed - children.pop()
+                if children:
+                    children[-1] += elapsed
+        return timed
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'phases': dict(self.phases),
+            'tokens': self.tokens,
+            'nodes': {name: {'count': stats.count, 'cumulative': stats.cumulative, 'own': stats.own}
+                      for name, stats in self.nodes.items() if stats.count > 0},
+            'statements': [{'index': stmt.index, 'kind': stmt.kind, 'tokens': stmt.tokens, 'nodes': stmt.nodes}
+                           for stmt in self.statements],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.as_dict(), indent=2)
+
+    def report(self) -> str:
+        lines: List[str] = []
+        total: float = sum(self.phases.values())
+        for phase, seconds in self.phases.items():
+            share: float = seconds / total * 100 if total > 0 else 0.0
+            lines.append(f"{phase:<8} {seconds:10.6f}s {share:5.1f}%")
+
+        nodes: List[Tuple[str, NodeStats]] = sorted(((name, stats) for name, stats in self.nodes.items() if stats.count > 0),
+                                                    key=lambda item: item[1].own, reverse=True)
+        if nodes:
+            lines.append('')
+            lines.append(f"{'node':<18} {'count':>10} {'cumulative':>12} {'own':>12}")
+            for name, stats in nodes:
+                lines.append(f"{name:<18} {stats.count:>10} {stats.cumulative:11.6f}s {stats.own:11.6f}s")
+
+        if self.statements:
+            tokens: int = sum(stmt.tokens for stmt in self.statements)
+            nodes_built: int = sum(stmt.nodes for stmt in self.statements)
+            largest: StatementStats = max(self.statements, key=lambda stmt: stmt.nodes)
+            lines.append('')
+            lines.append(f"{len(self.statements)} statements, {tokens} tokens, {nodes_built} nodes, "
+                         f"largest is statement {largest.index} ({largest.kind}) with {largest.tokens} tokens "
+                         f"and {largest.nodes} nodes")
+        return '\n'.join(lines)
+
+
+def count_nodes(stmt: Stmt) -> int:
+    '''
+    Counts the nodes of a statement, the statement included
+    '''
+    count: int = 1
+    work: List[Optional[Expr]] = [getattr(stmt, 'expr', None)]
+    while work:
+        e: Optional[Expr] = work.pop()
+        if e is None:
+            continue
+        count += 1
+        if isinstance(e, BinaryExpr):
+            work.append(e.left)
+            work.append(e.right)
+        elif isinstance(e, (UnaryExpr, Assignment)):
+            work.append(e.expr)
+    return count
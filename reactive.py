@@ -0,0 +1,155 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from AST import *
+
+
+class ReactiveEnvironment(dict):
+    '''
+    An environment where the variables declared with 'let' keep their formula,
+    like the cells of a spreadsheet. The interpreter calls define() before every
+    statement, and the environment records which variables each formula reads.
+
+    When a variable changes, the variables whose formulas depend on it, directly
+    or not, are marked as stale. A stale variable is only recomputed when it is
+    read by name, after the stale variables it reads itself, so the formulas are
+    recomputed lazily and in topological order.
+
+    Assigning to a variable replaces its formula with the value, as typing a
+    number into a cell does. Formulas that assign to variables, or that would
+    make a cycle, like 'let a = a + 1', are not tracked, their variable just
+    holds the value computed when the 'let' ran
+    '''
+    def __init__(self, evaluate: Callable[[Expr], float]):
+        super().__init__()
+        # Evaluates a formula, reading the variables from this environment
+        self.evaluate: Callable[[Expr], float] = evaluate
+        self.formulas: Dict[str, Expr] = {}
+        # The variables read by the formula of each variable, and the reverse
+        self.reads: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+        self.stale: Set[str] = set()
+        # The formula of the 'let' being executed, tracked once its value is stored
+        self.pending: Optional[Tuple[str, Expr, Set[str]]] = None
+
+        self.changes: int = 0
+        self.recomputed: int = 0
+        # The recomputations that running the whole script again after every
+        # change would have needed
+        self.full_recomputations: int = 0
+
+    @property
+    def avoided(self) -> int:
+        return self.full_recomputations - self.recomputed
+
+    def report(self) -> str:
+        return (f"{len(self.formulas)} formulas, {self.changes} changes, {self.recomputed} recomputed, "
+                f"{self.avoided} recomputations avoided")
+
+    def define(self, stmt: Stmt) -> None:
+        '''
+        Records the formula of a 'let' that is about to be executed
+        '''
+        self.pending = None
+        if not isinstance(stmt, LetDecl) or stmt.expr is None:
+            return
+
+        names: Optional[Set[str]] = variables_read(stmt.expr)
+        if names is not None and not self.depends_on(names, stmt.name):
+            self.pending = (stmt.name, stmt.expr, names)
+
+    def depends_on(self, names: Set[str], name: str) -> bool:
+        '''
+        Checks if the formulas of some variables read a variable, directly or not
+        '''
+        seen: Set[str] = set()
+        work: List[str] = list(names)
+        while work:
+            current: str = work.pop()
+            if current == name:
+                return True
+            if current not in seen:
+                seen.add(current)
+                work.extend(self.reads.get(current, ()))
+        return False
+
+    def forget(self, name: str) -> None:
+        self.formulas.pop(name, None)
+        for read in self.reads.pop(name, ()):
+            self.dependents[read].discard(name)
+
+    def __getitem__(self, name: str) -> float:
+        if name in self.stale:
+            self.recompute(name)
+        return dict.__getitem__(self, name)
+
+    def get(self, name: str, default: Optional[float] = None) -> Optional[float]:
+        return self[name] if name in self else default
+
+    def clear(self) -> None:
+        dict.clear(self)
+        self.formulas.clear()
+        self.reads.clear()
+        self.dependents.clear()
+        self.stale.clear()
+        self.pending = None
+
+    def __setitem__(self, name: str, value: float) -> None:
+        self.forget(name)
+        if self.pending is not None and self.pending[0] == name:
+            _, expr, names = self.pending
+            self.pending = None
+            self.formulas[name] = expr
+            self.reads[name] = names
+            for read in names:
+                self.dependents.setdefault(read, set()).add(name)
+
+        # A variable that gets its first value can't have dependents yet
+        changed: bool = dict.__contains__(self, name)
+        dict.__setitem__(self, name, value)
+        self.stale.discard(name)
+        if changed:
+            self.invalidate(name)
+
+    def invalidate(self, name: str) -> None:
+        '''
+        Marks the variables that depend on a changed variable as stale
+        '''
+        self.changes += 1
+        self.full_recomputations += len(self.formulas)
+        work: List[str] = list(self.dependents.get(name, ()))
+        while work:
+            dependent: str = work.pop()
+            if dependent not in self.stale:
+                self.stale.add(dependent)
+                work.extend(self.dependents.get(dependent, ()))
+
+    def recompute(self, name: str) -> None:
+        self.stale.discard(name)
+        try:
+            # The stale variables that the formula reads are recomputed first
+            value: float = self.evaluate(self.formulas[name])
+        except Exception:
+            self.stale.add(name)
+            raise
+        dict.__setitem__(self, name, value)
+        self.recomputed += 1
+
+
+def variables_read(expr: Expr) -> Optional[Set[str]]:
+    '''
+    Returns the variables an expression reads, or None if it assigns to any
+    '''
+    names: Set[str] = set()
+    work: List[Expr] = [expr]
+    while work:
+        e: Expr = work.pop()
+        if isinstance(e, Assignment):
+            return None
+        elif isinstance(e, BinaryExpr):
+            work.append(e.left)
+            work.append(e.right)
+        elif isinstance(e, (UnaryExpr, MemoExpr, CommonExpr)):
+            work.append(e.expr)
+        elif isinstance(e, IdentifierNode):
+            names.add(e.word)
+    return names
@@ -0,0 +1,63 @@
+from __future__ import annotations
+from typing import List
+from AST import *
+from environment import Environment
+from errors import UndefinedNameError
+
+
+class Resolver:
+    '''
+    Assigns every variable a slot of the Environment and rewrites the nodes that
+    use it into nodes that index the slot, so that the tree walker doesn't hash
+    names at runtime. Names that no earlier 'let' declared are reported before
+    the statement is executed.
+
+    A 'let' whose value fails to evaluate still declares its variable, so the
+    slot nodes keep checking at runtime that their variable has a value
+    '''
+    def __init__(self, environment: Environment):
+        self.environment: Environment = environment
+
+    def resolve(self, script: List[Stmt]) -> List[Stmt]:
+        return [self.resolve_stmt(stmt) for stmt in script]
+
+    def resolve_stmt(self, stmt: Stmt) -> Stmt:
+        if isinstance(stmt, LetDecl):
+            if stmt.expr is None:
+                return stmt
+            # The variable can't be used in its own initializer
+            expr: Expr = self.resolve_expr(stmt.expr)
+            return SlotLetDecl(stmt.name, self.environment.declare(stmt.name), expr)
+
+        elif isinstance(stmt, PrintStmt):
+            return PrintStmt(self.resolve_expr(stmt.expr))
+
+        elif isinstance(stmt, ExprStmt):
+            return ExprStmt(self.resolve_expr(stmt.expr))
+
+        return stmt
+
+    def resolve_expr(self, expr: Expr) -> Expr:
+        if isinstance(expr, BinaryExpr):
+            spine: List[BinaryExpr] = left_spine(expr)
+            left: Expr = self.resolve_expr(spine[-1].left)
+            for e in reversed(spine):
+                right: Expr = self.resolve_expr(e.right)
+                left = make_binary_expr(left, e.operator, right, e.line, e.column)
+            return left
+
+        elif isinstance(expr, UnaryExpr):
+            return type(expr)(self.resolve_expr(expr.expr))
+
+        elif isinstance(expr, IdentifierNode):
+            if expr.word not in self.environment.slots:
+                raise UndefinedNameError(f"Undefined variable '{expr.word}'", expr.position)
+            return SlotIdentifierNode(expr.word, self.environment.slots[expr.word], expr.line, expr.column)
+
+        elif isinstance(expr, Assignment):
+            if expr.word not in self.environment.slots:
+                raise UndefinedNameError(f"Variable {expr.word} does not exist", expr.position)
+            slot: int = self.environment.slots[expr.word]
+            return SlotAssignment(expr.word, slot, self.resolve_expr(expr.expr), expr.line, expr.column)
+
+        return expr
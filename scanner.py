@@ -1,6 +1,10 @@
-import sys
-from typing import List, Optional
+from __future__ import annotations
+import re
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    from typing import Any, Callable, Iterable, Iterator, List, Optional
 from _token import *
+from errors import LexicalError, UnknownSymbol
 
 
 class Scanner:
@@ -10,11 +14,17 @@ class Scanner:
     braces: str = '{}'
     whitespaces: str = ' \t\n'
 
-    def __init__(self):
+    def __init__(self, number: Callable[[str], Any] = float):
+        # Converts the lexemes of numbers, once, to the numbers of the interpreter
+        self.number: Callable[[str], Any] = number
         self.tokens: List[Token] = []
         self.string: str = ''
         self.index: int = 0
-
+        # The number of the line being scanned, starting at 1
+        self.line: int = 0
+        # Added to the columns of the line being scanned, when the text doesn't
+        # start at the beginning of a line
+        self.column_offset: int = 0
 
     def inside_string(self) -> bool:
         return self.index < len(self.string)
@@ -69,10 +79,11 @@ class Scanner:
             self.index += 1
 
         if decimal_count > 1:
-            print(f"Syntax Error: {decimal_count} decimal points in a number")
-            sys.exit()
-        
-        self.tokens.append(NumberToken(float(number)))
+            self.tokens.append(ErrorToken(LexicalError(f"{decimal_count} decimal points in a number")))
+        elif number == '.':
+            self.tokens.append(ErrorToken(LexicalError("Expected digits around the decimal point")))
+        else:
+            self.tokens.append(NumberToken(self.number(number)))
 
     def scan_string(self) -> None:
         s : str = ''
@@ -81,12 +92,11 @@ class Scanner:
             s += self.current_char
             self.index += 1
 
-        try:
-            if self.current_char == '"':
-                self.tokens.append(String(s))
-                self.index += 1
-        except IndexError:
-            raise SyntaxError("Expected a \" at the end of string")
+        if self.inside_string():
+            self.tokens.append(String(s))
+            self.index += 1
+        else:
+            self.tokens.append(ErrorToken(LexicalError("Expected a \" at the end of string")))
         return
 
     def scan_operator(self) -> None:
@@ -110,7 +120,8 @@ class Scanner:
                 self.tokens.append(RelationalOP('!='))
                 self.index += 2
             else:
-                raise SyntaxError("'!' is not an operator. Did you mean 'not'?")
+                self.tokens.append(ErrorToken(LexicalError("'!' is not an operator. Did you mean 'not'?")))
+                self.index += 1
         return
 
     def scan_parenthesis(self) -> None:
@@ -125,13 +136,28 @@ class Scanner:
             self.tokens.append(AssignmentOP())
             self.index += 1
     
-    def scan(self, text: str) -> None:
+    def locate(self, token: Token, index: int) -> Token:
+        '''
+        Records the position of a token that starts at the given index of the line
+        '''
+        token.line = self.line
+        token.column = index + 1 + self.column_offset
+        if isinstance(token, ErrorToken):
+            token.error.position = (token.line, token.column)
+        return token
+
+    def scan_tokens(self, text: str) -> Iterator[Token]:
+        '''
+        Yields the tokens of a line as soon as they are scanned, without an EOFToken.
+        Lexemes that can't be scanned are replaced by ErrorTokens
+        '''
         # Initialize the state of the scanner
         self.string = text
         self.index = 0
         self.tokens.clear()
 
         while self.inside_string():
+            start: int = self.index
             if self.current_char in Scanner.numbers:
                 self.scan_number()  # done 
             elif self.current_char == '"':
@@ -151,9 +177,137 @@ class Scanner:
             elif self.current_char == ';':
                 self.scan_semicolon()
             else:
-                print("Invalid syntax")
-                # For debugging purposes, we are not clearing the token list
-                # self.tokens.clear()
-                break
+                self.tokens.append(ErrorToken(UnknownSymbol(f"Unknown symbol '{self.current_char}'")))
+                self.index += 1
+
+            for token in self.tokens:
+                yield self.locate(token, start)
+            self.tokens.clear()
+
+    def tokenize(self, text: str, line: int = 1, column: int = 1) -> Iterator[Token]:
+        '''
+        Lazily yields the tokens of text followed by an EOFToken. The position of
+        the start of the text can be given when it is part of a larger source
+        '''
+        return self.tokenize_lines(text.split('\n'), line, column)
+
+    def tokenize_lines(self, lines: Iterable[str], line: int = 1, column: int = 1) -> Iterator[Token]:
+        '''
+        Lazily yields the tokens of a stream of lines, like an open file, followed by
+        an EOFToken. Only one line is held in memory at a time, so strings can't
+        span multiple lines
+        '''
+        self.line = line - 1
+        self.string = ''
+        self.column_offset = column - 1
+        for text in lines:
+            self.line += 1
+            if self.line > line:
+                # Only the first line can start in the middle of a line
+                self.column_offset = 0
+            yield from self.scan_tokens(text)
+        yield self.locate(EOFToken(), len(self.string))
+
+    def scan(self, text: str) -> None:
+        self.tokens = list(self.tokenize(text))
+
+
+class RegexScanner(Scanner):
+    '''
+    A faster scanner that produces the same tokens as Scanner. A single master
+    regex finds every lexeme, which is then sliced out of the source instead of
+    being built up one character at a time
+    '''
+    # Leading whitespace is skipped as part of the next lexeme
+    pattern = re.compile(r'''
+        [ \t\n]*
+        (?:
+          (?P<number>[0-9.]+)
+        | (?P<word>[^\W\d_]\w*)
+        | (?P<operator><=|>=|==|!=|[-+*/%<>=!])
+        | (?P<parenthesis>[()])
+        | (?P<semicolon>;)
+        | (?P<string>"[^"]*"?)
+        | (?P<brace>[{}])
+        | (?P<invalid>[^ \t\n])
+        )
+    ''', re.VERBOSE)
+
+    keywords = {
+        'and': lambda: LogicalOP('and'),
+        'or': lambda: LogicalOP('or'),
+        'not': NotOP,
+        'True': lambda: Boolean(True),
+        'False': lambda: Boolean(False),
+    }
+
+    def scan_tokens(self, text: str) -> Iterator[Token]:
+        # Initialize the state of the scanner
+        self.string = text
+        self.index = 0
+        keywords = RegexScanner.keywords
+        number = self.number
+        line: int = self.line
+        offset: int = self.column_offset + 1
+
+        # Where the matching starts again after a character that the regex
+        # took for the start of a name, None once the line is scanned
+        start: Optional[int] = 0
+        while start is not None:
+            matches = RegexScanner.pattern.finditer(text, start)
+            start = None
+            for match in matches:
+                kind: Optional[str] = match.lastgroup
+                lexeme: str = match.group(kind)
+                token: Token
+
+                if kind == 'number':
+                    decimal_count: int = lexeme.count('.')
+                    if decimal_count > 1:
+                        token = ErrorToken(LexicalError(f"{decimal_count} decimal points in a number"))
+                    elif lexeme == '.':
+                        token = ErrorToken(LexicalError("Expected digits around the decimal point"))
+                    else:
+                        token = NumberToken(number(lexeme))
+                elif kind == 'word':
+                    if not lexeme[0].isalpha():
+                        # \w also matches numeric characters that aren't digits, like ² and Ⅷ,
+                        # which the Scanner doesn't accept at the start of a name. The rest of
+                        # the line is matched again after them
+                        token = ErrorToken(UnknownSymbol(f"Unknown symbol '{lexeme[0]}'"))
+                        start = match.start(kind) + 1
+                    else:
+                        keyword = keywords.get(lexeme)
+                        token = keyword() if keyword is not None else Identifier(lexeme)
+                elif kind == 'operator':
+                    if lexeme in '+-*/%':
+                        token = MathOP(lexeme)
+                    elif lexeme == '=':
+                        token = AssignmentOP()
+                    elif lexeme == '!':
+                        token = ErrorToken(LexicalError("'!' is not an operator. Did you mean 'not'?"))
+                    else:
+                        token = RelationalOP(lexeme)
+                elif kind == 'parenthesis':
+                    token = Parenthesis(lexeme)
+                elif kind == 'semicolon':
+                    token = Semicolon()
+                elif kind == 'string':
+                    if len(lexeme) < 2 or lexeme[-1] != '"':
+                        token = ErrorToken(LexicalError("Expected a \" at the end of string"))
+                    else:
+                        token = String(lexeme[1:-1])
+                elif kind == 'brace':
+                    token = Brace(lexeme)
+                else:
+                    token = ErrorToken(UnknownSymbol(f"Unknown symbol '{lexeme}'"))
+
+                token.line = line
+                token.column = match.start(kind) + offset
+                if type(token) is ErrorToken:
+                    token.error.position = (token.line, token.column)
+                yield token
+                if start is not None:
+                    break
 
-        self.tokens.append(EOFToken())
\ No newline at end of file
+        self.index = len(text)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+import io
+import sys
+import asyncio
+import contextlib
+from typing import Any, Dict, Optional
+from interpreter import Interpreter
+
+
+class CalcServer:
+    '''
+    Serves the calculator over TCP or a Unix socket. A client sends statements,
+    one source line at a time, and gets back everything that line printed,
+    errors included, followed by an empty line. Every connection has its own
+    Interpreter, so sessions don't see each other's variables.
+
+    Clients can pipeline, sending lines without waiting for the answers. The
+    lines of a connection are run in order and answered in the same order. A
+    client that doesn't read its answers stops being read from once the
+    socket's write buffer is full, so it can't make the server buffer without
+    bound. The interpreter options are those of Interpreter itself
+    '''
+    # Longer lines are refused, they would have to be buffered whole
+    line_limit: int = 1024 * 1024
+
+    def __init__(self, **options: Any):
+        self.options: Dict[str, Any] = options
+        self.server: Optional[asyncio.AbstractServer] = None
+        self.sessions: int = 0
+        self.requests: int = 0
+
+    async def start(self, address: str) -> None:
+        '''
+        Listens on host:port, or on a Unix socket when the address is a path
+        '''
+        if '/' in address:
+            self.server = await asyncio.start_unix_server(self.serve, address, limit=CalcServer.line_limit)
+        else:
+            host, _, port = address.rpartition(':')
+            self.server = await asyncio.start_server(self.serve, host or 'localhost', int(port),
+                                                     limit=CalcServer.line_limit)
+
+    @property
+    def address(self) -> str:
+        name = self.server.sockets[0].getsockname()
+        return name if isinstance(name, str) else f"{name[0]}:{name[1]}"
+
+    async def serve_forever(self, address: str) -> None:
+        await self.start(address)
+        print(f"Serving on {self.address}", file=sys.stderr, flush=True)
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        interpreter: Interpreter = Interpreter(**self.options)
+        self.sessions += 1
+        try:
+            while True:
+                try:
+                    line: bytes = await reader.readline()
+                except ValueError:
+                    writer.write(b"Line too long\n\n")
+                    break
+                if not line:
+                    break
+                source: str = line.decode(errors='replace').rstrip('\r\n')
+                if source == 'exit' or source == 'quit':
+                    break
+
+                writer.write(self.run(interpreter, source).encode() + b"\n")
+                self.requests += 1
+                # Stop reading while the client isn't reading the answers
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            # The connection is only gone once its transport has closed
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    def run(self, interpreter: Interpreter, source: str) -> str:
+        '''
+        Runs a line and returns what it printed. The line runs without giving
+        control back to the event loop, so no other session prints meanwhile
+        '''
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            interpreter.run_source(source)
+        return output.getvalue()
@@ -0,0 +1,280 @@
+from __future__ import annotations
+import os
+import struct
+from AST import *
+from errors import CalcError
+# array, which imports collections, and mmap are imported by the functions that
+# use them, so that the AST cache loads statements without them
+if TYPE_CHECKING:
+    from array import array
+    from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# A snapshot is a little endian binary file made of a header and six sections,
+# each starting at a multiple of 8 bytes:
+#
+#   values      V + K doubles, the variables then the literals of the statements
+#   references  V + K int32, -1 for a value that is a double, -2 for an int held
+#               exactly by its double, otherwise the index of its text in the
+#               strings, for the numbers that doubles can't hold
+#   offsets     S + 1 uint32, where every string starts in the string bytes
+#   strings     the UTF-8 bytes of the strings: the numeric mode, the names of
+#               the variables, the sources of the scripts, the names used by
+#               the statements and the texts of the values
+#   nodes       N records of 4 int32: tag, argument, line and column, the nodes
+#               of the statements in postfix order
+#   scripts     C records of 3 uint32: the source, the first node and the
+#               number of nodes of every cached script
+MAGIC: bytes = b'CALCSNAP'
+VERSION: int = 1
+header = struct.Struct('<8sHxxIIIIIIxxxx')
+
+# The tags of the nodes, whose argument is the index of a literal, the value of
+# a boolean, the index of a name or an operator
+NUMBER, BOOLEAN, IDENTIFIER, BINARY, NEGATE, NOT, ASSIGNMENT, LET, EMPTY_LET, PRINT, EXPRESSION = range(11)
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class SnapshotWriter:
+    def __init__(self, mode: str):
+        from array import array
+        self.values: array = array('d')
+        self.references: array = array('i')
+        self.strings: List[str] = [mode]
+        self.string_index: Dict[str, int] = {}
+        self.nodes: array = array('i')
+
+    def string(self, text: str) -> int:
+        index: Optional[int] = self.string_index.get(text)
+        if index is None:
+            index = self.string_index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+    def value(self, value: Any) -> int:
+        '''
+        Adds a number and returns its index among the values
+        '''
+        if type(value) is float:
+            self.values.append(value)
+            self.references.append(-1)
+        elif type(value) is int and abs(value) <= 2 ** 53:
+            self.values.append(float(value))
+            self.references.append(-2)
+        else:
+            # Ints are marked, so that they aren't read back as numbers of the mode
+            text: str = f"i{value}" if type(value) is int else f"n{value}"
+            self.values.append(0.0)
+            self.references.append(len(self.strings))
+            self.strings.append(text)
+        return len(self.values) - 1
+
+    def node(self, tag: int, argument: int = 0, line: int = 0, column: int = 0) -> None:
+        self.nodes.extend((tag, argument, line, column))
+
+    def stmt(self, stmt: Stmt) -> None:
+        if isinstance(stmt, LetDecl):
+            if stmt.expr is None:
+                self.node(EMPTY_LET, self.string(stmt.name))
+            else:
+                self.expr(stmt.expr)
+                self.node(LET, self.string(stmt.name))
+        else:
+            self.expr(stmt.expr)
+            self.node(PRINT if isinstance(stmt, PrintStmt) else EXPRESSION)
+
+    def expr(self, expr: Expr) -> None:
+        # Long operator chains lean to the left, so the postfix order is built
+        # with a stack of the nodes still to write
+        work: List[Tuple[Expr, bool]] = [(expr, False)]
+        while work:
+            e, children_written = work.pop()
+            if isinstance(e, BinaryExpr):
+                if children_written:
+                    self.node(BINARY, e.operator, e.line, e.column)
+                else:
+                    work.append((e, True))
+                    work.append((e.right, False))
+                    work.append((e.left, False))
+            elif isinstance(e, (UnaryExpr, Assignment)):
+                if not children_written:
+                    work.append((e, True))
+                    work.append((e.expr, False))
+                elif isinstance(e, NegateExpr):
+                    self.node(NEGATE)
+                elif isinstance(e, NotExpr):
+                    self.node(NOT)
+                else:
+                    self.node(ASSIGNMENT, self.string(e.word), e.line, e.column)
+            elif isinstance(e, NumberNode):
+                self.node(NUMBER, self.value(e.value))
+            elif isinstance(e, BooleanNode):
+                self.node(BOOLEAN, int(e.value))
+            elif isinstance(e, IdentifierNode):
+                self.node(IDENTIFIER, self.string(e.word), e.line, e.column)
+            else:
+                raise SnapshotError(f"Can't save {type(e).__name__}")
+
+
+def save_snapshot(interpreter: Interpreter, path: str, statements: bool = True) -> None:
+    '''
+    Saves the variables of an interpreter, and the scripts of its parse cache
+    unless statements is False. The scripts are parsed again, since the cached
+    ones may have been optimized or resolved, and they are saved as statements
+    so that loading them doesn't scan or parse anything
+    '''
+    from array import array
+    writer = SnapshotWriter(interpreter.numbers.name)
+    items: List[Tuple[str, Any]] = []
+    with interpreter.numbers.scope():
+        for name in list(interpreter.environment):
+            try:
+                # The stale variables of a reactive environment are recomputed
+                items.append((name, interpreter.environment[name]))
+            except CalcError:
+                # A formula that fails has no value to save
+                pass
+    for name, _ in items:
+        writer.strings.append(name)
+    for _, value in items:
+        writer.value(value)
+
+    scripts: array = array('I')
+    if statements and interpreter.cache is not None:
+        # Loading statements needs neither of them
+        from scanner import RegexScanner
+        from parser import Parser
+        scanner = RegexScanner(interpreter.number)
+        parser = Parser()
+        for source in interpreter.cache.scripts:
+            first: int = len(writer.nodes) // 4
+            parser.parse(scanner.tokenize(source))
+            for stmt in parser.script:
+                writer.stmt(stmt)
+            scripts.extend((writer.string(source), first, len(writer.nodes) // 4 - first))
+
+    encoded: List[bytes] = [text.encode() for text in writer.strings]
+    offsets: array = array('I', [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+
+    sections: List[bytes] = [writer.values.tobytes(), writer.references.tobytes(), offsets.tobytes(),
+                             b''.join(encoded), writer.nodes.tobytes(), scripts.tobytes()]
+    with open(path, 'wb') as f:
+        f.write(header.pack(MAGIC, VERSION, len(items), len(writer.values) - len(items), len(writer.strings),
+                            len(writer.nodes) // 4, len(scripts) // 3, offsets[-1]))
+        for section in sections:
+            f.write(section)
+            f.write(bytes(-len(section) % 8))
+
+
+def load_snapshot(interpreter: Interpreter, path: str) -> None:
+    '''
+    Replaces the variables of an interpreter with those of a snapshot, and puts
+    its scripts in the parse cache, when the interpreter has one. The file is
+    mapped rather than read, and its sections are used in place
+    '''
+    import mmap
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size < header.size:
+            raise SnapshotError("The file is too short to be a snapshot")
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    with mapped:
+        view = memoryview(mapped)
+        try:
+            load_view(interpreter, view)
+        finally:
+            view.release()
+
+def load_view(interpreter: Interpreter, view: memoryview) -> None:
+    magic, version, variables, literals, string_count, node_count, script_count, string_bytes = header.unpack_from(view)
+    if magic != MAGIC:
+        raise SnapshotError("The file is not a snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"Snapshots of version {version} can't be loaded")
+
+    sections: List[memoryview] = []
+    offset: int = header.size
+    for size in (8 * (variables + literals), 4 * (variables + literals), 4 * (string_count + 1),
+                 string_bytes, 16 * node_count, 12 * script_count):
+        if offset + size > len(view):
+            raise SnapshotError("The snapshot is truncated")
+        sections.append(view[offset:offset + size])
+        offset += size + -size % 8
+
+    values: List[float] = sections[0].cast('d').tolist()
+    references: List[int] = sections[1].cast('i').tolist()
+    offsets: List[int] = sections[2].cast('I').tolist()
+    data: bytes = bytes(sections[3])
+    nodes: List[int] = sections[4].cast('i').tolist()
+    scripts: List[int] = sections[5].cast('I').tolist()
+    for section in sections:
+        section.release()
+    strings: List[str] = [data[offsets[n]:offsets[n + 1]].decode() for n in range(string_count)]
+
+    mode: str = strings[0]
+    if mode != interpreter.numbers.name:
+        raise SnapshotError(f"The snapshot holds {mode} numbers, the interpreter uses {interpreter.numbers.name} numbers")
+
+    decode_values(values, references, strings, interpreter.number)
+
+    environment = interpreter.environment
+    environment.clear()
+    for n in range(variables):
+        environment[strings[1 + n]] = values[n]
+
+    if interpreter.cache is not None:
+        for n in range(0, len(scripts), 3):
+            source, first, count = scripts[n:n + 3]
+            script: List[Stmt] = build_statements(nodes, 4 * first, 4 * (first + count), values, strings)
+            interpreter.cache.put(strings[source], interpreter.prepare(script))
+
+
+def decode_values(values: List[Any], references: List[int], strings: List[str], number: Callable[[Any], Any]) -> None:
+    '''
+    Replaces the values that aren't doubles by the ints and numbers they stand for
+    '''
+    for n, reference in enumerate(references):
+        if reference == -2:
+            values[n] = int(values[n])
+        elif reference >= 0:
+            text: str = strings[reference]
+            values[n] = int(text[1:]) if text[0] == 'i' else number(text[1:])
+
+
+def build_statements(nodes: List[int], start: int, end: int, values: List[Any], strings: List[str]) -> List[Stmt]:
+    '''
+    Rebuilds the statements from their nodes in postfix order
+    '''
+    script: List[Stmt] = []
+    stack: List[Expr] = []
+    for n in range(start, end, 4):
+        tag, argument, line, column = nodes[n:n + 4]
+        if tag == NUMBER:
+            stack.append(NumberNode(values[argument]))
+        elif tag == BOOLEAN:
+            stack.append(BooleanNode(bool(argument)))
+        elif tag == IDENTIFIER:
+            stack.append(IdentifierNode(strings[argument], line, column))
+        elif tag == BINARY:
+            right: Expr = stack.pop()
+            stack[-1] = make_binary_expr(stack[-1], argument, right, line, column)
+        elif tag == NEGATE:
+            stack[-1] = NegateExpr(stack[-1])
+        elif tag == NOT:
+            stack[-1] = NotExpr(stack[-1])
+        elif tag == ASSIGNMENT:
+            stack[-1] = Assignment(strings[argument], stack[-1], line, column)
+        elif tag == LET:
+            script.append(LetDecl(strings[argument], stack.pop()))
+        elif tag == EMPTY_LET:
+            script.append(LetDecl(strings[argument], None))
+        elif tag == PRINT:
+            script.append(PrintStmt(stack.pop()))
+        elif tag == EXPRESSION:
+            script.append(ExprStmt(stack.pop()))
+        else:
+            raise SnapshotError(f"Unknown node {tag} in the snapshot")
+    return script
@@ -0,0 +1,32 @@
+# Random statements for the tests that compare backends, and for the benchmarks
+# that time them
+import random
+
+from AST import OPERATORS
+
+
+def random_expression(rng: random.Random, depth: int, min_depth: int = 0) -> str:
+    '''
+    A random expression no deeper than depth, whose operators nest at least min_depth deep
+    '''
+    if depth == 0 or (min_depth <= 0 and rng.random() < 0.25):
+        return rng.choice(['x', 'y', 'z', str(rng.randint(0, 9)), '2.5', 'True', 'False'])
+    roll = rng.random()
+    if roll < 0.1:
+        return f'not {random_expression(rng, depth - 1, min_depth - 1)}'
+    if roll < 0.2:
+        return f'-{random_expression(rng, depth - 1, min_depth - 1)}'
+    if roll < 0.25:
+        return f'(x = {random_expression(rng, depth - 1, min_depth - 1)})'
+    left = random_expression(rng, depth - 1, min_depth - 1)
+    right = random_expression(rng, depth - 1)
+    return f'({left} {rng.choice(OPERATORS)} {right})'
+
+
+def random_corpus(seed: int, count: int) -> list:
+    '''
+    Sources of statements with a few levels of operators, like real formulas,
+    rather than mostly single literals
+    '''
+    rng = random.Random(seed)
+    return [f'let result = {random_expression(rng, 8, 3)};' for _ in range(count)]
@@ -0,0 +1,102 @@
+# Operator chains of 100k terms build trees that lean to the left far deeper
+# than Python can recurse. Every backend and pass, and every entry point that
+# parses, must print the same values and report the same errors for them
+import os
+import io
+import contextlib
+
+import pytest
+
+from interpreter import Interpreter
+
+TERMS = 100000
+SETUP = 'let x = 3; let y = 0.5; let z = 0;'
+
+CONFIGURATIONS = [
+    ('tree', {}),
+    ('vm', {'backend': 'vm'}),
+    ('closure', {'backend': 'closure'}),
+    ('optimize', {'optimize': True}),
+    ('resolve', {'resolve': True}),
+    ('cse', {'cse': True}),
+    ('incremental', {'incremental': True}),
+    ('reactive', {'reactive': True}),
+    ('hot', {'hot_threshold': 1}),
+    ('profiled', {'profile': True}),
+    ('all passes', {'optimize': True, 'resolve': True, 'cse': True}),
+]
+# Below and around the length at which closures switch to a loop, and the long ones
+LENGTHS = [2, 63, 64, 65, 66, 129, TERMS]
+
+
+def chains(terms: int):
+    '''
+    Yields chains of every precedence level, with what printing them prints
+    '''
+    yield ' - '.join(['1'] * terms), f'{2.0 - terms}\n'
+    yield 'x' + ' + y - 1' * (terms // 2), f'{3.0 - 0.5 * (terms // 2)}\n'
+    yield 'x' + ' * 1.5 / 1.5' * (terms // 2), '3.0\n'
+    yield '(x + 1000)' + ' % 7 % 5' * (terms // 2), '2\n'
+    yield 'x' + ' < 1 == 0' * (terms // 2), '1.0\n'
+    yield 'x' + ' and y or z' * (terms // 2), '0.5\n'
+    yield 'x' + ' - y * 2' * (terms // 2) + ' < 0 and (y = 1) or y', '1.0\n' if terms // 2 > 3 else '0.5\n'
+    # Fails halfway, on a division by z
+    yield 'x' + ' + 1' * (terms // 2) + ' + 1 / z' + ' + 1' * (terms // 2), \
+        f'Math Error at line 1, column {13 + 4 * (terms // 2)}: Division by Zero\n'
+
+
+def output(run, *args, **kwargs) -> str:
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        run(*args, **kwargs)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('terms', LENGTHS)
+@pytest.mark.parametrize('name, options', CONFIGURATIONS)
+def test_configurations(name: str, options: dict, terms: int) -> None:
+    for chain, expected in chains(terms):
+        i = Interpreter(**options)
+        output(i.run_source, SETUP)
+        # The hot statement runs as generated code the second time, and the
+        # incremental parser reuses the statement it parsed
+        for _ in range(2 if name in ('hot', 'incremental') else 1):
+            assert output(i.run_source, f'print {chain};') == expected, chain[:40]
+
+
+@pytest.mark.parametrize('terms', LENGTHS)
+def test_command_and_ast_cache(tmp_path, terms: int) -> None:
+    cache = os.path.join(tmp_path, 'ast-cache')
+    for chain, expected in chains(terms):
+        # The second time the statements come from the cache
+        for _ in range(2):
+            i = Interpreter()
+            output(i.run_source, SETUP)
+            assert output(i.run_command, f'print {chain}', ast_cache=cache) == expected, chain[:40]
+
+
+@pytest.mark.parametrize('terms', LENGTHS)
+def test_snapshot(tmp_path, terms: int) -> None:
+    for chain, expected in chains(terms):
+        i = Interpreter(cache_size=4)
+        output(i.run_source, SETUP)
+        assert output(i.run_source, f'print {chain};') == expected
+        snapshot = os.path.join(tmp_path, 'snapshot')
+        i.save_snapshot(snapshot)
+        restored = Interpreter(cache_size=4)
+        restored.load_snapshot(snapshot)
+        assert output(restored.run_source, f'print {chain};') == expected, chain[:40]
+
+
+@pytest.mark.parametrize('terms', LENGTHS)
+def test_bulk_and_vectorized(terms: int) -> None:
+    np = pytest.importorskip('numpy')
+    for chain, expected in chains(terms):
+        if 'Error' in expected or '=' in chain:
+            continue
+        i = Interpreter()
+        output(i.run_source, SETUP)
+        results = list(i.bulk_evaluator(chain).results([{}, {'x': 3.0}]))
+        assert [f'{result}\n' for result in results] == [expected] * 2, chain[:40]
+        values, errors = i.evaluate_vectorized(chain, {'x': np.full(3, 3.0)})
+        assert not errors.any() and values.tolist() == [float(expected)] * 3, chain[:40]
@@ -0,0 +1,31 @@
+# The closure backend runs a seeded random corpus of statements with the same
+# values, errors and side effects as the tree walker
+from interpreter import Interpreter
+from errors import CalcError
+from corpus import random_corpus
+
+
+def outcome(i: Interpreter, script) -> object:
+    '''
+    The value of the statement, or the kind of error it raised, and the environment after it
+    '''
+    i.environment.update(x=3.0, y=-2.0, z=0.5)
+    try:
+        i.execute(script)
+        value = i.environment['result']
+    except CalcError as error:
+        value = (type(error), str(error))
+    return value, dict(i.environment)
+
+
+def test_random_corpus() -> None:
+    tree = Interpreter('tree')
+    closure = Interpreter('closure')
+    for source in random_corpus(0, 3000):
+        tree.parser.parse(tree.scanner.tokenize(source))
+        script = tree.parser.script
+        expected = outcome(tree, script)
+        # Twice, the second time with the closures already compiled
+        for _ in range(2):
+            # nan != nan, so compare their reprs
+            assert repr(outcome(closure, script)) == repr(expected), source
@@ -0,0 +1,58 @@
+# 'and' and 'or' evaluate their operands from left to right and short-circuit,
+# in every backend: the right operand is only evaluated when the left one
+# doesn't decide the result
+import io
+import random
+import contextlib
+
+import pytest
+
+from interpreter import Interpreter
+from corpus import random_expression
+
+CONFIGURATIONS = {
+    'tree': {},
+    'vm': {'backend': 'vm'},
+    'closure': {'backend': 'closure'},
+    'hot': {'hot_threshold': 1},
+    'optimized': {'optimize': True},
+}
+
+# Statements whose output shows which operands were evaluated, with the output
+# expected from each of them
+ORDER = [
+    ('let x = 1; let r = False and (x = 2); print x; print r;', '1.0\n0.0\n'),
+    ('let x = 1; let r = True and (x = 2); print x; print r;', '2.0\n2.0\n'),
+    ('let x = 1; let r = True or (x = 2); print x; print r;', '1.0\n1.0\n'),
+    ('let x = 1; let r = 0 or (x = 0); print x; print r;', '0.0\n0.0\n'),
+    ('let x = 1; let r = (x = 0) and (x = 3) or (x = 4); print x; print r;', '4.0\n4.0\n'),
+    ('let x = 0; print x != 0 and 1 / x; print x == 0 or 7 % x;', '0.0\n1.0\n'),
+    ('let x = 5; print x > 1 and x % 4;', '1.0\n'),
+    ('print False and undefined; print True or undefined;', '0.0\n1.0\n'),
+    ('let a = 5; let b = 3; print not not (a and b); print not not (b or a);', '1.0\n1.0\n'),
+]
+
+
+def output(i: Interpreter, source: str) -> str:
+    buffer = io.StringIO()
+    with contextlib.redirect_stdout(buffer):
+        i.run_source(source)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('source, expected', ORDER)
+@pytest.mark.parametrize('name', CONFIGURATIONS)
+def test_evaluation_order(name: str, source: str, expected: str) -> None:
+    i = Interpreter(**CONFIGURATIONS[name])
+    # Twice, so that the hot statements are also run as generated code
+    for _ in range(2):
+        assert output(i, source) == expected
+
+
+def test_random_statements() -> None:
+    rng = random.Random(0)
+    interpreters = {name: Interpreter(**options) for name, options in CONFIGURATIONS.items()}
+    for _ in range(2000):
+        source = f'let x = 3; let y = -2; let z = 0.5; let result = {random_expression(rng, 6, 2)}; print result; print x;'
+        outputs = {name: output(i, source) + output(i, source) for name, i in interpreters.items()}
+        assert len(set(outputs.values())) == 1, (source, outputs)
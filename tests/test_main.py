@@ -0,0 +1,23 @@
+# The command line reports what it can't do in one line on stderr, without a traceback
+import os
+import sys
+import subprocess
+
+MAIN = os.path.join(os.path.dirname(__file__), '..', 'main.py')
+
+
+def run(*arguments: str) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, MAIN, *arguments], capture_output=True, text=True)
+
+
+def test_missing_script(tmp_path) -> None:
+    missing = str(tmp_path / 'missing.calc')
+    process = run(missing)
+    assert process.returncode == 1
+    assert process.stderr == f"Can't read {missing}: No such file or directory\n"
+
+
+def test_script_that_is_a_directory(tmp_path) -> None:
+    process = run(str(tmp_path))
+    assert process.returncode == 1
+    assert process.stderr == f"Can't read {tmp_path}: Is a directory\n"
@@ -0,0 +1,46 @@
+# Scripts run on the process pool don't share anything: every one of them
+# starts with an empty environment, and its errors are its own
+import os
+import sys
+import subprocess
+
+import pytest
+
+from parallel import ParallelRunner
+
+MAIN = os.path.join(os.path.dirname(__file__), '..', 'main.py')
+
+
+def test_resolved_names_dont_leak() -> None:
+    # One worker runs every script, the second one after the first
+    with ParallelRunner(workers=1, resolve=True, cache_size=16) as runner:
+        results = runner.run_sources(['let a = 1; print a;', 'print a;', 'let a = 1; print a;'])
+    assert [result.output for result in results] == \
+        ['1.0\n', "Name Error at line 1, column 7: Undefined variable 'a'\n", '1.0\n']
+    # The statement with an undefined name is reported before it runs
+    assert [result.statements for result in results] == [2, 0, 2]
+    assert [result.error_count for result in results] == [0, 1, 0]
+
+
+def test_missing_file_is_its_scripts_error(tmp_path) -> None:
+    script = tmp_path / 'a.calc'
+    script.write_text('print 1;')
+    missing = str(tmp_path / 'missing.calc')
+    with ParallelRunner(workers=1) as runner:
+        results = runner.run_files([str(script), missing, str(script)])
+    assert [result.output for result in results] == \
+        ['1.0\n', f"Can't read {missing}: No such file or directory\n", '1.0\n']
+    assert [result.error_count for result in results] == [0, 1, 0]
+
+
+@pytest.mark.parametrize('flag', [['--reactive'], ['--incremental'], ['--profile'], ['--profile-json', 'p.json'],
+                                  ['--snapshot', 'snapshot']])
+def test_flags_the_workers_ignore_are_rejected(tmp_path, flag: list) -> None:
+    scripts = [tmp_path / 'a.calc', tmp_path / 'b.calc']
+    for script in scripts:
+        script.write_text('print 1;')
+    process = subprocess.run([sys.executable, MAIN, *flag, *map(str, scripts)], capture_output=True, text=True,
+                             cwd=tmp_path)
+    assert process.returncode == 2
+    assert f"{flag[0]} can't be used with several scripts" in process.stderr
+    assert process.stdout == ''
@@ -0,0 +1,110 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple
+import numpy as np
+from AST import *
+from errors import UndefinedNameError
+
+
+class VectorEvaluator:
+    '''
+    Evaluates an expression over whole NumPy arrays of variable bindings at once,
+    walking the tree a single time instead of once per row.
+
+    The result follows the semantics of the Interpreter element by element. Rows
+    where a division or modulus by zero happens can't stop the program, so they
+    are flagged in an error mask instead and their value is nan. So are the rows
+    where '%' is applied to nan or inf, which the Interpreter can't turn into ints
+    '''
+    def __init__(self, bindings: Dict[str, np.ndarray], environment: dict):
+        self.bindings: Dict[str, np.ndarray] = {name: np.asarray(values, dtype=float) for name, values in bindings.items()}
+        # Variables without a binding fall back to their scalar value in the environment
+        self.environment: dict = environment
+        shapes = {values.shape for values in self.bindings.values()}
+        if len(shapes) > 1:
+            raise ValueError(f"All the bindings must have the same shape, got {sorted(shapes)}")
+        shape = shapes.pop() if shapes else ()
+        self.errors: np.ndarray = np.zeros(shape, dtype=bool)
+
+    def evaluate(self, expr: Expr) -> Tuple[np.ndarray, np.ndarray]:
+        '''
+        Returns the values of the expression and the mask of rows that failed
+        '''
+        with np.errstate(all='ignore'):
+            values = np.broadcast_to(self.evaluate_expr(expr), self.errors.shape).astype(float)
+        values[self.errors] = np.nan
+        return values, self.errors
+
+    def evaluate_expr(self, expr: Expr):
+        if isinstance(expr, BinaryExpr):
+            spine: List[BinaryExpr] = left_spine(expr)
+            l = self.evaluate_expr(spine[-1].left)
+            for e in reversed(spine):
+                if isinstance(e, LogicalExpr):
+                    l = self.evaluate_logical(e, l)
+                else:
+                    l = self.evaluate_binary(e.operator, l, self.evaluate_expr(e.right))
+            return l
+
+        elif isinstance(expr, NegateExpr):
+            return -1 * self.evaluate_expr(expr.expr)
+
+        elif isinstance(expr, NotExpr):
+            return (self.evaluate_expr(expr.expr) == 0).astype(float)
+
+        elif isinstance(expr, NumberNode):
+            return np.float64(expr.value)
+
+        elif isinstance(expr, BooleanNode):
+            return np.float64(expr.value)
+
+        elif isinstance(expr, IdentifierNode):
+            if expr.word in self.bindings:
+                return self.bindings[expr.word]
+            if expr.word in self.environment:
+                return np.float64(self.environment[expr.word])
+            raise UndefinedNameError(f"Undefined variable '{expr.word}'", expr.position)
+
+        raise ValueError(f"{type(expr).__name__} can't be evaluated over arrays")
+
+    def evaluate_logical(self, expr: LogicalExpr, l):
+        errors: np.ndarray = self.errors
+        r = self.evaluate_expr(expr.right)
+
+        # The right operand is evaluated for every row, but its errors only
+        # count in the rows where the Interpreter would have evaluated it
+        decided = np.asarray(l == 0) if expr.operator == AND else np.asarray(l != 0)
+        self.errors = errors | (self.errors & ~decided)
+
+        # 'l and r' is l when l is falsy and r otherwise, 'l or r' is l when l is truthy
+        return np.where(decided, l, r)
+
+    def evaluate_binary(self, operator: int, l, r):
+        if operator == ADD:
+            return l + r
+        elif operator == SUB:
+            return l - r
+        elif operator == MUL:
+            return l * r
+        elif operator == DIV:
+            zero = np.asarray(r == 0)
+            self.errors = self.errors | zero
+            # Divide by 1 where the divisor is 0, those rows are masked anyway
+            return l / np.where(zero, 1.0, r)
+        elif operator == MOD:
+            # The Interpreter truncates both operands to ints before a floored
+            # modulus, which fails for a zero divisor and for nan and inf
+            l, r = np.trunc(l), np.trunc(r)
+            invalid = np.asarray((r == 0) | ~np.isfinite(l) | ~np.isfinite(r))
+            self.errors = self.errors | invalid
+            return np.mod(np.where(invalid, 0.0, l), np.where(invalid, 1.0, r))
+        elif operator == LT:
+            return np.asarray(l < r, dtype=float)
+        elif operator == LE:
+            return np.asarray(l <= r, dtype=float)
+        elif operator == GT:
+            return np.asarray(l > r, dtype=float)
+        elif operator == GE:
+            return np.asarray(l >= r, dtype=float)
+        elif operator == EQ:
+            return np.asarray(l == r, dtype=float)
+        return np.asarray(l != r, dtype=float)
@@ -0,0 +1,116 @@
+import operator
+from typing import Any, Callable, List, Optional
+from compiler import *
+from errors import CalcError, MathError, UndefinedNameError
+
+
+def divide(l: float, r: float) -> float:
+    if r == 0:
+        raise MathError("Division by Zero")
+    return l / r
+
+def modulus(l: float, r: float) -> int:
+    try:
+        return int(l) % int(r)
+    except ZeroDivisionError:
+        raise MathError("Modulus by Zero") from None
+    except (ValueError, OverflowError):
+        raise MathError(f"Can't take the modulus of {l} and {r}") from None
+
+def make_binary_functions(number: Callable[[Any], Any]) -> List[Callable]:
+    '''
+    Returns the implementation of every binary operator, indexed by its opcode.
+    The comparisons convert their results with number
+    '''
+    return [
+        operator.add,
+        operator.sub,
+        operator.mul,
+        divide,
+        modulus,
+        lambda l, r: number(l < r),
+        lambda l, r: number(l <= r),
+        lambda l, r: number(l > r),
+        lambda l, r: number(l >= r),
+        lambda l, r: number(l == r),
+        lambda l, r: number(l != r),
+        lambda l, r: number(l and r),
+        lambda l, r: number(l or r),
+    ]
+
+binary_functions: List[Callable] = make_binary_functions(float)
+
+
+class VM:
+    '''
+    A stack based virtual machine that executes the Chunks built by the Compiler.
+    It follows the same semantics as the tree walking Interpreter
+    '''
+    def __init__(self, number: Callable[[Any], Any] = float):
+        self.number: Callable[[Any], Any] = number
+        self.binary_functions: List[Callable] = binary_functions if number is float else make_binary_functions(number)
+
+    def run(self, chunk: Chunk, environment: dict) -> None:
+        code: Optional[List[int]] = chunk.words
+        if code is None:
+            code = chunk.words = chunk.code.tolist()
+        constants: List[float] = chunk.constants
+        names: List[str] = chunk.names
+        functions: List[Callable] = self.binary_functions
+        number: Callable[[Any], Any] = self.number
+        stack: List[float] = []
+        push = stack.append
+        pop = stack.pop
+        end: int = len(code)
+        pc: int = 0
+
+        try:
+            while pc < end:
+                op: int = code[pc]
+                arg: int = code[pc + 1]
+                pc += 2
+
+                if op < BINARY_CONST:
+                    r = pop()
+                    stack[-1] = functions[op](stack[-1], r)
+                elif op < BINARY_LOAD:
+                    stack[-1] = functions[op - BINARY_CONST](stack[-1], constants[arg])
+                elif op < CONST:
+                    stack[-1] = functions[op - BINARY_LOAD](stack[-1], environment[names[arg]])
+                elif op == CONST:
+                    push(constants[arg])
+                elif op == LOAD:
+                    push(environment[names[arg]])
+                elif op == NEG:
+                    stack[-1] = -1 * stack[-1]
+                elif op == NOT:
+                    stack[-1] = number(not stack[-1])
+                elif op == STORE:
+                    environment[names[arg]] = stack[-1]
+                elif op == DEFINE:
+                    environment[names[arg]] = pop()
+                elif op == PRINT:
+                    print(pop())
+                elif op == FLOAT:
+                    stack[-1] = number(stack[-1])
+                elif op == JUMP_IF_FALSE:
+                    if stack[-1]:
+                        pop()
+                    else:
+                        pc = arg
+                elif op == JUMP_IF_TRUE:
+                    if stack[-1]:
+                        pc = arg
+                    else:
+                        pop()
+                # Only CHECK is left
+                elif names[arg] not in environment:
+                    raise UndefinedNameError(f"Variable {names[arg]} does not exist", chunk.name_positions.get(pc - 2))
+        except KeyError as e:
+            # Only the environment lookups can fail with a KeyError
+            raise UndefinedNameError(f"Undefined variable '{e.args[0]}'", chunk.name_positions.get(pc - 2)) from None
+        except CalcError as error:
+            # The operator functions don't know where they are in the source
+            if error.position is None:
+                error.position = chunk.math_positions.get(pc - 2)
+            raise